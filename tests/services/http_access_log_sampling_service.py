@@ -0,0 +1,65 @@
+import asyncio
+import os
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.discovery.dummy_registry import DummyRegistry
+from tomodachi.transport.http import http
+
+
+@tomodachi.service
+class HttpAccessLogSamplingService(tomodachi.Service):
+    name = "test_http_access_log_sampling"
+    discovery = [DummyRegistry]
+    options = {
+        "http": {
+            "port": None,
+            "access_log": "/tmp/6f1e6b0c-3f3e-4d5e-9a3c-1c2b7d8e4f5a.log",
+            "access_log_sample_rate": 0.0,
+            "access_log_slow_request_threshold": 0.2,
+            "access_log_summary_interval": 0.5,
+        }
+    }
+    closer: asyncio.Future
+
+    def __init__(self) -> None:
+        try:
+            os.remove("/tmp/6f1e6b0c-3f3e-4d5e-9a3c-1c2b7d8e4f5a.log")
+        except OSError:
+            pass
+
+    @http("GET", r"/fast/?")
+    async def fast(self, request: web.Request) -> str:
+        return "fast"
+
+    @http("GET", r"/slow/?")
+    async def slow(self, request: web.Request) -> str:
+        await asyncio.sleep(0.3)
+        return "slow"
+
+    @http("GET", r"/error/?")
+    async def error(self, request: web.Request) -> str:
+        raise Exception("error")
+
+    async def _start_service(self) -> None:
+        self.closer = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
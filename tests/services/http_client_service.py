@@ -0,0 +1,70 @@
+import asyncio
+import json
+from typing import Any
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.discovery.dummy_registry import DummyRegistry
+from tomodachi.transport.http import http
+
+
+@tomodachi.service
+class HttpClientService(tomodachi.Service):
+    name = "test_http_client"
+    discovery = [DummyRegistry]
+    options = {
+        "http": {
+            "port": None,
+            "access_log": False,
+            "keepalive_timeout": 5,
+            "client": {"limit_per_host": 2, "read_timeout": 0.5},
+        }
+    }
+    closer: asyncio.Future
+
+    @http("GET", r"/hello/?")
+    async def hello(self, request: web.Request) -> str:
+        return "hello"
+
+    @http("GET", r"/slow/?")
+    async def slow(self, request: web.Request) -> str:
+        await asyncio.sleep(2.0)
+        return "slow"
+
+    @http("GET", r"/proxy/(?P<path>[a-z]+)/?")
+    async def proxy(self, request: web.Request, path: str) -> Any:
+        async with tomodachi.http_client_connector() as session:
+            try:
+                async with session.get(
+                    "http://127.0.0.1:{}/{}".format(self.context.get("_http_port"), path)
+                ) as response:
+                    return await response.text()
+            except asyncio.TimeoutError:
+                return 504, "timeout"
+
+    @http("GET", r"/stats/?")
+    async def stats(self, request: web.Request) -> str:
+        return json.dumps(tomodachi.http_client_connector.stats())
+
+    async def _start_service(self) -> None:
+        self.closer = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
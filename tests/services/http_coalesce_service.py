@@ -0,0 +1,85 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.discovery.dummy_registry import DummyRegistry
+from tomodachi.transport.http import http
+
+
+@tomodachi.service
+class HttpCoalesceService(tomodachi.Service):
+    name = "test_http_coalesce"
+    discovery = [DummyRegistry]
+    options = {"http": {"port": None, "access_log": True}}
+    calls: Dict[str, int] = {}
+    closer: asyncio.Future
+
+    def count(self, key: str) -> int:
+        self.calls[key] = self.calls.get(key, 0) + 1
+        return self.calls[key]
+
+    @http(["GET", "POST"], r"/items/(?P<id>[^/]+?)/?", coalesce_requests=True)
+    async def item(self, request: web.Request, id: str) -> str:
+        count = self.count("item-{}".format(id))
+        await asyncio.sleep(0.2)
+        return "{} {}".format(id, count)
+
+    @http("GET", r"/user/?", coalesce_requests=True, coalesce_headers=["Authorization"])
+    async def user(self, request: web.Request) -> str:
+        count = self.count("user")
+        await asyncio.sleep(0.2)
+        return "{} {}".format(request.headers.get("Authorization"), count)
+
+    @http("GET", r"/missing/?", coalesce_requests=True)
+    async def missing(self, request: web.Request) -> str:
+        self.count("missing")
+        await asyncio.sleep(0.2)
+        raise web.HTTPNotFound()
+
+    @http("GET", r"/response/?", coalesce_requests=True)
+    async def response(self, request: web.Request) -> web.Response:
+        count = self.count("response")
+        await asyncio.sleep(0.2)
+        response = web.Response(text="response {}".format(count), status=201, headers={"X-Test": "1"})
+        response.set_cookie("session", "abc")
+        return response
+
+    @http("GET", r"/stream/?", coalesce_requests=True)
+    async def stream(self, request: web.Request) -> Any:
+        count = self.count("stream")
+        await asyncio.sleep(0.2)
+
+        async def _body() -> AsyncIterator[str]:
+            yield "stream {}".format(count)
+
+        return _body()
+
+    @http("GET", r"/uncoalesced/?")
+    async def uncoalesced(self, request: web.Request) -> str:
+        count = self.count("uncoalesced")
+        await asyncio.sleep(0.2)
+        return "uncoalesced {}".format(count)
+
+    async def _start_service(self) -> None:
+        self.closer = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.discovery.dummy_registry import DummyRegistry
+from tomodachi.transport.http import http
+
+
+@tomodachi.service
+class HttpConcurrencyLimitService(tomodachi.Service):
+    name = "test_http_concurrency_limit"
+    discovery = [DummyRegistry]
+    options = {
+        "http": {
+            "port": None,
+            "access_log": True,
+            "max_concurrent_requests": 3,
+            "max_queued_requests": 0,
+            "overload_retry_after": 5,
+        }
+    }
+    closer: asyncio.Future
+
+    @http("GET", r"/slow/?", max_concurrent_requests=1, max_queued_requests=1, max_queue_time=0.1)
+    async def slow(self, request: web.Request) -> str:
+        await asyncio.sleep(0.5)
+        return "slow"
+
+    @http("GET", r"/queued/?", max_concurrent_requests=1, max_queued_requests=5, max_queue_time=5.0)
+    async def queued(self, request: web.Request) -> str:
+        await asyncio.sleep(0.1)
+        return "queued"
+
+    @http("GET", r"/blocking/?")
+    async def blocking(self, request: web.Request) -> str:
+        await asyncio.sleep(0.5)
+        return "blocking"
+
+    @http("GET", r"/health/?", ignore_concurrency_limit=True)
+    async def health(self, request: web.Request) -> Any:
+        execution_context = tomodachi.get_execution_context()
+        return {
+            "body": "{} {}".format(
+                execution_context.get("http_queued_requests", 0), execution_context.get("http_shed_requests", 0)
+            ),
+            "status": 200,
+        }
+
+    async def _start_service(self) -> None:
+        self.closer = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
@@ -0,0 +1,76 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.discovery.dummy_registry import DummyRegistry
+from tomodachi.transport.http import http
+
+
+@tomodachi.service
+class HttpDeadlineService(tomodachi.Service):
+    name = "test_http_deadline"
+    discovery = [DummyRegistry]
+    options = {"http": {"port": None, "access_log": False}}
+    calls: Dict[str, int] = {}
+    cancelled: Dict[str, bool] = {}
+    closer: asyncio.Future
+
+    @http("GET", r"/remaining/?")
+    async def remaining(self, request: web.Request) -> str:
+        self.calls["remaining"] = self.calls.get("remaining", 0) + 1
+        remaining_time = tomodachi.get_remaining_time()
+        return "none" if remaining_time is None else "{0:.1f}".format(remaining_time)
+
+    @http("GET", r"/slow/?")
+    async def slow(self, request: web.Request) -> str:
+        self.calls["slow"] = self.calls.get("slow", 0) + 1
+        try:
+            await asyncio.sleep(2.0)
+        except asyncio.CancelledError:
+            self.cancelled["slow"] = True
+            raise
+        return "slow"
+
+    @http("GET", r"/stream/?")
+    async def stream(self, request: web.Request) -> Any:
+        async def _body() -> AsyncIterator[str]:
+            for i in range(4):
+                await asyncio.sleep(0.1)
+                yield "chunk {}\n".format(i)
+
+        return _body()
+
+    @http("GET", r"/propagate/?")
+    async def propagate(self, request: web.Request) -> str:
+        async with tomodachi.http_client_connector() as session:
+            url = "http://127.0.0.1:{}/header".format(self.context.get("_http_port"))
+            async with session.get(url) as response:
+                return await response.text()
+
+    @http("GET", r"/header/?")
+    async def header(self, request: web.Request) -> str:
+        return request.headers.get("X-Request-Timeout", "")
+
+    async def _start_service(self) -> None:
+        self.closer = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Optional
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.discovery.dummy_registry import DummyRegistry
+from tomodachi.transport.http import http
+
+
+def api_key(request: web.Request) -> Optional[str]:
+    return request.headers.get("X-Api-Key")
+
+
+@tomodachi.service
+class HttpRateLimitService(tomodachi.Service):
+    name = "test_http_rate_limit"
+    discovery = [DummyRegistry]
+    options = {"http": {"port": None, "access_log": True}}
+    closer: asyncio.Future
+
+    @http("GET", r"/limited/?", rate_limit=0.5, rate_limit_burst=2)
+    async def limited(self, request: web.Request) -> str:
+        return "limited"
+
+    @http("GET", r"/keyed/?", rate_limit=0.5, rate_limit_key=api_key)
+    async def keyed(self, request: web.Request) -> str:
+        return "keyed"
+
+    @http("GET", r"/unlimited/?")
+    async def unlimited(self, request: web.Request) -> Any:
+        return str(tomodachi.get_execution_context().get("http_rate_limited_requests", 0))
+
+    async def _start_service(self) -> None:
+        self.closer = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
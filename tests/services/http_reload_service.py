@@ -0,0 +1,20 @@
+import os
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.transport.http import http
+
+
+@tomodachi.service
+class HttpReloadService(tomodachi.Service):
+    name = "test_http_reload"
+    options = {
+        "http": {
+            "port": int(os.environ.get("TEST_HTTP_PORT") or 53281),
+        }
+    }
+
+    @http("GET", r"/pid/?")
+    async def pid(self, request: web.Request) -> str:
+        return str(os.getpid())
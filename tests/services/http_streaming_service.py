@@ -0,0 +1,101 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, Tuple, Union
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.discovery.dummy_registry import DummyRegistry
+from tomodachi.transport.http import EventStreamResponse, RequestBodyStream, event_stream, http
+
+
+@tomodachi.service
+class HttpStreamingService(tomodachi.Service):
+    name = "test_http_streaming"
+    discovery = [DummyRegistry]
+    options = {"http": {"port": None, "access_log": True}}
+    closer: asyncio.Future
+
+    @http("POST", r"/upload/?", stream_request_body=True, client_max_size="2MB")
+    async def upload(self, request: web.Request, body_stream: RequestBodyStream) -> Any:
+        chunk_count = 0
+        max_chunk_size = 0
+        async for chunk in body_stream:
+            chunk_count += 1
+            max_chunk_size = max(max_chunk_size, len(chunk))
+
+        return {
+            "body": "{} {} {}".format(body_stream.size, chunk_count, max_chunk_size),
+            "status": 200,
+        }
+
+    @http("POST", r"/upload-limited/?", stream_request_body=True, client_max_size=1024)
+    async def upload_limited(self, request: web.Request, body_stream: RequestBodyStream) -> Any:
+        async for _ in body_stream:
+            pass
+
+        return str(body_stream.size)
+
+    @http("POST", r"/buffered-limited/?", client_max_size=1024)
+    async def buffered_limited(self, request: web.Request) -> Any:
+        body = await request.read()
+        return str(len(body))
+
+    @http("GET", r"/stream/?")
+    async def stream(self, request: web.Request) -> AsyncIterator[str]:
+        for i in range(3):
+            await asyncio.sleep(0.01)
+            yield "chunk {}\n".format(i)
+
+    @http("GET", r"/stream-tuple/?")
+    async def stream_tuple(self, request: web.Request) -> Tuple[int, AsyncIterator[bytes], Dict]:
+        async def _generator() -> AsyncIterator[bytes]:
+            yield b"tuple "
+            yield b"body"
+
+        return 201, _generator(), {"X-Stream": "tuple"}
+
+    @http("GET", r"/stream-exception/?")
+    async def stream_exception(self, request: web.Request) -> AsyncIterator[str]:
+        yield "first chunk\n"
+        raise Exception("exception in stream")
+
+    @http("GET", r"/events/?")
+    async def events(self, request: web.Request) -> EventStreamResponse:
+        async def _events() -> AsyncIterator[Union[str, Dict]]:
+            yield "first"
+            await asyncio.sleep(0.25)
+            yield {"event": "update", "id": 2, "data": {"value": 2}}
+            yield "multiple\nlines"
+
+        return event_stream(_events(), heartbeat_interval=0.1, retry=1000)
+
+    @http("GET", r"/events-feed/?")
+    async def events_feed(self, request: web.Request) -> EventStreamResponse:
+        async def _events() -> AsyncIterator[str]:
+            yield "connected"
+            await asyncio.Future()
+            yield "never"
+
+        return event_stream(_events(), heartbeat_interval=0.1)
+
+    async def _start_service(self) -> None:
+        self.closer = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
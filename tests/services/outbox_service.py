@@ -0,0 +1,40 @@
+import asyncio
+import os
+import tempfile
+from typing import Any, List
+
+import tomodachi
+from tomodachi.outbox import Outbox, OutboxMessage, SQLiteOutboxStore
+from tomodachi.outbox.outbox import AWS_SNS_SQS_PUBLISH
+
+
+class RecordingOutbox(Outbox):
+    @staticmethod
+    async def publish(service: Any, message: OutboxMessage) -> None:
+        service.published.append(message.data)
+
+
+@tomodachi.service
+class OutboxService(tomodachi.Service):
+    name = "test_outbox"
+    outbox = RecordingOutbox(
+        SQLiteOutboxStore(os.path.join(tempfile.mkdtemp(), "outbox.db")), poll_interval=0.1, retention=0
+    )
+
+    published: List[Any] = []
+
+    async def _start_service(self) -> None:
+        # messages stored by a previous instance of the service, before a restart
+        await self.outbox.store.add(
+            [
+                OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": 1}),
+                OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": 2}),
+            ]
+        )
+
+    async def _started_service(self) -> None:
+        for _ in range(50):
+            if len(self.published) == 2:
+                break
+            await asyncio.sleep(0.1)
+        tomodachi.exit()
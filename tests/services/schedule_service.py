@@ -1,4 +1,5 @@
 import asyncio
+from typing import List
 
 import tomodachi
 from tomodachi.transport.schedule import heartbeat, schedule
@@ -11,6 +12,8 @@ class SchedulerService(tomodachi.Service):
     closer: asyncio.Future
     seconds_triggered = 0
     third_seconds_triggered = 0
+    quarter_seconds_triggered = 0
+    quarter_second_invocation_times: List[str] = []
 
     @heartbeat
     async def every_second(self) -> None:
@@ -20,6 +23,11 @@ class SchedulerService(tomodachi.Service):
     async def every_third_second(self) -> None:
         self.third_seconds_triggered += 1
 
+    @schedule(interval="250ms")
+    async def every_quarter_second(self, invocation_time: str = "") -> None:
+        self.quarter_seconds_triggered += 1
+        self.quarter_second_invocation_times.append(invocation_time)
+
     @schedule(interval="*/2 * * * *")
     async def every_second_minute(self) -> None:
         pass
@@ -0,0 +1,57 @@
+import asyncio
+import json
+from typing import Any, Callable
+
+from aiohttp import web
+
+import tomodachi
+from tomodachi.discovery.dummy_registry import DummyRegistry
+from tomodachi.transport.http import WebSocketHub, http, websocket
+
+
+@tomodachi.service
+class WebSocketHubService(tomodachi.Service):
+    name = "test_websocket_hub"
+    discovery = [DummyRegistry]
+    options = {"http": {"port": None, "access_log": True}}
+    closer: asyncio.Future
+    hub = WebSocketHub(max_queue_size=10)
+
+    @websocket(r"/ws/(?P<room>[^/]+?)/?")
+    async def room(self, websocket: web.WebSocketResponse, room: str) -> Callable:
+        self.hub.subscribe(websocket, room)
+
+        async def _receive(data: str) -> None:
+            self.hub.broadcast({"room": room, "message": data}, topic=room)
+
+        return _receive
+
+    @http("POST", r"/broadcast/?")
+    async def broadcast(self, request: web.Request) -> str:
+        return str(self.hub.broadcast(await request.text()))
+
+    @http("GET", r"/stats/?")
+    async def stats(self, request: web.Request) -> Any:
+        return json.dumps(self.hub.stats())
+
+    async def _start_service(self) -> None:
+        self.closer = asyncio.Future()
+
+    async def _started_service(self) -> None:
+        async def _async() -> None:
+            async def sleep_and_kill() -> None:
+                await asyncio.sleep(10.0)
+                if not self.closer.done():
+                    self.closer.set_result(None)
+
+            task = asyncio.ensure_future(sleep_and_kill())
+            await self.closer
+            if not task.done():
+                task.cancel()
+            tomodachi.exit()
+
+        asyncio.ensure_future(_async())
+
+    def stop_service(self) -> None:
+        if not self.closer.done():
+            self.closer.set_result(None)
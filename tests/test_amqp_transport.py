@@ -1,10 +1,24 @@
-from typing import Any
+import asyncio
+import time
+from typing import Any, Dict, List, Tuple
 
 import pytest
 
 import tomodachi
 from run_test_service_helper import start_service
-from tomodachi.transport.amqp import AmqpException, AmqpTransport
+from tomodachi.helpers.deadline import format_deadline, reset_deadline, set_deadline
+from tomodachi.helpers.spool import PublishSpool
+from tomodachi.transport.amqp import (
+    AmqpAckCoalescer,
+    AmqpChannelClosed,
+    AmqpChannelPool,
+    AmqpConnectionException,
+    AmqpException,
+    AmqpPrefetchTuner,
+    AmqpPublishConfirms,
+    AmqpPublishRejectedException,
+    AmqpTransport,
+)
 
 
 def test_routing_key() -> None:
@@ -72,3 +86,340 @@ def test_publish_invalid_credentials(capsys: Any, loop: Any) -> None:
 
     out, err = capsys.readouterr()
     assert "Unable to connect [amqp] to 127.0.0.1:54321" in (out + err)
+
+
+def test_channel_pool_selection() -> None:
+    class Channel:
+        def __init__(self) -> None:
+            self.is_open = True
+
+    channels = [Channel(), Channel(), Channel()]
+    pool = AmqpChannelPool(list(channels))
+
+    # equally busy channels are used in turn
+    assert [pool.acquire() for _ in range(3)] == channels
+    assert pool.in_flight == 3
+
+    # the least busy channel is selected
+    pool.release(channels[1])
+    assert pool.acquire() is channels[1]
+    pool.release(channels[0])
+    pool.release(channels[2])
+    channels[0].is_open = False
+    assert pool.acquire() is channels[2]
+
+    new_channel = Channel()
+    assert pool.replace(channels[0], new_channel) is True
+    assert pool.replace(channels[0], new_channel) is False
+    assert pool.acquire() is new_channel
+
+    for channel in pool.channels:
+        channel.is_open = False
+    with pytest.raises(AmqpChannelClosed):
+        pool.acquire()
+
+
+def test_publisher_confirms(monkeypatch: Any, loop: Any) -> None:
+    class Frame:
+        def __init__(self, delivery_tag: int, multiple: bool = False) -> None:
+            self.delivery_tag = delivery_tag
+            self.multiple = multiple
+
+    class Channel:
+        def __init__(self) -> None:
+            self.publisher_confirms = False
+            self.published: List[bytes] = []
+
+        async def confirm_select(self) -> None:
+            self.publisher_confirms = True
+
+        async def basic_publish(self, payload: bytes, exchange_name: str, routing_key: str, properties: Dict) -> None:
+            self.published.append(payload)
+
+        def connection_closed(self, server_code: Any = None, server_reason: Any = None, exception: Any = None) -> None:
+            pass
+
+    async def _async() -> None:
+        channel = Channel()
+        confirms = await AmqpPublishConfirms.enable(channel, 3)
+        assert channel.publisher_confirms is False
+
+        tasks = [
+            asyncio.ensure_future(confirms.publish(str(i).encode(), "amq.topic", "test.topic", {})) for i in range(4)
+        ]
+        await asyncio.sleep(0.01)
+
+        # the window only allows 3 unconfirmed messages
+        assert channel.published == [b"0", b"1", b"2"]
+        assert len(confirms) == 3
+
+        # a single confirm for multiple messages resolves all of them
+        await channel.basic_server_ack(Frame(2, multiple=True))
+        await asyncio.sleep(0.01)
+        assert [task.done() for task in tasks] == [True, True, False, False]
+        assert channel.published == [b"0", b"1", b"2", b"3"]
+
+        await channel.basic_server_nack(Frame(4))
+        await asyncio.sleep(0.01)
+        with pytest.raises(AmqpPublishRejectedException):
+            tasks[3].result()
+
+        # unconfirmed messages fail when the channel is closed
+        channel.connection_closed(exception=Exception("connection lost"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(AmqpChannelClosed):
+            tasks[2].result()
+        assert len(confirms) == 0
+
+        # publishes go through the confirms of the channel also when no messages are unconfirmed
+        channel = Channel()
+        confirms = await AmqpPublishConfirms.enable(channel, 3)
+        monkeypatch.setattr(AmqpTransport, "channel", channel)
+        monkeypatch.setattr(AmqpTransport, "publish_channel_pool", None)
+        monkeypatch.setattr(AmqpTransport, "publish_confirms", {channel: confirms})
+        task = asyncio.ensure_future(AmqpTransport.publish_to_channel(b"0", "amq.topic", "test.topic", {}, {}))
+        await asyncio.sleep(0.01)
+        assert channel.published == [b"0"]
+        assert len(confirms) == 1
+        await channel.basic_server_ack(Frame(1))
+        await task
+
+    loop.run_until_complete(_async())
+
+
+def test_publish_spooled_without_connection(monkeypatch: Any, tmp_path: Any, loop: Any) -> None:
+    class Service:
+        context: Dict = {}
+        message_envelope = None
+
+    async def connect(service: Any, context: Dict) -> None:
+        raise AmqpConnectionException("connection refused")
+
+    async def _async() -> None:
+        # the first publish is spooled while the spool is still empty
+        spool = PublishSpool(str(tmp_path), "amqp", fsync="never")
+        monkeypatch.setattr(AmqpTransport, "channel", None)
+        monkeypatch.setattr(AmqpTransport, "publish_spool", spool)
+        monkeypatch.setattr(AmqpTransport, "connect", connect)
+        await AmqpTransport.publish(Service(), "data", "test.topic", exchange_name="amq.topic")
+        assert len(spool) == 1
+        await spool.close()
+
+    loop.run_until_complete(_async())
+
+
+def test_publish_deadline(monkeypatch: Any, loop: Any) -> None:
+    class Service:
+        context: Dict = {}
+        message_envelope = None
+
+    published: List[Dict] = []
+
+    async def _publish_message(*args: Any) -> None:
+        published.append(args[3])
+
+    async def _async() -> None:
+        monkeypatch.setattr(AmqpTransport, "channel", object())
+        monkeypatch.setattr(AmqpTransport, "_publish_message", _publish_message)
+        deadline = time.time() + 10
+        token = set_deadline(deadline)
+        try:
+            await AmqpTransport.publish(Service(), "data", "test.topic", "amq.topic")
+            await AmqpTransport.publish(Service(), "data", "test.topic", "amq.topic", propagate_deadline=False)
+        finally:
+            reset_deadline(token)
+
+        assert published[0]["headers"] == {"x-tomodachi-deadline": format_deadline(deadline)}
+        assert 9000 < int(published[0]["expiration"]) <= 10000
+        assert published[1] == {}
+
+    loop.run_until_complete(_async())
+
+
+def test_ack_coalescer(loop: Any) -> None:
+    class Channel:
+        def __init__(self) -> None:
+            self.frames: List[Tuple[str, int, bool]] = []
+
+        async def basic_client_ack(self, delivery_tag: int, multiple: bool = False) -> None:
+            self.frames.append(("ack", delivery_tag, multiple))
+
+        async def basic_client_nack(self, delivery_tag: int, multiple: bool = False, requeue: bool = True) -> None:
+            self.frames.append(("nack", delivery_tag, multiple))
+
+    async def _async() -> None:
+        channel = Channel()
+        ack_coalescer = AmqpAckCoalescer(channel, 10.0, 4)
+
+        # delivery tag 4 is still being handled when the acks are flushed
+        for delivery_tag in (2, 1, 3, 5):
+            await ack_coalescer.ack(delivery_tag)
+        assert channel.frames == [("ack", 3, True), ("ack", 5, False)]
+        assert len(ack_coalescer) == 0
+
+        channel.frames = []
+        await ack_coalescer.nack(6)
+        await ack_coalescer.ack(4)
+        await ack_coalescer.ack(7)
+        await ack_coalescer.ack(8)
+        assert channel.frames == [("nack", 6, False)]
+        await ack_coalescer.flush()
+        assert channel.frames == [("nack", 6, False), ("ack", 8, True)]
+
+        # pending acks are sent after the flush interval
+        channel.frames = []
+        ack_coalescer.flush_interval = 0.01
+        await ack_coalescer.ack(9)
+        await asyncio.sleep(0.1)
+        assert channel.frames == [("ack", 9, False)]
+
+    loop.run_until_complete(_async())
+
+
+def test_ack_coalescer_gap(loop: Any) -> None:
+    class Channel:
+        def __init__(self) -> None:
+            self.frames: List[Tuple[str, int, bool]] = []
+
+        async def basic_client_ack(self, delivery_tag: int, multiple: bool = False) -> None:
+            self.frames.append(("ack", delivery_tag, multiple))
+
+    async def _async() -> None:
+        channel = Channel()
+        ack_coalescer = AmqpAckCoalescer(channel, 10.0, 100)
+
+        # delivery tag 1 is never settled, the messages after it are acked individually
+        for delivery_tag in range(2, 10002):
+            await ack_coalescer.ack(delivery_tag)
+        assert len(channel.frames) == 10000
+        assert all(not multiple for _, _, multiple in channel.frames)
+        assert ack_coalescer._settled == [[2, 10001]]
+
+        # skipped delivery tags don't stop the multiple acks
+        channel.frames = []
+        ack_coalescer.skip(1)
+        ack_coalescer.skip(10003)
+        for delivery_tag in (10002, 10004, 10005):
+            await ack_coalescer.ack(delivery_tag)
+        await ack_coalescer.flush()
+        assert channel.frames == [("ack", 10005, True)]
+        assert ack_coalescer._settled == []
+
+    loop.run_until_complete(_async())
+
+
+def test_duplicate_messages(loop: Any) -> None:
+    class Channel:
+        def __init__(self) -> None:
+            self.frames: List[Tuple[str, int, bool]] = []
+
+        async def basic_client_ack(self, delivery_tag: int, multiple: bool = False) -> None:
+            self.frames.append(("ack", delivery_tag, multiple))
+
+        async def basic_client_nack(self, delivery_tag: int, multiple: bool = False, requeue: bool = True) -> None:
+            self.frames.append(("nack", delivery_tag, multiple))
+
+    async def _async() -> None:
+        channel = Channel()
+        context: Dict = {}
+
+        # without coalesced acks, redeliveries are left unacknowledged
+        await AmqpTransport.duplicate_message(context, "uuid:handler", channel, 2)
+        await AmqpTransport.settle_duplicate_messages(context, "uuid:handler", True)
+        assert channel.frames == []
+
+        ack_coalescers = AmqpTransport.ack_coalescers
+        AmqpTransport.ack_coalescers = {channel: AmqpAckCoalescer(channel, 0.0, 1)}
+        try:
+            # redeliveries of a message being handled are settled the same way as the message
+            context["_amqp_duplicate_messages"] = {"acked:handler": [], "nacked:handler": []}
+            await AmqpTransport.duplicate_message(context, "acked:handler", channel, 3)
+            await AmqpTransport.duplicate_message(context, "nacked:handler", channel, 4)
+            assert channel.frames == []
+            await AmqpTransport.settle_duplicate_messages(context, "nacked:handler", False)
+            await AmqpTransport.settle_duplicate_messages(context, "acked:handler", True)
+            assert channel.frames == [("nack", 4, False), ("ack", 3, False)]
+
+            # later redeliveries of an acked message are acked right away
+            channel.frames = []
+            await AmqpTransport.duplicate_message(context, "acked:handler", channel, 5)
+            assert channel.frames == [("ack", 5, False)]
+
+            # while redeliveries of a message that was neither acked nor nacked are left unacknowledged
+            channel.frames = []
+            context["_amqp_duplicate_messages"]["unsettled:handler"] = []
+            await AmqpTransport.duplicate_message(context, "unsettled:handler", channel, 6)
+            await AmqpTransport.settle_duplicate_messages(context, "unsettled:handler", None)
+            await AmqpTransport.duplicate_message(context, "unsettled:handler", channel, 7)
+            assert channel.frames == []
+        finally:
+            AmqpTransport.ack_coalescers = ack_coalescers
+
+    loop.run_until_complete(_async())
+
+
+def test_prefetch_tuner(loop: Any) -> None:
+    class Channel:
+        def __init__(self) -> None:
+            self.channel_id = 1
+            self.prefetch_counts: List[int] = []
+
+        async def basic_qos(self, prefetch_count: int, prefetch_size: int, connection_global: bool) -> None:
+            self.prefetch_counts.append(prefetch_count)
+
+    channel = Channel()
+    prefetch_tuner = AmqpPrefetchTuner(channel, 100, 10, 300, 1.5, 3600.0)
+    assert prefetch_tuner.prefetch_count == 100
+
+    # no adjustments while idle
+    assert prefetch_tuner.adjust(5.0) is None
+
+    # the prefetch count is increased additively while the latency stays near the lowest latency seen
+    for _ in range(1000):
+        prefetch_tuner.record(0.01)
+    assert prefetch_tuner.adjust(5.0) == 110
+    assert round(prefetch_tuner.latency, 6) == 0.01
+    for _ in range(1000):
+        prefetch_tuner.record(0.012)
+    assert prefetch_tuner.adjust(5.0) == 120
+
+    # and halved once the latency rises - the measured latency is smoothed between adjustments
+    for _ in range(1000):
+        prefetch_tuner.record(0.03)
+    assert prefetch_tuner.adjust(5.0) == 60
+    for _ in range(1000):
+        prefetch_tuner.record(0.01)
+    assert prefetch_tuner.adjust(5.0) == 30
+    for _ in range(1000):
+        prefetch_tuner.record(0.01)
+    assert prefetch_tuner.adjust(5.0) == 40
+
+    # handlers that are slow regardless of the prefetch count give a new baseline at the lower bound
+    for _ in range(3):
+        for _ in range(1000):
+            prefetch_tuner.record(1.0)
+        prefetch_tuner.adjust(5.0)
+    assert prefetch_tuner.prefetch_count == 10
+    assert prefetch_tuner.baseline_latency == prefetch_tuner.latency
+    for _ in range(1000):
+        prefetch_tuner.record(1.0)
+    assert prefetch_tuner.adjust(5.0) == 20
+
+    loop.run_until_complete(prefetch_tuner.set_prefetch_count(prefetch_tuner.prefetch_count))
+    assert channel.prefetch_counts == [20]
+
+
+def test_prefetch_tuner_saturated_consumer() -> None:
+    # a consumer that keeps up with 100 messages in flight, while the latency grows with any messages beyond that
+    prefetch_tuner = AmqpPrefetchTuner(object(), 10, 10, 1000, 1.5, 5.0)
+    prefetch_counts = []
+    for _ in range(200):
+        latency = 0.1 * max(prefetch_tuner.prefetch_count / 100, 1.0)
+        for _ in range(100):
+            prefetch_tuner.record(latency)
+        prefetch_tuner.adjust(5.0)
+        prefetch_counts.append(prefetch_tuner.prefetch_count)
+
+    # the prefetch count settles around the capacity of the consumer instead of running to the upper bound
+    assert max(prefetch_counts) < 200
+    assert min(prefetch_counts[50:]) >= 50
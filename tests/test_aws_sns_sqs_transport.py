@@ -4,7 +4,7 @@ import pytest
 
 import tomodachi
 from run_test_service_helper import start_service
-from tomodachi.transport.aws_sns_sqs import AWSSNSSQSException, AWSSNSSQSTransport
+from tomodachi.transport.aws_sns_sqs import AWSSNSSQSException, AWSSNSSQSTransport, RetryPolicy
 
 
 def test_get_standard_topic_name() -> None:
@@ -172,3 +172,29 @@ def test_validate_queue_name() -> None:
         )
     assert "vKbED4a66BaGI0cGF0iP8HNF202Sk2XuFnEuJI59GX5VfgEzLaMIU10cVscG7E8vvLIU0MhL7kmsPEy81" in str(e)
     assert AWSSNSSQSTransport.validate_queue_name("abcd") is None
+
+
+def test_retry_policy_delay() -> None:
+    retry_policy = RetryPolicy(base_delay=2.0, multiplier=3.0, jitter=0, max_delay=100.0)
+    assert [retry_policy.delay(receive_count) for receive_count in (None, 1, 2, 3, 4, 5, 10000)] == [
+        2,
+        2,
+        6,
+        18,
+        54,
+        100,
+        100,
+    ]
+
+    retry_policy = RetryPolicy(base_delay=10.0, multiplier=2.0, jitter=0.5, max_delay=900.0)
+    delays = [retry_policy.delay(4) for _ in range(100)]
+    assert min(delays) >= 40 and max(delays) <= 80
+
+    assert RetryPolicy().delay(1) in (0, 1)
+
+    with pytest.raises(ValueError):
+        RetryPolicy(multiplier=0.5)
+    with pytest.raises(ValueError):
+        RetryPolicy(jitter=2)
+    with pytest.raises(ValueError):
+        RetryPolicy(max_delay=86400)
@@ -0,0 +1,93 @@
+import time
+from typing import List, Tuple
+
+import pytest
+
+import tomodachi
+from tomodachi.helpers.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, get_circuit_breaker
+
+
+def test_circuit_breaker_consecutive_failures() -> None:
+    circuit_breaker = CircuitBreaker("handler", consecutive_failures=3, open_duration=60)
+    transitions: List[Tuple[str, str]] = []
+    circuit_breaker.add_listener(lambda _, previous_state, state: transitions.append((previous_state, state)))
+
+    circuit_breaker.record_failure()
+    circuit_breaker.record_failure()
+    circuit_breaker.record_success()
+    circuit_breaker.record_failure()
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CLOSED
+    assert circuit_breaker.allow_request() is True
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == OPEN
+    assert circuit_breaker.allow_request() is False
+    assert 59 < circuit_breaker.remaining_open_time() <= 60
+    assert transitions == [(CLOSED, OPEN)]
+    assert tomodachi.get_execution_context().get("circuit_breaker_states", {}).get("handler") == OPEN
+
+
+def test_circuit_breaker_failure_rate() -> None:
+    circuit_breaker = CircuitBreaker(
+        failure_rate_threshold=0.5, consecutive_failures=100, window_size=10, minimum_calls=4
+    )
+
+    circuit_breaker.record_failure()
+    circuit_breaker.record_failure()
+    circuit_breaker.record_success()
+    assert circuit_breaker.state == CLOSED
+
+    # the circuit is only opened on failures
+    circuit_breaker.record_success()
+    assert circuit_breaker.failure_rate == 0.5
+    assert circuit_breaker.state == CLOSED
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.failure_rate == 0.6
+    assert circuit_breaker.state == OPEN
+
+
+def test_circuit_breaker_half_open() -> None:
+    circuit_breaker = CircuitBreaker(consecutive_failures=1, open_duration=0.05, half_open_max_calls=2)
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == OPEN
+    time.sleep(0.06)
+    assert circuit_breaker.state == HALF_OPEN
+
+    # only a limited number of probe calls are allowed while half-open
+    assert circuit_breaker.allow_request() is True
+    assert circuit_breaker.allow_request() is True
+    assert circuit_breaker.allow_request() is False
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert circuit_breaker.allow_request() is True
+    circuit_breaker.record_success()
+    assert circuit_breaker.state == CLOSED
+    assert circuit_breaker.failure_rate == 0.0
+    assert circuit_breaker.allow_request() is True
+
+
+def test_get_circuit_breaker() -> None:
+    assert get_circuit_breaker("handler", None) is None
+    assert get_circuit_breaker("handler", False) is None
+
+    circuit_breaker = get_circuit_breaker("handler", True)
+    assert circuit_breaker is not None and circuit_breaker.name == "handler"
+
+    circuit_breaker = get_circuit_breaker("handler", {"consecutive_failures": 2, "open_duration": 5})
+    assert circuit_breaker is not None
+    assert (circuit_breaker.name, circuit_breaker.consecutive_failures_threshold) == ("handler", 2)
+
+    instance = CircuitBreaker("custom")
+    assert get_circuit_breaker("handler", instance) is instance
+    assert instance.name == "custom"
+
+    with pytest.raises(ValueError):
+        get_circuit_breaker("handler", "invalid")
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_rate_threshold=0)
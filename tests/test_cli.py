@@ -1,3 +1,5 @@
+import subprocess
+import sys
 from typing import Any
 
 import pytest
@@ -138,6 +140,28 @@ def test_cli_entrypoint_bad_log_level_argument(capsys: Any) -> None:
     assert (out + err) == "Invalid log level: 'foo' (expected 'debug', 'info', 'warning', 'error' or 'critical')\n"
 
 
+def test_cli_entrypoint_bad_workers_argument(capsys: Any) -> None:
+    with pytest.raises(SystemExit) as pytest_wrapped_exception:
+        tomodachi.cli.cli_entrypoint(["tomodachi", "run", "--production", "--workers", "0", "unknownapp.py"])
+
+    assert pytest_wrapped_exception.type == SystemExit
+    assert pytest_wrapped_exception.value.code == 2
+
+    out, err = capsys.readouterr()
+    assert (out + err) == "Invalid value for --workers option: '0' (expected a positive integer)\n"
+
+
+def test_cli_entrypoint_workers_argument_without_production(capsys: Any) -> None:
+    with pytest.raises(SystemExit) as pytest_wrapped_exception:
+        tomodachi.cli.cli_entrypoint(["tomodachi", "run", "--workers", "2", "unknownapp.py"])
+
+    assert pytest_wrapped_exception.type == SystemExit
+    assert pytest_wrapped_exception.value.code == 2
+
+    out, err = capsys.readouterr()
+    assert (out + err) == "Invalid combination of --workers and code auto reload (use the --production option)\n"
+
+
 def test_cli_entrypoint_bad_logger_argument(capsys: Any) -> None:
     with pytest.raises(SystemExit) as pytest_wrapped_exception:
         tomodachi.cli.cli_entrypoint(["tomodachi", "run", "--logger", "somelogger", "unknownapp.py"])
@@ -278,6 +302,30 @@ def test_cli_start_service_production_mode(capsys: Any) -> None:
     assert "terminated service" in (out + err)
 
 
+def test_cli_start_service_with_workers() -> None:
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "tomodachi",
+            "run",
+            "--production",
+            "--workers",
+            "2",
+            "tests/services/auto_closing_service_exit_call.py",
+        ],
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+
+    output = process.stdout + process.stderr
+    assert process.returncode == 0
+    assert output.count("started worker process") == 2
+    assert output.count("terminated service") == 2
+    assert "worker processes terminated" in output
+
+
 def test_cli_start_service_with_config(capsys: Any) -> None:
     with pytest.raises(SystemExit):
         tomodachi.cli.cli_entrypoint(
@@ -3,7 +3,7 @@ import datetime
 import pytest
 import pytz
 
-from tomodachi.helpers.crontab import get_next_datetime
+from tomodachi.helpers.crontab import compile_crontab, get_next_datetime, get_next_datetimes
 
 
 def test_aliases() -> None:
@@ -151,3 +151,39 @@ def test_impossible_dates() -> None:
 
     with pytest.raises(Exception):
         get_next_datetime("* * * nope *", t)
+
+
+def test_next_datetimes() -> None:
+    t = datetime.datetime(2017, 6, 15, 10, 16, 50)
+    assert get_next_datetimes("0 10 * * mon", t, 3) == [
+        datetime.datetime(2017, 6, 19, 10, 0),
+        datetime.datetime(2017, 6, 26, 10, 0),
+        datetime.datetime(2017, 7, 3, 10, 0),
+    ]
+    assert get_next_datetimes("59 23 L * *", t, 3) == [
+        datetime.datetime(2017, 6, 30, 23, 59),
+        datetime.datetime(2017, 7, 31, 23, 59),
+        datetime.datetime(2017, 8, 31, 23, 59),
+    ]
+    assert get_next_datetimes("0 0 29 2 * 2020,2024", t, 3) == [
+        datetime.datetime(2020, 2, 29, 0, 0),
+        datetime.datetime(2024, 2, 29, 0, 0),
+    ]
+    assert get_next_datetimes("* * * * *", t, 0) == []
+
+    t = pytz.timezone("Europe/Stockholm").localize(datetime.datetime(2017, 6, 15, 10, 16, 50))
+    assert get_next_datetimes("*/30 * * * *", t, 2) == [
+        pytz.timezone("Europe/Stockholm").localize(datetime.datetime(2017, 6, 15, 10, 30)),
+        pytz.timezone("Europe/Stockholm").localize(datetime.datetime(2017, 6, 15, 11, 0)),
+    ]
+
+    # the fire times of each day are found also when the search starts late in the day or month
+    t = datetime.datetime(2017, 6, 29, 23, 59, 30)
+    assert get_next_datetime("* * * * *", t) == datetime.datetime(2017, 6, 30, 0, 0)
+    t = datetime.datetime(2020, 9, 9, 11, 45, 17)
+    assert get_next_datetime("7 10 30 * Lsun", t) == datetime.datetime(2020, 9, 27, 10, 7)
+
+
+def test_compiled_expressions_are_cached() -> None:
+    assert compile_crontab("*/5 * * * *") is compile_crontab("*/5 * * * *")
+    assert compile_crontab("@daily").days == compile_crontab("0 0 * * *").days
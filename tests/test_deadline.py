@@ -0,0 +1,70 @@
+import asyncio
+import time
+from typing import Any, Optional
+
+from tomodachi.helpers.deadline import (
+    deadline_exceeded,
+    format_deadline,
+    get_deadline,
+    get_remaining_time,
+    parse_deadline,
+    reset_deadline,
+    set_deadline,
+)
+
+
+def test_parse_deadline() -> None:
+    assert parse_deadline("1700000000.5") == 1700000000.5
+    assert parse_deadline(b"1.25") == 1.25
+    assert parse_deadline(3) == 3.0
+    assert parse_deadline(None) is None
+    assert parse_deadline("") is None
+    assert parse_deadline("invalid") is None
+    assert parse_deadline(True) is None
+    assert parse_deadline("nan") is None
+    assert parse_deadline("inf") is None
+    assert parse_deadline("-inf") is None
+    assert parse_deadline("1e400") is None
+    assert parse_deadline(format_deadline(1700000000.12345)) == 1700000000.123
+
+
+def test_set_deadline() -> None:
+    assert get_deadline() is None
+    assert get_remaining_time() is None
+    assert deadline_exceeded() is False
+
+    deadline = time.time() + 10
+    token = set_deadline(deadline)
+    assert get_deadline() == deadline
+    remaining_time = get_remaining_time()
+    assert remaining_time is not None and 9 < remaining_time <= 10
+    assert deadline_exceeded() is False
+
+    # a deadline can be shortened but never extended
+    inner_token = set_deadline(deadline + 10)
+    assert get_deadline() == deadline
+    reset_deadline(inner_token)
+    inner_token = set_deadline(deadline - 20)
+    assert get_deadline() == deadline - 20
+    assert get_remaining_time() == 0.0
+    assert deadline_exceeded() is True
+    reset_deadline(inner_token)
+
+    reset_deadline(token)
+    assert get_deadline() is None
+
+
+def test_deadline_in_tasks(loop: Any) -> None:
+    async def _remaining() -> Optional[float]:
+        return get_remaining_time()
+
+    async def _async() -> None:
+        assert await asyncio.create_task(_remaining()) is None
+        token = set_deadline(time.time() + 5)
+        task = asyncio.create_task(_remaining())
+        reset_deadline(token)
+        remaining_time = await task
+        assert remaining_time is not None and 4 < remaining_time <= 5
+        assert get_deadline() is None
+
+    loop.run_until_complete(_async())
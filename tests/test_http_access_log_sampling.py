@@ -0,0 +1,69 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+
+import aiohttp
+
+from run_test_service_helper import start_service
+from tomodachi.transport.http import AccessLogSummary
+
+
+def test_access_log_summary() -> None:
+    summary = AccessLogSummary(max_samples=100)
+    for i in range(1, 1001):
+        summary.add("handler", 200 if i % 10 else 500, i / 1000.0)
+    summary.add(None, 404, 0.5)
+
+    result = summary.flush()
+    assert [(s["handler"], s["request_count"], s["status_codes"]) for s in result] == [
+        ("handler", 1000, {"200": 900, "500": 100}),
+        (None, 1, {"404": 1}),
+    ]
+    assert result[0]["request_time_max"] == 1.0
+    assert 0.3 < result[0]["request_time_p50"] < 0.7
+    assert result[0]["request_time_p50"] <= result[0]["request_time_p90"] <= result[0]["request_time_p99"] <= 1.0
+    assert result[1]["request_time_p50"] == result[1]["request_time_p99"] == result[1]["request_time_max"] == 0.5
+    assert summary.flush() == []
+
+
+def test_access_log_sampling(loop: Any) -> None:
+    log_path = "/tmp/6f1e6b0c-3f3e-4d5e-9a3c-1c2b7d8e4f5a.log"
+
+    services, future = start_service("tests/services/http_access_log_sampling_service.py", loop=loop)
+    instance = services.get("test_http_access_log_sampling")
+    port = instance.context.get("_http_port")
+
+    def _read_log() -> List[Dict]:
+        with open(log_path) as file:
+            return [json.loads(line) for line in file.read().splitlines() if line]
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+            for _ in range(20):
+                response = await client.get("http://127.0.0.1:{}/fast".format(port))
+                assert response.status == 200
+            assert (await client.get("http://127.0.0.1:{}/slow".format(port))).status == 200
+            assert (await client.get("http://127.0.0.1:{}/error".format(port))).status == 500
+
+            # only errors and slow requests are logged when the sample rate is 0.0
+            request_paths = [line.get("request_path") for line in _read_log() if line.get("status_code")]
+            assert request_paths == ["/slow", "/error"]
+
+            await asyncio.sleep(0.6)
+            summaries = {line["handler"]: line for line in _read_log() if line.get("message") == "access log summary"}
+            assert summaries["fast"]["request_count"] == 20
+            assert summaries["fast"]["status_codes"] == {"200": 20}
+            assert summaries["slow"]["request_count"] == 1
+            assert float(summaries["slow"]["request_time_p50"].rstrip("s")) >= 0.3
+            assert summaries["error"]["status_codes"] == {"500": 1}
+
+            await client.get("http://127.0.0.1:{}/fast".format(port))
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
+
+    # the remaining summary is logged when the service stops
+    summaries = [line for line in _read_log() if line.get("message") == "access log summary"]
+    assert summaries[-1]["handler"] == "fast"
+    assert summaries[-1]["request_count"] == 1
@@ -0,0 +1,58 @@
+import asyncio
+import json
+from typing import Any
+
+import aiohttp
+
+import tomodachi
+from run_test_service_helper import start_service
+
+
+def test_http_client_connector(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_client_service.py", loop=loop)
+    instance = services.get("test_http_client")
+    port = instance.context.get("_http_port")
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+
+            async def _get(path: str) -> Any:
+                response = await client.get("http://127.0.0.1:{}{}".format(port, path))
+                return response.status, await response.text()
+
+            for _ in range(5):
+                assert await _get("/proxy/hello") == (200, "hello")
+
+            status, body = await _get("/stats")
+            stats = json.loads(body)
+            assert stats["limit"] == 100
+            assert stats["limit_per_host"] == 2
+            assert stats["requests"] == 5
+            assert stats["connections_created"] == 1
+            assert stats["connections_reused"] == 4
+            assert stats["acquired_connections"] == 0
+            assert stats["idle_connections"] == 1
+
+            # per host limit of 2 connections, while the third request waits for a free connection
+            tasks = [asyncio.ensure_future(_get("/proxy/slow")) for _ in range(3)]
+            await asyncio.sleep(0.2)
+            status, body = await _get("/stats")
+            stats = json.loads(body)
+            assert stats["acquired_connections"] == 2
+            assert list(stats["acquired_connections_per_host"].values()) == [2]
+            assert stats["waiting_requests"] == 1
+
+            # read timeout from options
+            assert [await task for task in tasks] == [(504, "timeout")] * 3
+
+    loop.run_until_complete(_async(loop))
+
+    session = tomodachi.http_client_connector.get_session()
+    assert session is not None
+    assert session.timeout.sock_read == 0.5
+
+    instance.stop_service()
+    loop.run_until_complete(future)
+
+    assert tomodachi.http_client_connector.get_session() is None
+    assert session.closed
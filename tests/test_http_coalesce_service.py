@@ -0,0 +1,74 @@
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+import tomodachi
+from run_test_service_helper import start_service
+
+
+def test_http_request_coalescing(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_coalesce_service.py", loop=loop)
+    instance = services.get("test_http_coalesce")
+    port = instance.context.get("_http_port")
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+
+            async def _request(path: str, method: str = "GET", headers: Optional[Dict] = None) -> Tuple[int, str, Any]:
+                response = await client.request(method, "http://127.0.0.1:{}{}".format(port, path), headers=headers)
+                return response.status, await response.text(), response
+
+            results = await asyncio.gather(*[_request("/items/1") for _ in range(10)], _request("/items/2"))
+            assert [(status, body) for status, body, _ in results] == [(200, "1 1")] * 10 + [(200, "2 1")]
+
+            # requests are only coalesced while in-flight
+            status, body, _ = await _request("/items/1")
+            assert (status, body) == (200, "1 2")
+            assert (await _request("/items/1?a=1"))[1] == "1 3"
+
+            results = await asyncio.gather(*[_request("/items/3", method="POST") for _ in range(3)])
+            assert sorted([body for _, body, _ in results]) == ["3 1", "3 2", "3 3"]
+
+            results = await asyncio.gather(
+                _request("/user", headers={"Authorization": "a"}),
+                _request("/user", headers={"Authorization": "a"}),
+                _request("/user", headers={"Authorization": "b"}),
+            )
+            assert [body for _, body, _ in results] == ["a 1", "a 1", "b 2"]
+
+            # requests with different credentials don't share a response by default
+            results = await asyncio.gather(
+                _request("/items/4", headers={"Cookie": "session=a"}),
+                _request("/items/4", headers={"Cookie": "session=a"}),
+                _request("/items/4", headers={"Cookie": "session=b"}),
+                _request("/items/4", headers={"Authorization": "a"}),
+            )
+            assert [body for _, body, _ in results] == ["4 1", "4 1", "4 2", "4 3"]
+
+            results = await asyncio.gather(*[_request("/missing") for _ in range(3)])
+            assert [status for status, _, _ in results] == [404] * 3
+            assert instance.calls["missing"] == 1
+
+            results = await asyncio.gather(*[_request("/response") for _ in range(3)])
+            assert [(status, body) for status, body, _ in results] == [(201, "response 1")] * 3
+            for _, _, response in results:
+                assert response.headers.get("X-Test") == "1"
+
+            # cookies are only set on the response to the request that the handler was called for
+            assert [
+                response.cookies["session"].value for _, _, response in results if "session" in response.cookies
+            ] == ["abc"]
+
+            # streamed response bodies can't be shared
+            results = await asyncio.gather(*[_request("/stream") for _ in range(3)])
+            assert sorted([body for _, body, _ in results]) == ["stream 1", "stream 2", "stream 3"]
+
+            results = await asyncio.gather(*[_request("/uncoalesced") for _ in range(3)])
+            assert sorted([body for _, body, _ in results]) == ["uncoalesced 1", "uncoalesced 2", "uncoalesced 3"]
+
+            assert tomodachi.get_execution_context().get("http_coalesced_requests") == 9 + 1 + 1 + 2 + 2
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
@@ -0,0 +1,72 @@
+import asyncio
+from typing import Any, List, Tuple
+
+import aiohttp
+
+from run_test_service_helper import start_service
+
+
+def test_http_concurrency_limits(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_concurrency_limit_service.py", loop=loop)
+    instance = services.get("test_http_concurrency_limit")
+    port = instance.context.get("_http_port")
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+
+            async def _get(path: str) -> Tuple[int, str, str]:
+                response = await client.get("http://127.0.0.1:{}{}".format(port, path))
+                return response.status, await response.text(), response.headers.get("Retry-After", "")
+
+            async def _health(delay: float) -> Tuple[int, str, str]:
+                await asyncio.sleep(delay)
+                return await _get("/health")
+
+            # route limit: one request in-flight, one queued until its queue-time budget has passed, one shed
+            results: List[Tuple[int, str, str]] = await asyncio.gather(
+                _get("/slow"), _get("/slow"), _get("/slow"), _health(0.05)
+            )
+            assert sorted([status for status, _, _ in results[0:3]]) == [200, 503, 503]
+            assert [retry_after for status, _, retry_after in results[0:3] if status == 503] == ["5", "5"]
+            assert results[3][0] == 200
+            assert results[3][1].split(" ")[0] == "1"
+
+            # queued requests are processed one at a time within the queue-time budget
+            results = await asyncio.gather(_get("/queued"), _get("/queued"), _get("/queued"))
+            assert [status for status, _, _ in results] == [200, 200, 200]
+
+            # global limit: excess requests are shed, while health checks bypass the limit
+            results = await asyncio.gather(
+                _get("/blocking"), _get("/blocking"), _get("/blocking"), _get("/blocking"), _health(0.1)
+            )
+            assert sorted([status for status, _, _ in results[0:4]]) == [200, 200, 200, 503]
+            assert results[4] == (200, "0 3", "")
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
+
+
+def test_http_in_flight_requests_finish_on_stop(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_concurrency_limit_service.py", loop=loop)
+    instance = services.get("test_http_concurrency_limit")
+    port = instance.context.get("_http_port")
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+
+            async def _get(path: str) -> Tuple[int, str]:
+                response = await client.get("http://127.0.0.1:{}{}".format(port, path))
+                return response.status, await response.text()
+
+            task = asyncio.ensure_future(_get("/blocking"))
+            await asyncio.sleep(0.1)
+            assert instance.context.get("_http_active_requests") == 1
+
+            instance.stop_service()
+            assert await task == (200, "blocking")
+
+    loop.run_until_complete(_async(loop))
+    loop.run_until_complete(future)
+
+    assert instance.context.get("_http_active_requests") == 0
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+import tomodachi
+from run_test_service_helper import start_service
+
+
+def test_http_request_deadline(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_deadline_service.py", loop=loop)
+    instance = services.get("test_http_deadline")
+    port = instance.context.get("_http_port")
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+
+            async def _request(path: str, headers: Optional[Dict] = None) -> Tuple[int, str]:
+                response = await client.get("http://127.0.0.1:{}{}".format(port, path), headers=headers)
+                return response.status, await response.text()
+
+            assert await _request("/remaining") == (200, "none")
+            assert await _request("/remaining", headers={"X-Request-Timeout": "5"}) == (200, "5.0")
+            assert await _request("/remaining", headers={"X-Request-Timeout": "invalid"}) == (200, "none")
+            assert instance.calls["remaining"] == 3
+
+            # requests which have already passed their deadline are never handled
+            status, _ = await _request("/remaining", headers={"X-Request-Timeout": "0"})
+            assert status == 504
+            assert instance.calls["remaining"] == 3
+
+            status, _ = await _request("/slow", headers={"X-Request-Timeout": "0.2"})
+            assert status == 504
+            await asyncio.sleep(0.1)
+            assert instance.calls["slow"] == 1
+            assert instance.cancelled.get("slow") is True
+
+            assert tomodachi.get_execution_context().get("http_deadline_exceeded_requests") == 2
+
+            status, body = await _request("/propagate", headers={"X-Request-Timeout": "5"})
+            assert status == 200
+            assert 4.0 < float(body) <= 5.0
+            assert await _request("/propagate") == (200, "")
+
+            # streamed responses aren't cut short once their headers have been sent
+            status, body = await _request("/stream", headers={"X-Request-Timeout": "0.2"})
+            assert status == 200
+            assert body == "chunk 0\nchunk 1\nchunk 2\nchunk 3\n"
+            assert tomodachi.get_execution_context().get("http_deadline_exceeded_requests") == 2
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
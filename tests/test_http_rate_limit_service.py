@@ -0,0 +1,43 @@
+from typing import Any
+
+import aiohttp
+
+from run_test_service_helper import start_service
+
+
+def test_http_rate_limits(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_rate_limit_service.py", loop=loop)
+    instance = services.get("test_http_rate_limit")
+    port = instance.context.get("_http_port")
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+            for _ in range(2):
+                response = await client.get("http://127.0.0.1:{}/limited".format(port))
+                assert response.status == 200
+
+            response = await client.get("http://127.0.0.1:{}/limited".format(port))
+            assert response.status == 429
+            assert response.headers.get("Retry-After") == "2"
+            assert response.headers.get("X-RateLimit-Limit") == "2"
+            assert response.headers.get("X-RateLimit-Remaining") == "0"
+
+            response = await client.get("http://127.0.0.1:{}/keyed".format(port), headers={"X-Api-Key": "a"})
+            assert response.status == 200
+            response = await client.get("http://127.0.0.1:{}/keyed".format(port), headers={"X-Api-Key": "a"})
+            assert response.status == 429
+            response = await client.get("http://127.0.0.1:{}/keyed".format(port), headers={"X-Api-Key": "b"})
+            assert response.status == 200
+
+            # requests without a rate limit key are not rate limited
+            for _ in range(3):
+                response = await client.get("http://127.0.0.1:{}/keyed".format(port))
+                assert response.status == 200
+
+            response = await client.get("http://127.0.0.1:{}/unlimited".format(port))
+            assert response.status == 200
+            assert await response.text() == "2"
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
@@ -0,0 +1,149 @@
+import asyncio
+from typing import Any, AsyncIterator
+
+import aiohttp
+import pytest
+
+from run_test_service_helper import start_service
+
+
+def test_request_body_stream_http_service(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_streaming_service.py", loop=loop)
+    instance = services.get("test_http_streaming")
+    port = instance.context.get("_http_port")
+
+    async def chunked_body(chunk_count: int, chunk_size: int) -> AsyncIterator[bytes]:
+        for _ in range(chunk_count):
+            yield b"x" * chunk_size
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.post("http://127.0.0.1:{}/upload".format(port), data=b"x" * 1024 * 1024)
+            assert response.status == 200
+            size, chunk_count, max_chunk_size = [int(v) for v in (await response.text()).split(" ")]
+            assert size == 1024 * 1024
+            assert chunk_count > 1
+            assert max_chunk_size <= 64 * 1024
+
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.post("http://127.0.0.1:{}/upload".format(port), data=chunked_body(16, 4096))
+            assert response.status == 200
+            size, _, _ = [int(v) for v in (await response.text()).split(" ")]
+            assert size == 16 * 4096
+
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.post("http://127.0.0.1:{}/upload".format(port), data=b"x" * 3 * 1024 * 1024)
+            assert response.status == 413
+
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.post("http://127.0.0.1:{}/upload-limited".format(port), data=b"x" * 1000)
+            assert response.status == 200
+            assert await response.text() == "1000"
+
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.post("http://127.0.0.1:{}/upload-limited".format(port), data=chunked_body(4, 1024))
+            assert response.status == 413
+
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.post("http://127.0.0.1:{}/buffered-limited".format(port), data=b"x" * 1000)
+            assert response.status == 200
+            assert await response.text() == "1000"
+
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.post("http://127.0.0.1:{}/buffered-limited".format(port), data=b"x" * 4096)
+            assert response.status == 413
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
+
+
+def test_async_generator_response_http_service(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_streaming_service.py", loop=loop)
+    instance = services.get("test_http_streaming")
+    port = instance.context.get("_http_port")
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.get("http://127.0.0.1:{}/stream".format(port))
+            assert response.status == 200
+            assert response.headers.get("Transfer-Encoding") == "chunked"
+            assert response.headers.get("Server") == "tomodachi"
+            assert response.headers.get("Content-Type") == "text/plain; charset=utf-8"
+            assert await response.text() == "chunk 0\nchunk 1\nchunk 2\n"
+
+            # the connection is closed after the response (keep-alive is disabled), which the client is told about
+            assert response.headers.get("Connection") == "close"
+            response = await client.get("http://127.0.0.1:{}/stream".format(port))
+            assert await response.text() == "chunk 0\nchunk 1\nchunk 2\n"
+
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.get("http://127.0.0.1:{}/stream-tuple".format(port))
+            assert response.status == 201
+            assert response.headers.get("X-Stream") == "tuple"
+            assert await response.text() == "tuple body"
+
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.get("http://127.0.0.1:{}/stream-exception".format(port))
+            assert response.status == 200
+            with pytest.raises(aiohttp.ClientPayloadError):
+                await response.text()
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
+
+    out, err = capsys.readouterr()
+    assert "exception in stream" in (out + err)
+
+
+def test_event_stream_http_service(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_streaming_service.py", loop=loop)
+    instance = services.get("test_http_streaming")
+    port = instance.context.get("_http_port")
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.get("http://127.0.0.1:{}/events".format(port))
+            assert response.status == 200
+            assert response.headers.get("Content-Type") == "text/event-stream; charset=utf-8"
+            assert response.headers.get("Cache-Control") == "no-cache"
+            body = await response.text()
+            assert body.startswith("retry: 1000\n\ndata: first\n\n: heartbeat\n\n")
+            assert body.endswith('id: 2\nevent: update\ndata: {"value": 2}\n\ndata: multiple\ndata: lines\n\n')
+
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.get("http://127.0.0.1:{}/events-feed".format(port))
+            assert await response.content.readuntil(b"\n\n") == b"data: connected\n\n"
+            assert len(instance.context.get("_http_open_event_streams")) == 1
+            response.close()
+
+        for _ in range(50):
+            if not instance.context.get("_http_open_event_streams"):
+                break
+            await asyncio.sleep(0.05)
+        assert len(instance.context.get("_http_open_event_streams")) == 0
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
+
+
+def test_event_stream_closed_on_stop_http_service(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/http_streaming_service.py", loop=loop)
+    instance = services.get("test_http_streaming")
+    port = instance.context.get("_http_port")
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+            response = await client.get("http://127.0.0.1:{}/events-feed".format(port))
+            assert await response.content.readuntil(b"\n\n") == b"data: connected\n\n"
+            instance.stop_service()
+            body = await asyncio.wait_for(response.content.read(), timeout=5)
+            assert b"never" not in body
+
+    loop.run_until_complete(_async(loop))
+    loop.run_until_complete(future)
+
+    out, err = capsys.readouterr()
+    assert "closing event streams" in (out + err)
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from typing import Any
+
+from tomodachi.inbox import Inbox, SQLiteInboxStore
+
+
+def test_sqlite_inbox_store(tmp_path: Any, loop: Any) -> None:
+    async def _async() -> None:
+        store = SQLiteInboxStore(str(tmp_path / "inbox.db"))
+        assert await store.contains("uuid-1", "handler") is False
+
+        # concurrently added messages are written in a single batch
+        await asyncio.gather(
+            store.add("uuid-1", "handler", time.time() + 60),
+            store.add("uuid-2", "handler", time.time() - 1),
+            store.add("uuid-1", "other_handler", time.time() + 60),
+        )
+        assert await store.contains("uuid-1", "handler") is True
+        assert await store.contains("uuid-1", "other_handler") is True
+        assert await store.contains("uuid-2", "handler") is False
+
+        assert await store.compact(time.time()) == 1
+        await store.close()
+
+        # messages are kept across restarts
+        store = SQLiteInboxStore(str(tmp_path / "inbox.db"))
+        assert await store.contains("uuid-1", "handler") is True
+        await store.close()
+
+    loop.run_until_complete(_async())
+
+
+def test_inbox(tmp_path: Any, loop: Any) -> None:
+    class Service(object):
+        name = "service"
+        stopped = False
+
+        async def _stop_service(self) -> None:
+            self.stopped = True
+
+    async def _async() -> None:
+        service = Service()
+        inbox = Inbox(SQLiteInboxStore(str(tmp_path / "inbox.db")), cache_size=1)
+
+        assert await inbox.is_duplicate(service, "uuid-1", "handler") is False
+        await inbox.record(service, "uuid-1", "handler")
+        await inbox.record(service, "uuid-2", "handler")
+        assert list(inbox._cache.keys()) == ["uuid-2:service.handler"]
+
+        # messages evicted from the cache are looked up in the store
+        assert await inbox.is_duplicate(service, "uuid-1", "handler") is True
+        assert await inbox.is_duplicate(service, "uuid-2", "handler") is True
+        assert await inbox.is_duplicate(service, "uuid-2", "other_handler") is False
+
+        # messages are recorded per service, since the store may be shared by several services
+        other_service = Service()
+        other_service.name = "other_service"
+        assert await inbox.is_duplicate(other_service, "uuid-1", "handler") is False
+
+        # the service's stop method is only wrapped once when the compaction task is started again
+        stop_service = service._stop_service
+        assert inbox._compaction_task is not None
+        inbox._compaction_task.cancel()
+        await asyncio.sleep(0)
+        assert await inbox.is_duplicate(service, "uuid-1", "handler") is True
+        assert service._stop_service is stop_service
+
+        await service._stop_service()
+        assert service.stopped is True
+
+    loop.run_until_complete(_async())
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from tomodachi.helpers.limiters import ConcurrencyLimiter, RateLimiter, ThroughputLimiter
+
+
+def test_rate_limiter_token_bucket() -> None:
+    rate_limiter = RateLimiter(2, burst=3)
+
+    assert [rate_limiter.hit("a", now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert rate_limiter.hit("a", now=0.0) == 0.5
+    assert rate_limiter.hit("b", now=0.0) == 0.0
+
+    assert rate_limiter.hit("a", now=0.5) == 0.0
+    assert rate_limiter.hit("a", now=0.5) == 0.5
+    assert [rate_limiter.hit("a", now=10.0) for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+
+
+def test_rate_limiter_evicts_idle_buckets() -> None:
+    rate_limiter = RateLimiter(1, burst=1, max_keys=3)
+
+    rate_limiter.hit("a", now=0.0)
+    rate_limiter.hit("b", now=0.5)
+    assert len(rate_limiter) == 2
+
+    rate_limiter.hit("c", now=1.2)
+    assert len(rate_limiter) == 2
+    assert rate_limiter.hit("b", now=1.2) == pytest.approx(0.3)
+
+    rate_limiter.hit("d", now=1.2)
+    rate_limiter.hit("e", now=1.2)
+    assert len(rate_limiter) == 3
+    assert rate_limiter.hit("c", now=1.2) == 0.0
+
+
+def test_concurrency_limiter(loop: asyncio.AbstractEventLoop) -> None:
+    async def _async() -> None:
+        limiter = ConcurrencyLimiter(1, max_queued=1, max_queue_time=0.05)
+
+        assert limiter.try_acquire() is True
+        assert limiter.try_acquire() is False
+
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        assert await limiter.acquire() is False
+        assert await waiter is False
+        assert limiter.queued == 0
+
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()
+        assert await waiter is True
+        assert limiter.active == 1
+
+        limiter.release()
+        assert limiter.active == 0
+
+    loop.run_until_complete(_async())
+
+
+def test_throughput_limiter(loop: asyncio.AbstractEventLoop) -> None:
+    async def _async() -> None:
+        limiter = ThroughputLimiter(20, burst=2)
+        order = []
+
+        async def _acquire(i: int, key: str = "a") -> float:
+            waited = await limiter.acquire(key)
+            order.append(i)
+            return waited
+
+        assert await _acquire(0) == 0.0
+        assert await _acquire(1) == 0.0
+
+        # callers exceeding the burst wait in line and are let through in order at the steady rate
+        tasks = [asyncio.ensure_future(_acquire(i)) for i in range(2, 6)]
+        await asyncio.sleep(0)
+        assert limiter.queued("a") == 4
+        assert await _acquire(6, key="b") == 0.0
+
+        cancelled = tasks.pop(1)
+        cancelled.cancel()
+        waited = await asyncio.gather(*tasks)
+        assert order == [0, 1, 6, 2, 4, 5]
+        assert 0.03 <= waited[0] < waited[1] < waited[2]
+        assert 0.12 <= waited[2] < 0.5
+        assert limiter.queued("a") == 0
+
+    loop.run_until_complete(_async())
+
+    with pytest.raises(ValueError):
+        ThroughputLimiter(0)
+
+
+def test_throughput_limiter_per_key_rates(loop: asyncio.AbstractEventLoop) -> None:
+    async def _async() -> None:
+        limiter = ThroughputLimiter(None, rates={"limited": 10})
+
+        # keys without a rate of their own aren't limited without a default rate
+        for _ in range(20):
+            assert await limiter.acquire("other") == 0.0
+        assert len(limiter) == 0
+
+        # while keys with a rate have bursts of up to their rate
+        for _ in range(10):
+            assert await limiter.acquire("limited") == 0.0
+        assert 0.05 <= await limiter.acquire("limited") < 0.5
+
+        limiter = ThroughputLimiter(1000, burst=1, rates={"limited": 10})
+        assert await limiter.acquire("other") == 0.0
+        assert await limiter.acquire("other") > 0.0
+
+    loop.run_until_complete(_async())
+
+    with pytest.raises(ValueError):
+        ThroughputLimiter(10, rates={"limited": 0})
+
+
+def test_throughput_limiter_eviction(loop: asyncio.AbstractEventLoop) -> None:
+    async def _async() -> None:
+        limiter = ThroughputLimiter(10, burst=1)
+        for i in range(1000):
+            assert await limiter.acquire(i) == 0.0
+
+        # buckets of idle keys are removed once they are refilled, but not while callers are waiting
+        waiting = [asyncio.ensure_future(limiter.acquire(999)) for _ in range(2)]
+        await asyncio.sleep(0.15)
+        assert limiter.queued(999) == 1
+        assert await limiter.acquire("new") == 0.0
+        assert len(limiter) == 2
+        await asyncio.gather(*waiting)
+
+    loop.run_until_complete(_async())
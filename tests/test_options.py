@@ -69,6 +69,9 @@ def test_default_values() -> None:
         "http.client_max_size": 104857600,
         "http.termination_grace_period_seconds": 30,
         "http.access_log": True,
+        "http.access_log_sample_rate": 1.0,
+        "http.access_log_slow_request_threshold": None,
+        "http.access_log_summary_interval": None,
         "http.real_ip_from": [],
         "http.real_ip_header": "X-Forwarded-For",
         "http.keepalive_timeout": 0,
@@ -76,6 +79,17 @@ def test_default_values() -> None:
         "http.max_keepalive_time": None,
         "http.max_keepalive_requests": None,
         "http.server_header": "tomodachi",
+        "http.max_concurrent_requests": None,
+        "http.max_queued_requests": 0,
+        "http.max_queue_time": 1.0,
+        "http.overload_retry_after": 1,
+        "http.client.limit": 100,
+        "http.client.limit_per_host": 20,
+        "http.client.keepalive_timeout": 15.0,
+        "http.client.dns_cache_ttl": 10,
+        "http.client.connect_timeout": 8.0,
+        "http.client.read_timeout": 35.0,
+        "http.client.total_timeout": None,
         "aws_sns_sqs.region_name": None,
         "aws_sns_sqs.aws_access_key_id": None,
         "aws_sns_sqs.aws_secret_access_key": None,
@@ -86,6 +100,12 @@ def test_default_values() -> None:
         "aws_sns_sqs.sqs_kms_data_key_reuse_period": None,
         "aws_sns_sqs.queue_policy": None,
         "aws_sns_sqs.wildcard_queue_policy": None,
+        "aws_sns_sqs.spool_directory": None,
+        "aws_sns_sqs.spool_fsync": "interval",
+        "aws_sns_sqs.spool_segment_size": 16777216,
+        "aws_sns_sqs.publish_rate_limit": None,
+        "aws_sns_sqs.publish_rate_limit_burst": None,
+        "aws_sns_sqs.publish_rate_limits": None,
         "aws_endpoint_urls.sns": None,
         "aws_endpoint_urls.sqs": None,
         "amqp.host": "127.0.0.1",
@@ -99,8 +119,26 @@ def test_default_values() -> None:
         "amqp.ssl": False,
         "amqp.heartbeat": 60,
         "amqp.queue_ttl": 86400,
+        "amqp.publish_channel_count": 2,
+        "amqp.publisher_confirms": False,
+        "amqp.max_unconfirmed_messages": 1000,
+        "amqp.spool_directory": None,
+        "amqp.spool_fsync": "interval",
+        "amqp.spool_segment_size": 16777216,
+        "amqp.publish_rate_limit": None,
+        "amqp.publish_rate_limit_burst": None,
+        "amqp.publish_rate_limits": None,
+        "amqp.subscriptions_per_channel": 1,
+        "amqp.coalesce_acks": False,
+        "amqp.ack_flush_interval": 0.1,
+        "amqp.ack_flush_threshold": 50,
         "amqp.qos.queue_prefetch_count": 100,
         "amqp.qos.global_prefetch_count": 400,
+        "amqp.qos.adaptive": False,
+        "amqp.qos.min_prefetch_count": 10,
+        "amqp.qos.max_prefetch_count": 1000,
+        "amqp.qos.latency_tolerance": 1.5,
+        "amqp.qos.adjust_interval": 5.0,
         "watcher.ignored_dirs": [],
         "watcher.watched_file_endings": [],
     }
@@ -115,6 +153,9 @@ def test_default_values() -> None:
         "client_max_size": 104857600,
         "termination_grace_period_seconds": 30,
         "access_log": True,
+        "access_log_sample_rate": 1.0,
+        "access_log_slow_request_threshold": None,
+        "access_log_summary_interval": None,
         "real_ip_from": [],
         "real_ip_header": "X-Forwarded-For",
         "keepalive_timeout": 0,
@@ -122,6 +163,17 @@ def test_default_values() -> None:
         "max_keepalive_time": None,
         "max_keepalive_requests": None,
         "server_header": "tomodachi",
+        "max_concurrent_requests": None,
+        "max_queued_requests": 0,
+        "max_queue_time": 1.0,
+        "overload_retry_after": 1,
+        "client.limit": 100,
+        "client.limit_per_host": 20,
+        "client.keepalive_timeout": 15.0,
+        "client.dns_cache_ttl": 10,
+        "client.connect_timeout": 8.0,
+        "client.read_timeout": 35.0,
+        "client.total_timeout": None,
     }
 
 
@@ -225,6 +277,11 @@ def test_dict_init() -> None:
     assert Options(amqp={"login": "tron", "qos.queue_prefetch_count": 4711}).amqp.qos.asdict() == {
         "queue_prefetch_count": 4711,
         "global_prefetch_count": 400,
+        "adaptive": False,
+        "min_prefetch_count": 10,
+        "max_prefetch_count": 1000,
+        "latency_tolerance": 1.5,
+        "adjust_interval": 5.0,
     }
     assert (
         Options(
@@ -233,6 +290,14 @@ def test_dict_init() -> None:
         == 10
     )
 
+    # options with mappings as values aren't mistaken for nested options
+    assert Options(aws_sns_sqs={"publish_rate_limits": {"orders": 5.0}}).aws_sns_sqs.publish_rate_limits == {
+        "orders": 5.0
+    }
+    assert Options(**{"amqp.publish_rate_limits": {"orders.created": 5.0}}).amqp.publish_rate_limits == {
+        "orders.created": 5.0
+    }
+
 
 def test_legacy_fallback_init() -> None:
     options = Options(
@@ -262,6 +327,12 @@ def test_legacy_fallback_init() -> None:
         "sqs_kms_data_key_reuse_period": None,
         "queue_policy": None,
         "wildcard_queue_policy": None,
+        "spool_directory": None,
+        "spool_fsync": "interval",
+        "spool_segment_size": 16777216,
+        "publish_rate_limit": None,
+        "publish_rate_limit_burst": None,
+        "publish_rate_limits": None,
     }
     assert options.aws_endpoint_urls.asdict() == {"sns": "http://localhost:4566", "sqs": "http://localhost:4566"}
 
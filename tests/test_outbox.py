@@ -0,0 +1,156 @@
+import asyncio
+import sqlite3
+import time
+from typing import Any, List
+
+from tomodachi.helpers.deadline import get_deadline, reset_deadline, set_deadline
+from tomodachi.outbox import Outbox, OutboxMessage, SQLiteOutboxStore
+from tomodachi.outbox.outbox import AWS_SNS_SQS_PUBLISH
+
+
+def test_sqlite_outbox_store(tmp_path: Any, loop: Any) -> None:
+    async def _async() -> None:
+        store = SQLiteOutboxStore(str(tmp_path / "outbox.db"))
+        await store.add(
+            [
+                OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": 1}, {"group_id": "a"}, key="a"),
+                OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": 2}, key="a"),
+                OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": 3}, key="b"),
+                OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": 4}),
+            ]
+        )
+        assert await store.pending() == 4
+
+        messages = await store.claim("relay-1", 2, 60.0)
+        assert [message.data for message in messages] == [{"message": 1}, {"message": 2}]
+        assert messages[0].options == {"group_id": "a"}
+        assert messages[0].key == "a"
+
+        # messages with a key that is claimed by another relay are not claimed
+        await store.add([OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": 5}, key="a")])
+        messages = await store.claim("relay-2", 10, 60.0)
+        assert [message.data for message in messages] == [{"message": 3}, {"message": 4}]
+
+        # messages are only marked as published by the relay holding the claim
+        assert await store.mark_published("relay-2", [1, 2]) == 0
+        assert await store.mark_published("relay-1", [1]) == 1
+        assert await store.mark_published("relay-1", [1]) == 0
+        await store.release("relay-1", [2])
+
+        messages = await store.claim("relay-2", 10, 60.0)
+        assert [message.data for message in messages] == [{"message": 2}, {"message": 5}]
+        assert await store.mark_published("relay-2", [2, 3, 4, 5]) == 4
+        assert await store.pending() == 0
+
+        assert await store.purge(0.0) == 0
+        assert await store.purge(float("inf")) == 5
+        await store.close()
+
+    loop.run_until_complete(_async())
+
+
+def test_sqlite_outbox_store_transaction(tmp_path: Any, loop: Any) -> None:
+    path = str(tmp_path / "outbox.db")
+
+    async def _async() -> None:
+        store = SQLiteOutboxStore(path)
+
+        connection = sqlite3.connect(path)
+        await store.add([OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": 1})], connection=connection)
+        connection.rollback()
+        await store.add([OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": 2})], connection=connection)
+        connection.commit()
+        connection.close()
+
+        messages = await store.claim("relay", 10, 60.0)
+        assert [message.data for message in messages] == [{"message": 2}]
+        await store.close()
+
+    loop.run_until_complete(_async())
+
+
+def test_outbox_relay_batch(tmp_path: Any, loop: Any, monkeypatch: Any) -> None:
+    published: List[Any] = []
+    failures = [True]
+
+    async def publish(service: Any, message: OutboxMessage) -> None:
+        if failures and message.data == {"message": 0}:
+            failures.pop()
+            raise Exception("broker unavailable")
+        published.append(message.data)
+
+    monkeypatch.setattr(Outbox, "publish", staticmethod(publish))
+
+    async def _async() -> None:
+        outbox = Outbox(SQLiteOutboxStore(str(tmp_path / "outbox.db")))
+        for i, key in enumerate(["a", "a", "b", None]):
+            await outbox.store.add([OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": i}, key=key)])
+
+        # later messages with the key of a failed message are kept for the next batch
+        assert await outbox.relay_batch(None) == 4
+        assert sorted(message["message"] for message in published) == [2, 3]
+
+        assert await outbox.relay_batch(None) == 2
+        assert [message["message"] for message in published[2:]] == [0, 1]
+
+        assert await outbox.relay_batch(None) == 0
+        await outbox.stop()
+
+    loop.run_until_complete(_async())
+
+
+def test_outbox_restarted_relay(tmp_path: Any, loop: Any) -> None:
+    class Service(object):
+        stopped = 0
+
+        async def _stop_service(self) -> None:
+            self.stopped += 1
+
+    async def _async() -> None:
+        service = Service()
+        outbox = Outbox(SQLiteOutboxStore(str(tmp_path / "outbox.db")))
+        outbox.start(service)
+        stop_service = service._stop_service
+
+        # the service's stop method is only wrapped once when the relay task is started again
+        assert outbox._relay_task is not None
+        outbox._relay_task.cancel()
+        await asyncio.sleep(0)
+        outbox.start(service)
+        assert service._stop_service is stop_service
+
+        await service._stop_service()
+        assert service.stopped == 1
+
+    loop.run_until_complete(_async())
+
+
+def test_outbox_relay_context(tmp_path: Any, loop: Any, monkeypatch: Any) -> None:
+    deadlines: List[Any] = []
+
+    async def publish(service: Any, message: OutboxMessage) -> None:
+        deadlines.append(get_deadline())
+
+    monkeypatch.setattr(Outbox, "publish", staticmethod(publish))
+
+    class Service(object):
+        pass
+
+    async def _async() -> None:
+        service = Service()
+        outbox = Outbox(SQLiteOutboxStore(str(tmp_path / "outbox.db")), poll_interval=0.05)
+
+        # the deadline of the caller that started the relay isn't passed on to the relayed messages
+        token = set_deadline(time.time() + 0.1)
+        try:
+            await outbox.add(service, OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": 1}))
+        finally:
+            reset_deadline(token)
+        await asyncio.sleep(0.2)
+        await outbox.add(service, OutboxMessage(AWS_SNS_SQS_PUBLISH, "topic", {"message": 2}))
+        await asyncio.sleep(0.2)
+
+        assert deadlines == [None, None]
+        await outbox.stop()
+
+    loop.run_until_complete(_async())
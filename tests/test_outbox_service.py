@@ -0,0 +1,15 @@
+from typing import Any
+
+from run_test_service_helper import start_service
+
+
+def test_outbox_service(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/outbox_service.py", loop=loop)
+
+    instance = services.get("test_outbox")
+    assert instance is not None
+
+    loop.run_until_complete(future)
+
+    # messages already in the outbox are published without adding a new message
+    assert instance.published == [{"message": 1}, {"message": 2}]
@@ -0,0 +1,107 @@
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import List, Set
+
+import pytest
+
+
+def request_pid(port: int) -> str:
+    return urllib.request.urlopen("http://127.0.0.1:{}/pid".format(port), timeout=5).read().decode()
+
+
+def wait_for_pids(port: int, previous_pids: Set[str], count: int, timeout: float = 20.0) -> Set[str]:
+    errors: List[Exception] = []
+    pids: Set[str] = set()
+    wait_start_time = time.time()
+    while wait_start_time + timeout > time.time():
+        try:
+            pid = request_pid(port)
+            if pid not in previous_pids:
+                pids.add(pid)
+                if len(pids) >= count:
+                    break
+        except Exception as e:
+            if previous_pids:
+                errors.append(e)
+        time.sleep(0.05)
+
+    assert errors == []
+    assert len(pids) == count
+    return pids
+
+
+@pytest.mark.flaky(reruns=3, reruns_delay=5)
+def test_reload_http_service_on_sighup() -> None:
+    port = 53281
+    with tempfile.TemporaryFile(mode="w+") as output:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "tomodachi", "run", "--production", "tests/services/http_reload_service.py"],
+            env={**os.environ, "TEST_HTTP_PORT": str(port)},
+            stdout=output,
+            stderr=subprocess.STDOUT,
+        )
+
+        replacement_pids: Set[str] = set()
+        try:
+            pids = wait_for_pids(port, set(), 1)
+            assert pids == {str(process.pid)}
+
+            process.send_signal(signal.SIGHUP)
+            replacement_pids = wait_for_pids(port, pids, 1)
+
+            assert process.wait(timeout=20) == 0
+            assert {request_pid(port) for _ in range(5)} == replacement_pids
+        finally:
+            if process.poll() is None:
+                process.kill()
+            for pid in replacement_pids:
+                os.kill(int(pid), signal.SIGTERM)
+
+        output.seek(0)
+        out = output.read()
+        assert "reloading services" in out
+        assert "replacement process started - stopping services" in out
+
+
+@pytest.mark.flaky(reruns=3, reruns_delay=5)
+def test_reload_http_service_workers_on_sighup() -> None:
+    port = 53282
+    with tempfile.TemporaryFile(mode="w+") as output:
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "tomodachi",
+                "run",
+                "--production",
+                "--workers",
+                "2",
+                "tests/services/http_reload_service.py",
+            ],
+            env={**os.environ, "TEST_HTTP_PORT": str(port)},
+            stdout=output,
+            stderr=subprocess.STDOUT,
+        )
+
+        try:
+            pids = wait_for_pids(port, set(), 2)
+
+            process.send_signal(signal.SIGHUP)
+            wait_for_pids(port, pids, 2)
+
+            process.send_signal(signal.SIGTERM)
+            assert process.wait(timeout=20) == 0
+        finally:
+            if process.poll() is None:
+                process.kill()
+
+        output.seek(0)
+        out = output.read()
+        assert out.count("started replacement worker process") == 2
+        assert out.count("replacement worker process started - stopping previous worker process") == 2
+        assert out.count("worker process exited") == 4
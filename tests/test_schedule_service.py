@@ -18,10 +18,14 @@ def test_schedule_service(capsys: Any, loop: Any) -> None:
         seconds = instance.seconds_triggered
         third_seconds_triggered = instance.third_seconds_triggered
 
+        quarter_seconds = instance.quarter_seconds_triggered
+
         await asyncio.sleep(1.5)
 
         assert instance.seconds_triggered > seconds
         assert instance.third_seconds_triggered == third_seconds_triggered
+        assert instance.quarter_seconds_triggered >= quarter_seconds + 4
+        assert len(set(instance.quarter_second_invocation_times)) == len(instance.quarter_second_invocation_times)
 
         seconds = instance.seconds_triggered
 
@@ -0,0 +1,75 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+
+from tomodachi.helpers.single_flight import SingleFlight
+
+
+def test_single_flight_shares_result(loop: Any) -> None:
+    single_flight = SingleFlight()
+    calls: List[str] = []
+
+    async def _func() -> str:
+        calls.append("call")
+        await asyncio.sleep(0.1)
+        return "value {}".format(len(calls))
+
+    async def _async() -> None:
+        results = await asyncio.gather(*[single_flight.do("key", _func) for _ in range(5)])
+        assert results == [("value 1", False)] + [("value 1", True)] * 4
+        assert len(single_flight) == 0
+
+        assert await single_flight.do("key", _func) == ("value 2", False)
+
+    loop.run_until_complete(_async())
+
+
+def test_single_flight_shares_exception(loop: Any) -> None:
+    single_flight = SingleFlight()
+
+    async def _func() -> str:
+        await asyncio.sleep(0.1)
+        raise ValueError("failed")
+
+    async def _async() -> None:
+        results = await asyncio.gather(*[single_flight.do("key", _func) for _ in range(3)], return_exceptions=True)
+        assert [type(result) for result in results] == [ValueError] * 3
+        assert len(single_flight) == 0
+
+        with pytest.raises(ValueError):
+            await single_flight.do("key", _func)
+
+    loop.run_until_complete(_async())
+
+
+def test_single_flight_cancelled_caller_is_taken_over(loop: Any) -> None:
+    single_flight = SingleFlight()
+    calls: List[str] = []
+
+    async def _func() -> str:
+        calls.append("call")
+        await asyncio.sleep(0.1)
+        return "value {}".format(len(calls))
+
+    async def _async() -> None:
+        first = asyncio.ensure_future(single_flight.do("key", _func))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(single_flight.do("key", _func))
+        third = asyncio.ensure_future(single_flight.do("key", _func))
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        assert sorted(await asyncio.gather(second, third)) == [("value 2", False), ("value 2", True)]
+        assert first.cancelled()
+
+        # a cancelled waiting caller doesn't affect the executing caller
+        first = asyncio.ensure_future(single_flight.do("key", _func))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(single_flight.do("key", _func))
+        await asyncio.sleep(0.01)
+        second.cancel()
+        assert await first == ("value 3", False)
+        assert second.cancelled()
+
+    loop.run_until_complete(_async())
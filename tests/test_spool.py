@@ -0,0 +1,150 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from tomodachi.helpers.deadline import get_deadline, reset_deadline, set_deadline
+from tomodachi.helpers.spool import PublishSpool
+
+
+def test_spool_replay_order(tmp_path: Any, loop: Any) -> None:
+    async def _async() -> None:
+        spool = PublishSpool(str(tmp_path), "test", segment_size=100, fsync="never")
+        for i in range(10):
+            await spool.append({"message": "message-{}".format(i), "binary": b"\x00\x01"})
+        assert len(spool) == 10
+
+        # records are spread over multiple segment files
+        assert len([filename for filename in os.listdir(str(tmp_path)) if filename.endswith(".spool")]) > 1
+
+        records = []
+        while True:
+            record = spool.peek()
+            if record is None:
+                break
+            assert spool.peek() == record
+            spool.commit()
+            records.append(record)
+
+        assert [record["message"] for record in records] == ["message-{}".format(i) for i in range(10)]
+        assert records[0]["binary"] == b"\x00\x01"
+        assert len(spool) == 0
+        await spool.close()
+        assert [filename for filename in os.listdir(str(tmp_path)) if filename.endswith(".spool")] == []
+
+        await spool.append({"message": "message-10"})
+        assert spool.peek() == {"message": "message-10"}
+        await spool.close()
+
+    loop.run_until_complete(_async())
+
+
+def test_spool_restart(tmp_path: Any, loop: Any) -> None:
+    async def _async() -> None:
+        spool = PublishSpool(str(tmp_path), "test", fsync="always", checkpoint_interval=1)
+        for i in range(5):
+            await spool.append({"message": "message-{}".format(i)})
+        spool.peek()
+        spool.commit()
+        spool.peek()
+        spool.commit()
+        await spool.close()
+
+        # a partially written record at the end of the segment is discarded
+        segment = [filename for filename in os.listdir(str(tmp_path)) if filename.endswith(".spool")][0]
+        with open(os.path.join(str(tmp_path), segment), "ab") as segment_file:
+            segment_file.write(b'0123abcd {"message": "mess')
+
+        spool = PublishSpool(str(tmp_path), "test")
+        assert len(spool) == 3
+        await spool.append({"message": "message-5"})
+
+        records = []
+        while spool.peek() is not None:
+            records.append(spool.peek())
+            spool.commit()
+        assert records == [{"message": "message-{}".format(i)} for i in range(2, 6)]
+        await spool.close()
+
+    loop.run_until_complete(_async())
+
+
+def test_spool_grouped_fsync(tmp_path: Any, loop: Any, monkeypatch: Any) -> None:
+    fsync_threads: List[str] = []
+    fsync = os.fsync
+
+    def _fsync(fd: int) -> None:
+        fsync_threads.append(threading.current_thread().name)
+        time.sleep(0.05)
+        fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", _fsync)
+
+    async def _async() -> None:
+        spool = PublishSpool(str(tmp_path), "test", fsync="always")
+
+        # records appended while a sync is in progress are synced together, on another thread than the event loop
+        await asyncio.gather(*[spool.append({"message": "message-{}".format(i)}) for i in range(20)])
+        assert len(spool) == 20
+        assert 1 <= len(fsync_threads) <= 2
+        assert all(name.startswith("tomodachi.spool") for name in fsync_threads)
+        await spool.close()
+
+    loop.run_until_complete(_async())
+
+
+def test_spool_drain(tmp_path: Any, loop: Any) -> None:
+    published: List[Dict[str, Any]] = []
+    failures = [True]
+
+    async def publish(record: Dict[str, Any]) -> None:
+        if failures and record["message"] == "message-1":
+            failures.pop()
+            raise Exception("broker unavailable")
+        published.append(record)
+
+    async def _async() -> None:
+        spool = PublishSpool(str(tmp_path), "test", fsync="never")
+        for i in range(3):
+            await spool.append({"message": "message-{}".format(i)})
+        spool.start_drain(publish)
+        await asyncio.sleep(1.0)
+
+        # the failed record is retried before later records are published
+        assert published == [{"message": "message-{}".format(i)} for i in range(3)]
+        assert len(spool) == 0
+        await spool.close()
+
+    loop.run_until_complete(_async())
+
+
+def test_spool_drain_context(tmp_path: Any, loop: Any) -> None:
+    deadlines: List[Any] = []
+
+    async def publish(record: Dict[str, Any]) -> None:
+        deadlines.append(get_deadline())
+
+    async def _async() -> None:
+        spool = PublishSpool(str(tmp_path), "test", fsync="never")
+
+        # the deadline of the publish that started the drainer isn't passed on to the replayed messages
+        token = set_deadline(time.time() + 60)
+        try:
+            await spool.append({"message": "message-0"})
+            spool.start_drain(publish)
+        finally:
+            reset_deadline(token)
+        await asyncio.sleep(0.1)
+
+        assert deadlines == [None]
+        await spool.close()
+
+    loop.run_until_complete(_async())
+
+
+def test_spool_invalid_fsync_policy(tmp_path: Any) -> None:
+    with pytest.raises(ValueError):
+        PublishSpool(str(tmp_path), "test", fsync="sometimes")
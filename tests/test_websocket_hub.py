@@ -0,0 +1,117 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Union
+
+import aiohttp
+import pytest
+
+from run_test_service_helper import start_service
+from tomodachi.transport.http import WebSocketHub
+
+
+class BlockingWebSocket(Dict[str, Any]):
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent: List[Union[str, bytes]] = []
+        self.closed_code: Optional[int] = None
+        self.blocker: asyncio.Future = asyncio.get_event_loop().create_future()
+
+    def __hash__(self) -> int:
+        return id(self)
+
+    async def send_str(self, data: str) -> None:
+        await self.blocker
+        self.sent.append(data)
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self.blocker
+        self.sent.append(data)
+
+    async def close(self, code: int, message: bytes = b"") -> None:
+        self.closed_code = code
+
+
+def test_websocket_hub_slow_consumer_policies(loop: Any) -> None:
+    async def _async() -> None:
+        hub = WebSocketHub(max_queue_size=2)
+        fast, slow = BlockingWebSocket(), BlockingWebSocket()
+        fast.blocker.set_result(None)
+        hub.subscribe(fast, "topic")  # type: ignore
+        hub.subscribe(slow, "topic")  # type: ignore
+
+        for i in range(5):
+            assert hub.broadcast({"value": i}, topic="topic") == 2
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+
+        assert fast.sent == [json.dumps({"value": i}) for i in range(5)]
+        assert hub.stats()["dropped_messages"] == 2
+        assert hub.stats()["max_queue_depth"] == 2
+
+        slow.blocker.set_result(None)
+        await asyncio.sleep(0.01)
+        assert slow.sent[-2:] == [json.dumps({"value": 3}), json.dumps({"value": 4})]
+        assert hub.broadcast("other", topic="other-topic") == 0
+
+        hub.unsubscribe(fast)  # type: ignore
+        assert len(hub) == 1
+        assert hub.topics() == ["topic"]
+
+        disconnecting_hub = WebSocketHub(max_queue_size=1, slow_consumer_policy="disconnect")
+        slow = BlockingWebSocket()
+        disconnecting_hub.subscribe(slow)  # type: ignore
+        assert disconnecting_hub.broadcast(b"1") == 1
+        await asyncio.sleep(0)
+        assert disconnecting_hub.broadcast(b"2") == 1
+        assert disconnecting_hub.broadcast(b"3") == 0
+        await asyncio.sleep(0.01)
+        assert slow.closed_code == aiohttp.WSCloseCode.TRY_AGAIN_LATER
+        assert len(disconnecting_hub) == 0
+        assert disconnecting_hub.stats()["disconnected_slow_consumers"] == 1
+
+    loop.run_until_complete(_async())
+
+    with pytest.raises(ValueError):
+        WebSocketHub(slow_consumer_policy="block")
+
+
+def test_websocket_hub_service(capsys: Any, loop: Any) -> None:
+    services, future = start_service("tests/services/websocket_hub_service.py", loop=loop)
+    instance = services.get("test_websocket_hub")
+    port = instance.context.get("_http_port")
+
+    async def _async(loop: Any) -> None:
+        async with aiohttp.ClientSession(loop=loop) as client:
+            ws_a1 = await client.ws_connect("http://127.0.0.1:{}/ws/a".format(port))
+            ws_a2 = await client.ws_connect("http://127.0.0.1:{}/ws/a".format(port))
+            ws_b = await client.ws_connect("http://127.0.0.1:{}/ws/b".format(port))
+            await asyncio.sleep(0.1)
+
+            response = await client.get("http://127.0.0.1:{}/stats".format(port))
+            stats = json.loads(await response.text())
+            assert stats["connections"] == 3
+            assert stats["topics"] == 2
+
+            await ws_a1.send_str("hello")
+            assert json.loads(await ws_a1.receive_str(timeout=5)) == {"room": "a", "message": "hello"}
+            assert json.loads(await ws_a2.receive_str(timeout=5)) == {"room": "a", "message": "hello"}
+
+            response = await client.post("http://127.0.0.1:{}/broadcast".format(port), data="everyone")
+            assert await response.text() == "3"
+            for ws in (ws_a1, ws_a2, ws_b):
+                assert await ws.receive_str(timeout=5) == "everyone"
+
+            await ws_a2.close()
+            await asyncio.sleep(0.1)
+
+            response = await client.get("http://127.0.0.1:{}/stats".format(port))
+            stats = json.loads(await response.text())
+            assert stats["connections"] == 2
+            assert stats["sent_messages"] == 5
+
+            await ws_a1.close()
+            await ws_b.close()
+
+    loop.run_until_complete(_async(loop))
+    instance.stop_service()
+    loop.run_until_complete(future)
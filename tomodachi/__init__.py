@@ -60,6 +60,10 @@ __available_defs: Dict[str, Union[Tuple[str], Tuple[str, Optional[str]]]] = {
     "scheduler": ("tomodachi.transport.schedule",),
     "aiobotocore_client_connector": ("tomodachi.helpers.aiobotocore_connector", "connector"),
     "AiobotocoreClientConnector": ("tomodachi.helpers.aiobotocore_connector", "ClientConnector"),
+    "http_client_connector": ("tomodachi.helpers.http_client", "connector"),
+    "HttpClientConnector": ("tomodachi.helpers.http_client", "HttpClientConnector"),
+    "get_deadline": ("tomodachi.helpers.deadline", "get_deadline"),
+    "get_remaining_time": ("tomodachi.helpers.deadline", "get_remaining_time"),
     "_log": ("tomodachi.helpers.logging", "log"),
     "cli": ("tomodachi.cli", None),
     "discovery": ("tomodachi.discovery", None),
@@ -70,9 +74,11 @@ __available_defs: Dict[str, Union[Tuple[str], Tuple[str, Optional[str]]]] = {
     "transport": ("tomodachi.transport", None),
     "container": ("tomodachi.container", None),
     "importer": ("tomodachi.importer", None),
+    "inbox": ("tomodachi.inbox", None),
     "launcher": ("tomodachi.launcher", None),
     "logging": ("tomodachi.logging", None),
     "opentelemetry": ("tomodachi.opentelemetry", None),
+    "outbox": ("tomodachi.outbox", None),
     "watcher": ("tomodachi.watcher", None),
 }
 __imported_modules: Dict[str, Any] = {}
@@ -269,9 +275,11 @@ __all__ = [
     "transport",
     "container",
     "importer",
+    "inbox",
     "launcher",
     "logging",
     "opentelemetry",
+    "outbox",
     "watcher",
     "run",
     "_set_service",
@@ -289,6 +297,10 @@ __all__ = [
     "context",
     "AiobotocoreClientConnector",
     "aiobotocore_client_connector",
+    "HttpClientConnector",
+    "http_client_connector",
+    "get_deadline",
+    "get_remaining_time",
     "Options",
     "OptionsInterface",
     "Logger",
@@ -8,11 +8,13 @@ from tomodachi import discovery as discovery
 from tomodachi import envelope as envelope
 from tomodachi import helpers as helpers
 from tomodachi import importer as importer
+from tomodachi import inbox as inbox
 from tomodachi import invoker as invoker
 from tomodachi import launcher as launcher
 from tomodachi import logging as logging
 from tomodachi import opentelemetry as opentelemetry
 from tomodachi import options as options
+from tomodachi import outbox as outbox
 from tomodachi import transport as transport
 from tomodachi import watcher as watcher
 from tomodachi.__version__ import __build_time__ as __build_time__
@@ -20,6 +22,8 @@ from tomodachi.__version__ import __version__ as __version__
 from tomodachi.__version__ import __version_info__ as __version_info__
 from tomodachi.helpers.aiobotocore_connector import ClientConnector as _AiobotocoreClientConnector
 from tomodachi.helpers.aiobotocore_connector import connector as _aiobotocore_client_connector
+from tomodachi.helpers.deadline import get_deadline as get_deadline
+from tomodachi.helpers.deadline import get_remaining_time as get_remaining_time
 from tomodachi.helpers.execution_context import clear_execution_context as _clear_execution_context
 from tomodachi.helpers.execution_context import clear_services as _clear_services
 from tomodachi.helpers.execution_context import decrease_execution_context_value as decrease_execution_context_value
@@ -31,6 +35,8 @@ from tomodachi.helpers.execution_context import increase_execution_context_value
 from tomodachi.helpers.execution_context import set_execution_context as set_execution_context
 from tomodachi.helpers.execution_context import set_service as _set_service
 from tomodachi.helpers.execution_context import unset_service as _unset_service
+from tomodachi.helpers.http_client import HttpClientConnector as HttpClientConnector
+from tomodachi.helpers.http_client import connector as http_client_connector
 from tomodachi.invoker import decorator as decorator
 from tomodachi.logging import Logger as Logger
 from tomodachi.logging import LoggerProtocol as LoggerProtocol
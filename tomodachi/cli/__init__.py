@@ -38,6 +38,8 @@ class CLI:
             f"      use the specified event loop implementation. {DEFAULT}(default: auto){COLOR_RESET}\n"
             f"  {OPTION}--production{COLOR_RESET}\n"
             "      disables service restart on file changes and hides the info banner.\n"
+            f"  {OPTION}--workers <count>{COLOR_RESET}\n"
+            "      forks and supervises worker processes sharing the http port (requires --production).\n"
             f"  {OPTION}--log-level [debug|info|warning|error|critical]{COLOR_RESET}\n"
             f"      specify the minimum log level. {DEFAULT}(default: info){COLOR_RESET}\n"
             f"  {OPTION}--logger [console|json|python|disabled]{COLOR_RESET}\n"
@@ -340,6 +342,40 @@ class CLI:
 
                 watcher = Watcher(root=root_directories, configuration=configuration)
 
+            # --workers (env: TOMODACHI_WORKERS)
+            env_workers = str(os.getenv("TOMODACHI_WORKERS", "")) or None
+            workers: Optional[int] = None
+
+            if env_workers or "--workers" in args:
+                if "--workers" in args:
+                    index = args.index("--workers")
+                    args.pop(index)
+                    try:
+                        value = args.pop(index)
+                    except IndexError:
+                        print("Missing value for --workers option")
+                        sys.exit(2)
+
+                    if env_workers and env_workers != value:
+                        print(
+                            "Invalid value for --workers option: '{}' differs from env TOMODACHI_WORKERS".format(value)
+                        )
+                        sys.exit(2)
+                else:
+                    value = env_workers or ""
+
+                try:
+                    workers = int(value)
+                    if workers < 1:
+                        raise ValueError
+                except ValueError:
+                    print("Invalid value for --workers option: '{}' (expected a positive integer)".format(value))
+                    sys.exit(2)
+
+                if watcher:
+                    print("Invalid combination of --workers and code auto reload (use the --production option)")
+                    sys.exit(2)
+
             # --log-level (env: TOMODACHI_LOG_LEVEL)
             env_log_level: Optional[Union[str, int]] = str(os.getenv("TOMODACHI_LOG_LEVEL", "")).lower() or None
             if not env_log_level:
@@ -493,6 +529,20 @@ class CLI:
                 print(f"{COLOR.WHITE}{COLOR_STYLE.DIM}${COLOR_RESET} {COLOR.BLUE}tomodachi --help{COLOR_RESET}")
                 sys.exit(2)
 
+            if workers:
+                # worker processes are forked before opentelemetry is initialized, since background threads of
+                # exporters won't survive the fork.
+                from tomodachi.supervisor import ProcessSupervisor  # noqa  #  isort:skip
+
+                tomodachi.logging.set_default_formatter(env_logger)
+                tomodachi.logging.set_custom_logger_factory(env_custom_logger)
+                tomodachi.logging.configure(log_level=log_level)
+
+                supervisor_exit_code = ProcessSupervisor(workers).run()
+                if supervisor_exit_code is not None:
+                    tomodachi.logging.remove_handlers()
+                    sys.exit(supervisor_exit_code)
+
             if auto_instrument_opentelemetry:
                 from tomodachi.opentelemetry.auto_instrumentation import initialize as initialize_opentelemetry
 
@@ -533,6 +583,7 @@ class CLI:
                     "custom-logger",
                     "production",
                     "loop",
+                    "workers",
                 ],
             )
         except getopt.GetoptError as e:
@@ -556,7 +607,16 @@ class CLI:
             if opt in ("--dependency-versions", "--dependencies", "--deps"):
                 self.dependency_versions_command()
 
-            if opt in ("-l", "--log-level", "--log", "--logger", "--custom-logger", "--production", "--loop"):
+            if opt in (
+                "-l",
+                "--log-level",
+                "--log",
+                "--logger",
+                "--custom-logger",
+                "--production",
+                "--loop",
+                "--workers",
+            ):
                 from tomodachi.helpers.colors import COLOR, COLOR_RESET, COLOR_STYLE
 
                 print(f"{COLOR.RED}error:{COLOR_RESET} invalid command or combination of command options.")
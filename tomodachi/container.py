@@ -13,7 +13,9 @@ from tomodachi import CLASS_ATTRIBUTE, logging
 from tomodachi._exception import limit_exception_traceback
 from tomodachi.helpers.dict import merge_dicts
 from tomodachi.helpers.execution_context import set_service, unset_service
+from tomodachi.helpers.http_client import connector as http_client_connector
 from tomodachi.invoker import FUNCTION_ATTRIBUTE, INVOKER_TASK_START_KEYWORD, START_ATTRIBUTE
+from tomodachi.outbox.outbox import Outbox
 
 
 class ServiceContainer(object):
@@ -370,6 +372,11 @@ class ServiceContainer(object):
                                     )(instance)
                                 )
 
+                        outbox = getattr(instance, "outbox", None)
+                        if isinstance(outbox, Outbox):
+                            # messages stored before the service was restarted are relayed right away
+                            outbox.start(instance)
+
                         if getattr(instance, "_started_service", None):
                             initialized_coros.add(
                                 logging_context_wrapper(
@@ -548,6 +555,8 @@ class ServiceContainer(object):
                         )
                         logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
 
+        await http_client_connector.close()
+
         for name, instance, log_level in services_started:
             self.logger.info(
                 "terminated service", state="terminated", service=name if len(services_started) > 1 else Ellipsis
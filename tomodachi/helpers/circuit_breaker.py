@@ -0,0 +1,156 @@
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional
+
+from tomodachi import logging
+from tomodachi.helpers.execution_context import get_execution_context, increase_execution_context_value
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker(object):
+    # Opens when the failure rate of the most recent calls (or the number of consecutive failures) reaches its
+    # threshold, after which no calls are allowed for open_duration seconds. A limited number of probe calls are then
+    # allowed (half-open) - the circuit is closed again on a successful probe and reopened on a failed probe.
+    __slots__ = (
+        "name",
+        "failure_rate_threshold",
+        "consecutive_failures_threshold",
+        "window_size",
+        "minimum_calls",
+        "open_duration",
+        "half_open_max_calls",
+        "consecutive_failures",
+        "opened_at",
+        "_state",
+        "_results",
+        "_half_open_calls",
+        "_listeners",
+    )
+
+    def __init__(
+        self,
+        name: str = "",
+        failure_rate_threshold: float = 0.5,
+        consecutive_failures: int = 5,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_duration: float = 30.0,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError("Invalid failure rate threshold: {}".format(failure_rate_threshold))
+        if consecutive_failures < 1 or window_size < 1 or minimum_calls < 1 or half_open_max_calls < 1:
+            raise ValueError("Invalid circuit breaker call counts")
+        if open_duration < 0:
+            raise ValueError("Invalid open duration: {}".format(open_duration))
+
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.consecutive_failures_threshold = consecutive_failures
+        self.window_size = window_size
+        self.minimum_calls = min(minimum_calls, window_size)
+        self.open_duration = open_duration
+        self.half_open_max_calls = half_open_max_calls
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._state = CLOSED
+        self._results: Deque[bool] = deque(maxlen=window_size)
+        self._half_open_calls = 0
+        self._listeners: List[Callable[["CircuitBreaker", str, str], None]] = []
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self.remaining_open_time() <= 0:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    @property
+    def failure_rate(self) -> float:
+        if not self._results:
+            return 0.0
+        return self._results.count(False) / len(self._results)
+
+    def remaining_open_time(self) -> float:
+        if self._state != OPEN:
+            return 0.0
+        return max(self.opened_at + self.open_duration - time.monotonic(), 0.0)
+
+    def add_listener(self, func: Callable[["CircuitBreaker", str, str], None]) -> None:
+        # Listeners are called with the circuit breaker, the previous state and the new state on every transition.
+        self._listeners.append(func)
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self._state == HALF_OPEN:
+            self._transition(CLOSED)
+            return
+        self._results.append(True)
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self._state == HALF_OPEN:
+            self._transition(OPEN)
+            return
+        if self._state == OPEN:
+            return
+
+        self._results.append(False)
+        if self.consecutive_failures >= self.consecutive_failures_threshold or (
+            len(self._results) >= self.minimum_calls and self.failure_rate >= self.failure_rate_threshold
+        ):
+            self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        previous_state = self._state
+        if previous_state == state:
+            return
+
+        self._state = state
+        self._half_open_calls = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        if state == CLOSED:
+            self._results.clear()
+
+        logging.getLogger("tomodachi.circuit_breaker").info(
+            "circuit breaker state changed",
+            circuit_breaker=self.name or Ellipsis,
+            previous_state=previous_state,
+            state=state,
+            failure_rate=round(self.failure_rate, 3),
+            consecutive_failures=self.consecutive_failures,
+        )
+
+        context = get_execution_context()
+        context["circuit_breaker_states"] = {**context.get("circuit_breaker_states", {}), self.name: state}
+        increase_execution_context_value("circuit_breaker_{}_transitions".format(state))
+
+        for func in self._listeners:
+            func(self, previous_state, state)
+
+
+def get_circuit_breaker(name: str, circuit_breaker: Optional[object]) -> Optional[CircuitBreaker]:
+    # Circuit breakers can be specified for handlers either as instances or as a dict of keyword arguments.
+    if circuit_breaker is None or circuit_breaker is False:
+        return None
+    if isinstance(circuit_breaker, CircuitBreaker):
+        if not circuit_breaker.name:
+            circuit_breaker.name = name
+        return circuit_breaker
+    if circuit_breaker is True:
+        return CircuitBreaker(name)
+    if isinstance(circuit_breaker, dict):
+        return CircuitBreaker(**{"name": name, **circuit_breaker})
+    raise ValueError("Invalid circuit breaker: {}".format(circuit_breaker))
@@ -1,8 +1,8 @@
 import datetime
+import functools
+import itertools
 from calendar import monthrange
-from typing import Any, Dict, List, Optional, Tuple, Union, cast
-
-import pytz
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 cron_attributes: List[Tuple[str, Tuple[int, int], Dict[str, int]]] = [
     ("minute", (0, 59), {}),
@@ -40,12 +40,150 @@ crontab_aliases: Dict[str, str] = {
 }
 
 
-def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Optional[datetime.datetime]:
+def _mask(values: Iterable[int]) -> int:
+    mask = 0
+    for value in values:
+        mask |= 1 << value
+    return mask
+
+
+def _range_mask(low: int, high: int) -> int:
+    if low > high:
+        return 0
+    return ((1 << (high + 1)) - 1) & ~((1 << low) - 1)
+
+
+def _next_value(mask: int, value: int) -> Optional[int]:
+    # lowest value in the bitset which is greater than or equal to the given value
+    remaining = mask >> value
+    if not remaining:
+        return None
+    return value + (remaining & -remaining).bit_length() - 1
+
+
+class CrontabExpression(object):
+    # A crontab notation compiled into one bitset per field, where bit n is set if the value n is included. The next
+    # fire time is found by moving each field to its next included value and carrying over to the field above when
+    # there is none left, which only visits the months, days and hours that can match the expression.
+    __slots__ = (
+        "minutes",
+        "hours",
+        "days",
+        "months",
+        "weekdays",
+        "years",
+        "last_day",
+        "last_weekday",
+        "use_days",
+        "use_weekdays",
+    )
+
+    def __init__(
+        self,
+        minutes: int,
+        hours: int,
+        days: int,
+        months: int,
+        weekdays: int,
+        years: int,
+        last_day: bool = False,
+        last_weekday: bool = False,
+        use_days: bool = False,
+        use_weekdays: bool = False,
+    ) -> None:
+        self.minutes = minutes
+        self.hours = hours
+        self.days = days
+        self.months = months
+        self.weekdays = weekdays
+        self.years = years
+        self.last_day = last_day
+        self.last_weekday = last_weekday
+        self.use_days = use_days
+        self.use_weekdays = use_weekdays
+
+    def month_days(self, year: int, month: int) -> int:
+        # bitset of the days of the month which are matched by the day and weekday fields
+        first_weekday, last = monthrange(year, month)
+        first_weekday = (first_weekday + 1) % 7
+        month_mask = (1 << (last + 1)) - 2
+
+        days = self.days & month_mask
+        if self.last_day:
+            days &= 1 << last
+        if not self.use_weekdays:
+            return days
+
+        weekdays = 0
+        for weekday in range(7):
+            if self.weekdays & (1 << weekday):
+                first = 1 + (weekday - first_weekday) % 7
+                if self.last_weekday:
+                    first += (last - first) // 7 * 7
+                weekdays |= _mask(range(first, last + 1, 7))
+
+        if not self.use_days:
+            return weekdays
+        return days | weekdays
+
+    def next_fields(
+        self, year: int, month: int, day: int, hour: int, minute: int
+    ) -> Optional[Tuple[int, int, int, int, int]]:
+        while True:
+            value = _next_value(self.years, year)
+            if value is None:
+                return None
+            if value != year:
+                year, month, day, hour, minute = value, 1, 1, 0, 0
+
+            value = _next_value(self.months, month)
+            if value is None:
+                year, month, day, hour, minute = year + 1, 1, 1, 0, 0
+                continue
+            if value != month:
+                month, day, hour, minute = value, 1, 0, 0
+
+            value = _next_value(self.month_days(year, month), day)
+            if value is None:
+                month, day, hour, minute = month + 1, 1, 0, 0
+                continue
+            if value != day:
+                day, hour, minute = value, 0, 0
+
+            value = _next_value(self.hours, hour)
+            if value is None:
+                day, hour, minute = day + 1, 0, 0
+                continue
+            if value != hour:
+                hour, minute = value, 0
+
+            value = _next_value(self.minutes, minute)
+            if value is None:
+                hour, minute = hour + 1, 0
+                continue
+
+            return year, month, day, hour, value
+
+    def iter_datetimes(self, now_date: datetime.datetime) -> Iterator[datetime.datetime]:
+        # fire times from now_date (if at the start of a minute) and onwards, in the timezone of now_date
+        minute = now_date.minute if now_date.second == 0 else now_date.minute + 1
+        fields = self.next_fields(now_date.year, now_date.month, now_date.day, now_date.hour, minute)
+        while fields:
+            year, month, day, hour, minute = fields
+            yield datetime.datetime(year, month, day, hour, minute, tzinfo=now_date.tzinfo)
+            fields = self.next_fields(year, month, day, hour, minute + 1)
+
+    def next_datetime(self, now_date: datetime.datetime) -> Optional[datetime.datetime]:
+        return next(self.iter_datetimes(now_date), None)
+
+
+@functools.lru_cache(maxsize=512)
+def compile_crontab(crontab_notation: str) -> CrontabExpression:
     crontab_notation = crontab_aliases.get(crontab_notation, crontab_notation)
     cron_parts = [c for c in crontab_notation.split() if c.strip()]
     cron_parts += ["*" for _ in range(len(cron_attributes) - len(cron_parts))]
 
-    values = []
+    values: List[int] = []
     last_day = False
     last_weekday = False
     use_weekdays = False
@@ -54,7 +192,7 @@ def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Opt
         cron_range: Tuple
         aliases: Dict[str, int]
         _, cron_range, aliases = attr
-        available_values: Union[List[int], set] = []
+        available_values = 0
         parts = cron_parts[i].lower().split(",")
 
         if attr[0] == "isoweekday" and cron_parts[i] != "*":
@@ -65,7 +203,7 @@ def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Opt
         for part in parts:
             last = False
             parsed = False
-            possible_values: List[int] = [x for x in range(cron_range[0], cron_range[1] + 1)]
+            possible_values = _range_mask(cron_range[0], cron_range[1])
             if "-" in part:
                 a_value, b_value = part.split("-")
                 if "/" in b_value:
@@ -95,7 +233,7 @@ def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Opt
                         raise Exception(
                             "Invalid cron notation: invalid values for {} ({})".format(attr[0], b_value)
                         ) from e
-                possible_values = [x for x in possible_values if x >= min(a, b) and x <= max(a, b)]
+                possible_values &= _range_mask(max(min(a, b), cron_range[0]), min(max(a, b), cron_range[1]))
                 parsed = True
 
             if "/" in part:
@@ -105,7 +243,7 @@ def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Opt
                     if a < 0:
                         a = int(a_value)
                     b = int(b_value)
-                    possible_values = [x for x in possible_values if x % b == (a % b)]
+                    possible_values &= _mask(x for x in range(cron_range[0], cron_range[1] + 1) if x % b == (a % b))
                 except ValueError:
                     try:
                         b = int(b_value)
@@ -114,7 +252,7 @@ def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Opt
                             "Invalid cron notation: invalid values for {} ({})".format(attr[0], b_value)
                         ) from e
                     if a_value in ["*", "?"]:
-                        possible_values = [x for x in possible_values if x % b == 0]
+                        possible_values &= _mask(x for x in range(cron_range[0], cron_range[1] + 1) if x % b == 0)
                     else:
                         a_value, _ = part.split("-")
                         a = int(aliases.get(a_value, -1))
@@ -125,7 +263,7 @@ def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Opt
                                 raise Exception(
                                     "Invalid cron notation: invalid values for {} ({})".format(attr[0], a_value)
                                 ) from e
-                        possible_values = [x for x in possible_values if x % b == (a % b)]
+                        possible_values &= _mask(x for x in range(cron_range[0], cron_range[1] + 1) if x % b == (a % b))
                 parsed = True
 
             part_value = part
@@ -136,7 +274,7 @@ def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Opt
                 a = int(aliases.get(part_value, -1))
                 if a < 0:
                     a = int(part_value)
-                possible_values = [x for x in possible_values if x == a]
+                possible_values &= _range_mask(a, a) if cron_range[0] <= a <= cron_range[1] else 0
             except ValueError as e:
                 if parsed or part_value in ["*", "?"] or part == "l":
                     pass
@@ -150,187 +288,47 @@ def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Opt
             if last and attr[0] == "isoweekday":
                 last_weekday = True
 
-            if attr[0] == "isoweekday":
-                possible_values = [x if x != 7 else 0 for x in possible_values]
+            if attr[0] == "isoweekday" and possible_values & (1 << 7):
+                possible_values = (possible_values & ~(1 << 7)) | 1
 
             if not possible_values:
                 raise Exception("Invalid cron notation: invalid values for {}".format(attr[0]))
-            if isinstance(available_values, list):
-                available_values += possible_values
+            available_values |= possible_values
 
-        available_values = set(available_values)
         values.append(available_values)
 
-    if min(values[2]) >= 28:
-        if not any([monthrange(y, m)[1] >= min(values[2]) for y in values[5] for m in values[3]]):
+    minutes, hours, days, months, weekdays, years = values
+    min_day = _next_value(days, 0) or 0
+    if min_day >= 28:
+        if not any(
+            monthrange(year, month)[1] >= min_day
+            for year in range(cron_attributes[5][1][0], cron_attributes[5][1][1] + 1)
+            if years & (1 << year)
+            for month in range(1, 13)
+            if months & (1 << month)
+        ):
             raise Exception("Invalid cron notation: days out of scope")
 
-    def calculate_date(
-        input_date: datetime.datetime, last_day: bool, last_weekday: bool
-    ) -> Optional[datetime.datetime]:
-        tz: Any = input_date.tzinfo
-        naive_date = not bool(input_date.tzinfo)
-        if tz is None:
-            tz = pytz.UTC
+    return CrontabExpression(
+        minutes,
+        hours,
+        days,
+        months,
+        weekdays,
+        years,
+        last_day=last_day,
+        last_weekday=last_weekday,
+        use_days=use_days,
+        use_weekdays=use_weekdays,
+    )
 
-        next_date: Optional[datetime.datetime] = input_date
-        while True:
-            original_date = next_date
-            next_date_weekday = next_date
-
-            for i, attr in enumerate(cron_attributes):
-                if attr[0] == "isoweekday":
-                    continue
-                value = getattr(next_date, attr[0])
-                possible_values = [v for v in values[i] if v >= value]
-                if not possible_values:
-                    if attr[0] == "year":
-                        return None
-                    next_date = None
-                    break
-                new_value = min(possible_values)
-                try:
-                    next_date = datetime.datetime(
-                        *[
-                            getattr(next_date, dv) if dv != attr[0] else new_value
-                            for dv in ["year", "month", "day", "hour", "minute"]
-                        ]
-                    ).replace(tzinfo=tz)
-                except ValueError:
-                    next_date = None
-                    break
-
-            for i, attr in enumerate(cron_attributes):
-                if attr[0] == "isoweekday" or attr[0] == "day":
-                    continue
-                value = getattr(next_date_weekday, attr[0])
-                possible_values = [v for v in values[i] if v >= value]
-                if not possible_values:
-                    if attr[0] == "year":
-                        return None
-                    next_date_weekday = None
-                    break
-                new_value = min(possible_values)
-                try:
-                    next_date_weekday = datetime.datetime(
-                        *[
-                            getattr(next_date_weekday, dv) if dv != attr[0] else new_value
-                            for dv in ["year", "month", "day", "hour", "minute"]
-                        ]
-                    ).replace(tzinfo=tz)
-                except ValueError:
-                    next_date_weekday = None
-                    break
-
-            if use_weekdays and next_date_weekday:
-                for d in range(
-                    next_date_weekday.day, monthrange(next_date_weekday.year, next_date_weekday.month)[1] + 1
-                ):
-                    next_date_weekday_arguments = (
-                        getattr(next_date_weekday, dv) if dv != "day" else d
-                        for dv in ["year", "month", "day", "hour", "minute"]
-                    )
-                    next_date_weekday = datetime.datetime(
-                        *cast(Tuple[int, int, int, int, int], next_date_weekday_arguments), tzinfo=tz
-                    )
-                    if next_date_weekday and (next_date_weekday.isoweekday() % 7) in values[4]:
-                        break
-
-            if use_days and not use_weekdays:
-                next_date_weekday = None
-            if not use_days and use_weekdays:
-                next_date = None
-
-            if (
-                use_weekdays
-                and next_date_weekday
-                and (next_date_weekday.isoweekday() % 7) not in values[4]
-                and next_date_weekday.isoweekday() not in values[4]
-            ):
-                next_date_weekday = None
-            if next_date and last_day and next_date.day != monthrange(next_date.year, next_date.month)[1]:
-                next_date = None
-            if use_weekdays and next_date_weekday and last_weekday:
-                for i in range(
-                    next_date_weekday.day + 1, monthrange(next_date_weekday.year, next_date_weekday.month)[1] + 1
-                ):
-                    if (
-                        datetime.datetime(next_date_weekday.year, next_date_weekday.month, i).isoweekday()
-                        == next_date_weekday.isoweekday()
-                    ):
-                        next_date_weekday = None
-                        break
-
-            if use_weekdays and next_date_weekday and (not next_date or next_date_weekday < next_date):
-                next_date = next_date_weekday
-
-            if not next_date:
-                next_date = original_date
-                if next_date:
-                    try:
-                        next_date = datetime.datetime(next_date.year, next_date.month, next_date.day + 1, tzinfo=tz)
-                    except ValueError:
-                        try:
-                            if next_date:
-                                next_date = datetime.datetime(next_date.year, next_date.month + 1, 1, tzinfo=tz)
-                        except ValueError:
-                            if next_date:
-                                next_date = datetime.datetime(next_date.year + 1, 1, 1, tzinfo=tz)
-            else:
-                break
-
-            if next_date and next_date.year >= 2100:
-                return None
 
-        if naive_date and next_date:
-            return datetime.datetime(
-                next_date.year,
-                next_date.month,
-                next_date.day,
-                next_date.hour,
-                next_date.minute,
-                next_date.second,
-                next_date.microsecond,
-            )
-        return next_date
-
-    tz: Any = now_date.tzinfo
-    calculated_dates = [
-        calculate_date(d.replace(tzinfo=tz) if tz else d, last_day, last_weekday)
-        for d in [
-            (
-                datetime.datetime(
-                    now_date.year,
-                    now_date.month,
-                    now_date.day,
-                    now_date.hour,
-                    now_date.minute,
-                    now_date.second,
-                    now_date.microsecond,
-                )
-                if now_date.second == 0
-                else None
-            ),
-            (
-                datetime.datetime(now_date.year, now_date.month, now_date.day, now_date.hour, now_date.minute + 1)
-                if now_date.minute < 60 - 1
-                else None
-            ),
-            (
-                datetime.datetime(now_date.year, now_date.month, now_date.day, now_date.hour + 1)
-                if now_date.hour < 24 - 1
-                else None
-            ),
-            (
-                datetime.datetime(now_date.year, now_date.month, now_date.day + 1)
-                if now_date.day < monthrange(now_date.year, now_date.month)[1] - 1
-                else None
-            ),
-            datetime.datetime(now_date.year, now_date.month + 1, 1) if now_date.month < 12 - 1 else None,
-            datetime.datetime(now_date.year + 1, 1, 1),
-        ]
-        if d
-    ]
-    if not any(calculated_dates):
-        return None
-    return min([d for d in calculated_dates if d])
+def get_next_datetime(crontab_notation: str, now_date: datetime.datetime) -> Optional[datetime.datetime]:
+    return compile_crontab(crontab_notation).next_datetime(now_date)
+
+
+def get_next_datetimes(crontab_notation: str, now_date: datetime.datetime, count: int) -> List[datetime.datetime]:
+    # the next (up to) count fire times, which are fewer than count if the expression is limited to past years
+    if count <= 0:
+        return []
+    return list(itertools.islice(compile_crontab(crontab_notation).iter_datetimes(now_date), count))
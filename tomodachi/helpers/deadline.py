@@ -0,0 +1,59 @@
+import math
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Optional
+
+# HTTP requests carry the remaining time budget in seconds (relative, to not depend on synchronized clocks), while
+# messages carry an absolute unix timestamp, since the time a message spends in queue is part of the budget.
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+DEADLINE_MESSAGE_ATTRIBUTE = "tomodachi.deadline"
+DEADLINE_AMQP_HEADER = "x-tomodachi-deadline"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("tomodachi.deadline", default=None)
+
+
+def get_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def get_remaining_time() -> Optional[float]:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.time(), 0.0)
+
+
+def deadline_exceeded() -> bool:
+    deadline = _deadline.get()
+    return deadline is not None and deadline <= time.time()
+
+
+def set_deadline(deadline: Optional[float]) -> Token:
+    # An already set deadline is never extended by a later deadline.
+    current_deadline = _deadline.get()
+    if current_deadline is not None and (deadline is None or deadline > current_deadline):
+        deadline = current_deadline
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def parse_deadline(value: Any) -> Optional[float]:
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", errors="replace")
+    if value is None or isinstance(value, bool) or value == "":
+        return None
+    try:
+        deadline = float(value)
+    except (TypeError, ValueError):
+        return None
+    # "nan", "inf" and values out of range for a float are ignored, the same way as other invalid values
+    if not math.isfinite(deadline):
+        return None
+    return deadline
+
+
+def format_deadline(deadline: float) -> str:
+    return "{0:.3f}".format(deadline)
@@ -0,0 +1,197 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Optional, Union
+
+import aiohttp
+
+from tomodachi.helpers.deadline import REQUEST_TIMEOUT_HEADER, get_remaining_time
+from tomodachi.helpers.execution_context import get_service
+from tomodachi.options import Options
+
+COUNTERS = ("requests", "connections_created", "connections_reused", "dns_cache_hits", "dns_cache_misses")
+
+
+class HttpClientConnector:
+    # Keeps pooled aiohttp client sessions (one per alias) which are reused for all outbound HTTP requests, so that
+    # connections are kept alive between requests. The sessions are closed automatically when the service stops.
+    __slots__ = ("sessions", "counters", "locks", "close_waiter")
+
+    sessions: Dict[str, aiohttp.ClientSession]
+    counters: Dict[str, Dict[str, int]]
+    locks: Dict[str, asyncio.Lock]
+    close_waiter: Optional[asyncio.Future]
+
+    def __init__(self) -> None:
+        self.sessions = {}
+        self.counters = {}
+        self.locks = {}
+        self.close_waiter = None
+
+    def get_session(self, alias_name: str = "default") -> Optional[aiohttp.ClientSession]:
+        session = self.sessions.get(alias_name)
+        if session is None or session.closed:
+            return None
+        return session
+
+    def get_lock(self, alias_name: str) -> asyncio.Lock:
+        if alias_name not in self.locks:
+            self.locks[alias_name] = asyncio.Lock()
+        return self.locks[alias_name]
+
+    async def create_session(
+        self,
+        alias_name: str = "default",
+        options: Optional[Union[Options.HTTP.Client, Options]] = None,
+        **session_kwargs: Any,
+    ) -> aiohttp.ClientSession:
+        if self.close_waiter and not self.close_waiter.done():
+            await self.close_waiter
+
+        async with self.get_lock(alias_name):
+            session = self.get_session(alias_name)
+            if session:
+                return session
+
+            if options is None:
+                options = self._service_options()
+            client_options = options.http.client if isinstance(options, Options) else options
+
+            keepalive_timeout = client_options.keepalive_timeout if client_options.keepalive_timeout > 0 else None
+            connector = aiohttp.TCPConnector(
+                limit=client_options.limit,
+                limit_per_host=client_options.limit_per_host,
+                keepalive_timeout=keepalive_timeout,
+                force_close=keepalive_timeout is None,
+                use_dns_cache=client_options.dns_cache_ttl is not None,
+                ttl_dns_cache=client_options.dns_cache_ttl,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=client_options.total_timeout,
+                connect=client_options.connect_timeout,
+                sock_read=client_options.read_timeout,
+            )
+
+            counters = self.counters[alias_name] = {key: 0 for key in COUNTERS}
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(self._counter(counters, "requests"))
+            trace_config.on_request_start.append(self._propagate_deadline())
+            trace_config.on_connection_create_end.append(self._counter(counters, "connections_created"))
+            trace_config.on_connection_reuseconn.append(self._counter(counters, "connections_reused"))
+            trace_config.on_dns_cache_hit.append(self._counter(counters, "dns_cache_hits"))
+            trace_config.on_dns_cache_miss.append(self._counter(counters, "dns_cache_misses"))
+
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=timeout,
+                trace_configs=[trace_config, *session_kwargs.pop("trace_configs", [])],
+                **session_kwargs,
+            )
+            self.sessions[alias_name] = session
+
+            return session
+
+    async def close_session(self, alias_name: str = "default", fast: bool = False) -> None:
+        async with self.get_lock(alias_name):
+            session = self.sessions.pop(alias_name, None)
+            if not session or session.closed:
+                return
+
+            await session.close()
+            if not fast:
+                await asyncio.sleep(0.25)  # SSL termination sleep
+
+    async def close(self, fast: bool = False) -> None:
+        if self.close_waiter and not self.close_waiter.done():
+            await self.close_waiter
+            return
+
+        sessions = [session for session in self.sessions.values() if not session.closed]
+
+        self.sessions = {}
+        self.counters = {}
+        self.locks = {}
+
+        if not sessions:
+            return
+
+        self.close_waiter = asyncio.Future()
+        try:
+            await asyncio.wait([asyncio.ensure_future(session.close()) for session in sessions], timeout=3)
+            if not fast:
+                await asyncio.sleep(0.25)  # SSL termination sleep
+        except (Exception, asyncio.CancelledError):
+            pass
+        finally:
+            self.close_waiter.set_result(None)
+
+    def stats(self, alias_name: str = "default") -> Dict[str, Any]:
+        # Connection pool utilisation of the session, as well as the number of requests, created and reused
+        # connections and DNS cache hits since the session was created.
+        result: Dict[str, Any] = {
+            "limit": 0,
+            "limit_per_host": 0,
+            "acquired_connections": 0,
+            "acquired_connections_per_host": {},
+            "idle_connections": 0,
+            "waiting_requests": 0,
+        }
+
+        session = self.get_session(alias_name)
+        connector: Any = session.connector if session else None
+        if connector is not None:
+            result["limit"] = connector.limit
+            result["limit_per_host"] = connector.limit_per_host
+            result["acquired_connections"] = len(getattr(connector, "_acquired", ()))
+            result["acquired_connections_per_host"] = {
+                "{}:{}".format(key.host, key.port): len(connections)
+                for key, connections in getattr(connector, "_acquired_per_host", {}).items()
+                if connections
+            }
+            result["idle_connections"] = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+            result["waiting_requests"] = sum(len(waiters) for waiters in getattr(connector, "_waiters", {}).values())
+
+        result.update(self.counters.get(alias_name) or {key: 0 for key in COUNTERS})
+        return result
+
+    @staticmethod
+    def _service_options() -> Options:
+        service = get_service()
+        context_options = getattr(service, "context", {}).get("options") if service else None
+        if isinstance(context_options, Options):
+            return context_options
+        return Options(**(context_options or {}))
+
+    @staticmethod
+    def _counter(counters: Dict[str, int], key: str) -> Any:
+        async def _trace(session: aiohttp.ClientSession, trace_config_ctx: SimpleNamespace, params: Any) -> None:
+            counters[key] += 1
+
+        return _trace
+
+    @staticmethod
+    def _propagate_deadline() -> Any:
+        # Outbound requests made while handling a request or message with a deadline passes on the remaining time.
+        async def _trace(session: aiohttp.ClientSession, trace_config_ctx: SimpleNamespace, params: Any) -> None:
+            remaining_time = get_remaining_time()
+            if remaining_time is not None and REQUEST_TIMEOUT_HEADER not in params.headers:
+                params.headers[REQUEST_TIMEOUT_HEADER] = "{0:.3f}".format(remaining_time)
+
+        return _trace
+
+    async def _session_context(
+        self,
+        alias_name: str = "default",
+        options: Optional[Union[Options.HTTP.Client, Options]] = None,
+        **session_kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientSession]:
+        session = self.get_session(alias_name)
+        if not session:
+            session = await self.create_session(alias_name, options, **session_kwargs)
+
+        yield session
+
+    __call__ = asynccontextmanager(_session_context)
+
+
+connector: HttpClientConnector = HttpClientConnector()
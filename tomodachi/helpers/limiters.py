@@ -0,0 +1,266 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, List, Mapping, Optional
+
+
+class ConcurrencyLimiter(object):
+    # Limits the number of concurrently running tasks. Tasks exceeding the limit may wait in a bounded FIFO queue for
+    # a slot for at most max_queue_time seconds. Released slots are handed over directly to the next waiting task.
+    __slots__ = ("max_concurrent", "max_queued", "max_queue_time", "active", "_waiters")
+
+    def __init__(self, max_concurrent: int, max_queued: int = 0, max_queue_time: Optional[float] = None) -> None:
+        if max_concurrent < 1:
+            raise ValueError("Invalid max concurrency limit: {}".format(max_concurrent))
+        if max_queued < 0:
+            raise ValueError("Invalid max queue size: {}".format(max_queued))
+
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.max_queue_time = max_queue_time if max_queue_time and max_queue_time > 0 else None
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def try_acquire(self) -> bool:
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return True
+        return False
+
+    async def acquire(self) -> bool:
+        if self.try_acquire():
+            return True
+        if len(self._waiters) >= self.max_queued:
+            return False
+
+        loop = asyncio.get_event_loop()
+        waiter: asyncio.Future = loop.create_future()
+        self._waiters.append(waiter)
+        timeout_handle = (
+            loop.call_later(self.max_queue_time, self._expire_waiter, waiter) if self.max_queue_time else None
+        )
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if self._granted(waiter):
+                # the slot was handed over to the waiter just before it was cancelled
+                self.release()
+            else:
+                self._discard_waiter(waiter)
+            raise
+        finally:
+            if timeout_handle:
+                timeout_handle.cancel()
+
+        if not self._granted(waiter):
+            self._discard_waiter(waiter)
+            return False
+        return True
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+    def _discard_waiter(self, waiter: asyncio.Future) -> None:
+        # expired waiters may already have been skipped over by a release
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def _granted(waiter: asyncio.Future) -> bool:
+        return waiter.done() and not waiter.cancelled() and bool(waiter.result())
+
+    @staticmethod
+    def _expire_waiter(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(False)
+
+
+class RateLimiter(object):
+    # Token bucket rate limiter keeping a bucket per key (for example per client IP). Buckets are refilled with rate
+    # tokens per second up to burst tokens. The buckets are kept in least recently used order, which makes eviction of
+    # idle buckets O(1) - a bucket that has been idle long enough to be refilled is equal to a new bucket and can be
+    # dropped. At most max_keys buckets are kept, by evicting the least recently used bucket when needed.
+    __slots__ = ("rate", "burst", "max_keys", "idle_time", "_buckets")
+
+    def __init__(self, rate: float, burst: Optional[int] = None, max_keys: int = 10000) -> None:
+        if rate <= 0:
+            raise ValueError("Invalid rate limit: {}".format(rate))
+        if burst is not None and burst < 1:
+            raise ValueError("Invalid rate limit burst: {}".format(burst))
+        if max_keys < 1:
+            raise ValueError("Invalid rate limit max keys: {}".format(max_keys))
+
+        self.rate = float(rate)
+        self.burst = burst if burst is not None else max(int(rate), 1)
+        self.max_keys = max_keys
+        self.idle_time = self.burst / self.rate
+        self._buckets: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def hit(self, key: Hashable, now: Optional[float] = None) -> float:
+        # Takes a token from the key's bucket. Returns 0.0 if a token was available, otherwise the number of seconds
+        # until the next token is available.
+        if now is None:
+            now = time.monotonic()
+
+        buckets = self._buckets
+        bucket = buckets.get(key)
+        if bucket is None:
+            self._evict(now)
+            tokens = float(self.burst)
+            bucket = buckets[key] = [tokens, now]
+        else:
+            buckets.move_to_end(key)
+            tokens = min(bucket[0] + (now - bucket[1]) * self.rate, self.burst)
+            bucket[1] = now
+
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return 0.0
+
+        bucket[0] = tokens
+        return (1.0 - tokens) / self.rate
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            bucket = next(iter(buckets.values()))
+            if len(buckets) < self.max_keys and bucket[1] + self.idle_time > now:
+                return
+            buckets.popitem(last=False)
+
+
+class _ThroughputBucket(object):
+    __slots__ = ("rate", "burst", "tokens", "updated_at", "waiters", "handle")
+
+    def __init__(self, rate: float, burst: int, updated_at: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = updated_at
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+
+class ThroughputLimiter(object):
+    # Token bucket limiting the throughput per key (for example per topic or queue) to rate operations per second, with
+    # bursts of up to burst operations. Callers exceeding the limit are not rejected, but wait in a FIFO queue per key
+    # and are let through in order as the bucket is refilled. A single timer per key wakes up the waiting callers.
+    # Keys listed in rates have a limit of their own (with bursts of up to that rate), while other keys aren't limited
+    # if rate is None. The buckets are kept in least recently used order, and idle buckets without waiting callers
+    # that have been refilled are dropped, since they are equal to new buckets.
+    __slots__ = ("rate", "burst", "rates", "_buckets")
+
+    def __init__(
+        self, rate: Optional[float], burst: Optional[int] = None, rates: Optional[Mapping[Any, float]] = None
+    ) -> None:
+        if rate is not None and rate <= 0:
+            raise ValueError("Invalid throughput limit: {}".format(rate))
+        if burst is not None and burst < 1:
+            raise ValueError("Invalid throughput limit burst: {}".format(burst))
+        for key_rate in (rates or {}).values():
+            if key_rate <= 0:
+                raise ValueError("Invalid throughput limit: {}".format(key_rate))
+
+        self.rate = float(rate) if rate is not None else None
+        self.burst = burst if burst is not None else max(int(rate or 1), 1)
+        self.rates: Dict[Hashable, float] = {key: float(key_rate) for key, key_rate in (rates or {}).items()}
+        self._buckets: "OrderedDict[Hashable, _ThroughputBucket]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def queued(self, key: Hashable) -> int:
+        bucket = self._buckets.get(key)
+        return len(bucket.waiters) if bucket else 0
+
+    async def acquire(self, key: Hashable) -> float:
+        # Takes a token from the key's bucket, waiting for the bucket to be refilled if needed. Returns the number of
+        # seconds spent waiting.
+        now = time.monotonic()
+        buckets = self._buckets
+        bucket = buckets.get(key)
+        if bucket is None:
+            self._evict(now)
+            rate = self.rates.get(key, self.rate)
+            if rate is None:
+                return 0.0
+            burst = self.burst if key not in self.rates else max(int(rate), 1)
+            bucket = buckets[key] = _ThroughputBucket(rate, burst, now)
+        else:
+            buckets.move_to_end(key)
+
+        if not bucket.waiters:
+            self._refill(bucket, now)
+            if bucket.tokens >= 1.0:
+                bucket.tokens -= 1.0
+                return 0.0
+
+        waiter: asyncio.Future = asyncio.get_event_loop().create_future()
+        bucket.waiters.append(waiter)
+        if bucket.handle is None:
+            self._schedule(bucket)
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the token was handed over to the waiter just before it was cancelled
+                bucket.tokens = min(bucket.tokens + 1.0, float(bucket.burst))
+            else:
+                try:
+                    bucket.waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+        return time.monotonic() - now
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            bucket = next(iter(buckets.values()))
+            if (
+                bucket.waiters
+                or bucket.handle is not None
+                or bucket.tokens + (now - bucket.updated_at) * bucket.rate < bucket.burst
+            ):
+                return
+            buckets.popitem(last=False)
+
+    def _refill(self, bucket: _ThroughputBucket, now: float) -> None:
+        bucket.tokens = min(bucket.tokens + (now - bucket.updated_at) * bucket.rate, float(bucket.burst))
+        bucket.updated_at = now
+
+    def _schedule(self, bucket: _ThroughputBucket) -> None:
+        delay = max((1.0 - bucket.tokens) / bucket.rate, 0.0)
+        bucket.handle = asyncio.get_event_loop().call_later(delay, self._release, bucket)
+
+    def _release(self, bucket: _ThroughputBucket) -> None:
+        bucket.handle = None
+        self._refill(bucket, time.monotonic())
+
+        # tolerates the timer firing a tiny bit before the next token is due
+        while bucket.waiters and bucket.tokens >= 1.0 - 1e-9:
+            waiter = bucket.waiters.popleft()
+            if waiter.done():
+                continue
+            bucket.tokens = max(bucket.tokens - 1.0, 0.0)
+            waiter.set_result(None)
+
+        if bucket.waiters:
+            self._schedule(bucket)
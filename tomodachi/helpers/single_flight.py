@@ -0,0 +1,50 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(object):
+    # Coalesces concurrent calls with the same key into a single execution, of which the result (or exception) is
+    # shared with all callers that arrived while the call was in-flight. If the executing caller is cancelled, one of
+    # the waiting callers takes over the execution.
+    __slots__ = ("_calls",)
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        # Returns the result together with a bool which is True if the result was shared from another caller.
+        while True:
+            call = self._calls.get(key)
+            if call is None:
+                break
+            try:
+                value, exception = await asyncio.shield(call)
+            except asyncio.CancelledError:
+                if not call.cancelled():
+                    raise
+                continue
+            if exception is not None:
+                raise exception
+            return value, True
+
+        call = asyncio.get_event_loop().create_future()
+        self._calls[key] = call
+        try:
+            value = await func()
+        except Exception as e:
+            call.set_result((None, e))
+            raise
+        except BaseException:
+            call.cancel()
+            raise
+        finally:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+        call.set_result((value, None))
+        return value, False
@@ -0,0 +1,401 @@
+import asyncio
+import base64
+import contextvars
+import functools
+import json
+import os
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from tomodachi import logging
+from tomodachi.helpers.execution_context import increase_execution_context_value, set_execution_context
+
+FSYNC_ALWAYS = "always"
+FSYNC_INTERVAL = "interval"
+FSYNC_NEVER = "never"
+
+SEGMENT_FILENAME_SUFFIX = ".spool"
+CHECKPOINT_FILENAME = "checkpoint"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(bytes(value)).decode("ascii")}
+    raise TypeError("Object of type {} is not JSON serializable".format(value.__class__.__name__))
+
+
+def _json_object_hook(value: Dict[str, Any]) -> Any:
+    if len(value) == 1 and "__bytes__" in value:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+class PublishSpool(object):
+    # Append-only log of messages to publish once the broker is reachable again. Records are appended to segment files
+    # as lines of JSON prefixed with their CRC32 checksum and are replayed in order by a drainer task. Replayed
+    # segments are removed and the read position is checkpointed, so that at most the records replayed since the last
+    # checkpoint are published again if the process crashes. Syncing to disk, checkpoints and removal of segments are
+    # done on a dedicated thread in the order they were requested, and records appended while a sync is in progress
+    # are synced together by the next sync.
+    __slots__ = (
+        "directory",
+        "name",
+        "segment_size",
+        "fsync",
+        "fsync_interval",
+        "checkpoint_interval",
+        "depth",
+        "_segments",
+        "_write_file",
+        "_write_size",
+        "_read_segment",
+        "_read_offset",
+        "_read_file",
+        "_next_record",
+        "_uncheckpointed",
+        "_last_fsync",
+        "_pending_sync",
+        "_syncing",
+        "_executor",
+        "_drain_task",
+    )
+
+    def __init__(
+        self,
+        directory: str,
+        name: str = "spool",
+        segment_size: int = 16 * 1024 * 1024,
+        fsync: str = FSYNC_INTERVAL,
+        fsync_interval: float = 1.0,
+        checkpoint_interval: int = 100,
+    ) -> None:
+        if fsync not in (FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_NEVER):
+            raise ValueError("Invalid spool fsync policy: {}".format(fsync))
+
+        self.directory = directory
+        self.name = name
+        self.segment_size = max(segment_size, 1)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.checkpoint_interval = max(checkpoint_interval, 1)
+        self.depth = 0
+        self._segments: List[int] = []
+        self._write_file: Optional[BinaryIO] = None
+        self._write_size = 0
+        self._read_segment = 0
+        self._read_offset = 0
+        self._read_file: Optional[BinaryIO] = None
+        self._next_record: Optional[Tuple[Dict[str, Any], int]] = None
+        self._uncheckpointed = 0
+        self._last_fsync = 0.0
+        self._pending_sync: Optional[asyncio.Future] = None
+        self._syncing: Optional[asyncio.Future] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._drain_task: Optional[asyncio.Future] = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def __len__(self) -> int:
+        return self.depth
+
+    async def append(self, record: Dict[str, Any]) -> None:
+        line = self._encode(record)
+        if self._write_file is None or (self._write_size and self._write_size + len(line) > self.segment_size):
+            self._roll()
+
+        write_file = self._write_file
+        if write_file is None:
+            return
+        write_file.write(line)
+        write_file.flush()
+        self._write_size += len(line)
+
+        if not self.depth:
+            logging.getLogger("tomodachi.spool").info("spooling messages", spool=self.name)
+        self.depth += 1
+        increase_execution_context_value("{}_spooled_messages".format(self.name))
+        self._export()
+
+        if self.fsync == FSYNC_ALWAYS:
+            await asyncio.shield(self._sync())
+        elif self.fsync == FSYNC_INTERVAL and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._last_fsync = time.monotonic()
+            self._sync()
+
+    def peek(self) -> Optional[Dict[str, Any]]:
+        # Returns the next record to replay, which is returned again until it's committed.
+        if self._next_record is not None:
+            return self._next_record[0]
+
+        while self._segments:
+            if self._read_segment not in self._segments:
+                self._read_segment = self._segments[0]
+                self._read_offset = 0
+            if self._read_file is None:
+                self._read_file = open(self._path(self._read_segment), "rb")
+                self._read_file.seek(self._read_offset)
+
+            line = self._read_file.readline()
+            record = self._decode(line)
+            if record is not None:
+                self._next_record = (record, self._read_offset + len(line))
+                return record
+
+            if self._read_segment == self._segments[-1]:
+                if line:
+                    logging.getLogger("tomodachi.spool").warning(
+                        "discarded corrupted spool records", spool=self.name, segment=self._read_segment
+                    )
+                    self._write_size = self._read_offset
+                    if self._write_file is not None:
+                        self._write_file.truncate(self._read_offset)
+                        self._write_file.seek(self._read_offset)
+                if self._read_offset >= self._write_size:
+                    self._remove_read_segment()
+                break
+
+            if line:
+                logging.getLogger("tomodachi.spool").warning(
+                    "discarded corrupted spool records", spool=self.name, segment=self._read_segment
+                )
+            self._remove_read_segment()
+
+        if self.depth:
+            self.depth = 0
+            self._export()
+        return None
+
+    def commit(self) -> None:
+        if self._next_record is None:
+            return
+
+        _, self._read_offset = self._next_record
+        self._next_record = None
+        self.depth = max(self.depth - 1, 0)
+        if not self.depth:
+            logging.getLogger("tomodachi.spool").info("spool drained", spool=self.name)
+
+        self._uncheckpointed += 1
+        if self._uncheckpointed >= self.checkpoint_interval:
+            self._write_checkpoint()
+        self._export()
+
+    def start_drain(self, publish: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+        if self._drain_task is None or self._drain_task.done():
+            # started in an empty context, so that the context of the publish that started the drainer (such as its
+            # deadline) isn't passed on to the replayed messages
+            self._drain_task = contextvars.Context().run(asyncio.ensure_future, self._drain(publish))
+
+    async def close(self) -> None:
+        if self._drain_task is not None and not self._drain_task.done():
+            self._drain_task.cancel()
+            try:
+                await self._drain_task
+            except (Exception, asyncio.CancelledError):
+                pass
+        self._drain_task = None
+
+        if self._write_file is not None:
+            if self.fsync != FSYNC_NEVER:
+                try:
+                    await self._sync()
+                except OSError:
+                    pass
+            self._write_file.close()
+            self._write_file = None
+        if self._read_file is not None:
+            self._read_file.close()
+            self._read_file = None
+        self._next_record = None
+        await asyncio.wrap_future(self._write_checkpoint())
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _drain(self, publish: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+        # A record that fails to be published is retried with an exponential backoff, since later records can't be
+        # published before it without breaking the order.
+        attempt = 0
+        while True:
+            record = self.peek()
+            if record is None:
+                return
+
+            try:
+                await publish(record)
+            except Exception as e:
+                attempt += 1
+                delay = min(0.5 * 2 ** (attempt - 1), 10.0)
+                logging.getLogger("tomodachi.spool").warning(
+                    "Unable to replay spooled message ({})".format(str(e) or e.__class__.__name__),
+                    spool=self.name,
+                    attempt=attempt,
+                    retry_delay=delay,
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            attempt = 0
+            self.commit()
+            increase_execution_context_value("{}_spool_replayed_messages".format(self.name))
+
+    def _load(self) -> None:
+        self._segments = sorted(
+            int(filename[: -len(SEGMENT_FILENAME_SUFFIX)])
+            for filename in os.listdir(self.directory)
+            if filename.endswith(SEGMENT_FILENAME_SUFFIX) and filename[: -len(SEGMENT_FILENAME_SUFFIX)].isdigit()
+        )
+
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILENAME), "r") as checkpoint_file:
+                read_segment, read_offset = (int(value) for value in checkpoint_file.read().split())
+        except (OSError, ValueError):
+            read_segment, read_offset = 0, 0
+
+        for segment in [segment for segment in self._segments if segment < read_segment]:
+            os.remove(self._path(segment))
+            self._segments.remove(segment)
+        if read_segment in self._segments:
+            self._read_segment, self._read_offset = read_segment, read_offset
+        else:
+            self._read_segment, self._read_offset = self._segments[0] if self._segments else read_segment, 0
+
+        for segment in self._segments:
+            offset = self._read_offset if segment == self._read_segment else 0
+            with open(self._path(segment), "rb") as segment_file:
+                segment_file.seek(offset)
+                for line in segment_file:
+                    if self._decode(line) is None:
+                        break
+                    self.depth += 1
+                    offset += len(line)
+
+            if segment == self._segments[-1]:
+                # a partially written record at the end of the last segment is removed before appending to it
+                self._write_file = open(self._path(segment), "r+b")
+                self._write_file.truncate(offset)
+                self._write_file.seek(offset)
+                self._write_size = offset
+
+        self._export()
+
+    def _roll(self) -> None:
+        if self._write_file is not None:
+            if self.fsync != FSYNC_NEVER:
+                self._submit(self._fsync_func(self._write_file))
+            self._write_file.close()
+
+        # segment numbers are never reused, since segments before the checkpointed segment are removed on load
+        segment = self._segments[-1] + 1 if self._segments else max(self._read_segment, 1)
+        self._write_file = open(self._path(segment), "ab")
+        self._write_size = 0
+        self._segments.append(segment)
+
+    def _remove_read_segment(self) -> None:
+        if self._read_file is not None:
+            self._read_file.close()
+            self._read_file = None
+
+        segment = self._read_segment
+        if segment == self._segments[-1] and self._write_file is not None:
+            self._write_file.close()
+            self._write_file = None
+            self._write_size = 0
+        self._submit(functools.partial(os.remove, self._path(segment)))
+        self._segments.remove(segment)
+
+        self._read_segment = self._segments[0] if self._segments else segment + 1
+        self._read_offset = 0
+        self._write_checkpoint()
+
+    def _write_checkpoint(self) -> Future:
+        self._uncheckpointed = 0
+        path = os.path.join(self.directory, CHECKPOINT_FILENAME)
+        checkpoint = "{} {}".format(self._read_segment, self._read_offset)
+
+        def _write() -> None:
+            with open(path + ".tmp", "w") as checkpoint_file:
+                checkpoint_file.write(checkpoint)
+            os.replace(path + ".tmp", path)
+
+        return self._submit(_write)
+
+    def _sync(self) -> asyncio.Future:
+        if self._pending_sync is None:
+            self._pending_sync = asyncio.get_event_loop().create_future()
+            asyncio.ensure_future(self._run_sync(self._pending_sync))
+        return self._pending_sync
+
+    async def _run_sync(self, future: asyncio.Future) -> None:
+        # waits for the sync in progress, so that the records appended in the meantime are synced together
+        if self._syncing is not None:
+            await asyncio.wait([self._syncing])
+        self._pending_sync = None
+        self._syncing = future
+
+        try:
+            if self._write_file is not None:
+                await asyncio.wrap_future(self._submit(self._fsync_func(self._write_file)))
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+        else:
+            future.set_result(None)
+        finally:
+            if self._syncing is future:
+                self._syncing = None
+
+    def _fsync_func(self, write_file: BinaryIO) -> Callable[[], None]:
+        # the file descriptor is duplicated, since the file may be closed before the sync has been done
+        fd = os.dup(write_file.fileno())
+
+        def _fsync() -> None:
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        return _fsync
+
+    def _submit(self, func: Callable[[], None]) -> Future:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tomodachi.spool")
+
+        def _done(future: Future) -> None:
+            e = future.exception()
+            if e is not None:
+                logging.getLogger("tomodachi.spool").warning(
+                    "Unable to write to spool ({})".format(str(e) or e.__class__.__name__), spool=self.name
+                )
+
+        future = self._executor.submit(func)
+        future.add_done_callback(_done)
+        return future
+
+    def _export(self) -> None:
+        set_execution_context({"{}_spool_depth".format(self.name): self.depth})
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, "{:020d}{}".format(segment, SEGMENT_FILENAME_SUFFIX))
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        data = json.dumps(record, default=_json_default, separators=(",", ":")).encode("utf-8")
+        return "{:08x} ".format(zlib.crc32(data)).encode("ascii") + data + b"\n"
+
+    @staticmethod
+    def _decode(line: bytes) -> Optional[Dict[str, Any]]:
+        if len(line) < 10 or not line.endswith(b"\n") or line[8:9] != b" ":
+            return None
+        data = line[9:-1]
+        try:
+            if int(line[:8], 16) != zlib.crc32(data):
+                return None
+            record = json.loads(data.decode("utf-8"), object_hook=_json_object_hook)
+        except ValueError:
+            return None
+        return record if isinstance(record, dict) else None
@@ -0,0 +1,34 @@
+from typing import Any, Dict
+
+__cached_defs: Dict[str, Any] = {}
+
+
+def __getattr__(name: str) -> Any:
+    if name in __cached_defs:
+        return __cached_defs[name]
+
+    import importlib  # noqa  # isort:skip
+
+    result: Any
+    if name in ("Inbox", "InboxStore"):
+        module = importlib.import_module(".inbox", "tomodachi.inbox")
+        result = getattr(module, name)
+    elif name in ("SQLiteInboxStore",):
+        module = importlib.import_module(".sqlite", "tomodachi.inbox")
+        result = getattr(module, name)
+    elif name in ("inbox", "sqlite"):
+        result = importlib.import_module(".{}".format(name), "tomodachi.inbox")
+    else:
+        raise AttributeError("module 'tomodachi.inbox' has no attribute '{}'".format(name))
+
+    __cached_defs[name] = result
+    return __cached_defs[name]
+
+
+__all__ = [
+    "Inbox",
+    "InboxStore",
+    "SQLiteInboxStore",
+    "inbox",
+    "sqlite",
+]
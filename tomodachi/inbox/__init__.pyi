@@ -0,0 +1,13 @@
+from tomodachi.inbox import inbox as inbox
+from tomodachi.inbox import sqlite as sqlite
+from tomodachi.inbox.inbox import Inbox as Inbox
+from tomodachi.inbox.inbox import InboxStore as InboxStore
+from tomodachi.inbox.sqlite import SQLiteInboxStore as SQLiteInboxStore
+
+__all__ = [
+    "Inbox",
+    "InboxStore",
+    "SQLiteInboxStore",
+    "inbox",
+    "sqlite",
+]
@@ -0,0 +1,158 @@
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Protocol
+
+from tomodachi import logging
+from tomodachi.helpers.execution_context import increase_execution_context_value
+
+
+class InboxStore(Protocol):
+    # Messages are recorded per handler, keyed on the message uuid and the name of the handler function (qualified by
+    # the name of the service, since a store may be shared by several services), and are kept until they expire. Expired messages may still be reported as received until the store has been compacted.
+    async def contains(self, message_uuid: str, handler: str) -> bool: ...
+
+    async def add(self, message_uuid: str, handler: str, expires_at: float) -> None: ...
+
+    async def compact(self, now: float) -> int: ...
+
+    async def close(self) -> None: ...
+
+
+class Inbox(object):
+    # Records the messages that have been handled, so that messages that are delivered again (after a restart of the
+    # service or to another instance of the service) are discarded without calling the handler. Messages are recorded
+    # once their handler has returned, which makes a message that was redelivered while it was being handled still be
+    # handled twice. Recorded messages are kept in a bounded in-memory cache in front of the store, since redelivered
+    # messages are mostly received shortly after the first delivery.
+    __slots__ = (
+        "store",
+        "ttl",
+        "cache_size",
+        "compaction_interval",
+        "_cache",
+        "_compaction_task",
+        "_stop_chained",
+        "_closing",
+    )
+
+    def __init__(
+        self,
+        store: InboxStore,
+        *,
+        ttl: float = 604800.0,
+        cache_size: int = 100000,
+        compaction_interval: float = 3600.0,
+    ) -> None:
+        self.store = store
+        self.ttl = ttl
+        self.cache_size = max(cache_size, 0)
+        self.compaction_interval = compaction_interval
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+        self._compaction_task: Optional[asyncio.Future] = None
+        self._stop_chained = False
+        self._closing = False
+
+    async def contains(self, message_uuid: str, handler: str) -> bool:
+        key = "{}:{}".format(message_uuid, handler)
+        expires_at = self._cache.get(key)
+        if expires_at is not None:
+            if expires_at > time.time():
+                self._cache.move_to_end(key)
+                return True
+            del self._cache[key]
+
+        return await self.store.contains(message_uuid, handler)
+
+    async def add(self, message_uuid: str, handler: str) -> None:
+        expires_at = time.time() + self.ttl
+        await self.store.add(message_uuid, handler, expires_at)
+
+        if self.cache_size:
+            key = "{}:{}".format(message_uuid, handler)
+            self._cache[key] = expires_at
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def handler_name(service: Any, handler: str) -> str:
+        return "{}.{}".format(getattr(service, "name", None) or service.__class__.__name__, handler)
+
+    async def is_duplicate(self, service: Any, message_uuid: str, handler: str) -> bool:
+        # Used by the transports before calling the handler of a received message. A message is not reported as a
+        # duplicate if the store can't be reached, since handlers are expected to tolerate redelivered messages.
+        self.start(service)
+        try:
+            if not await self.contains(message_uuid, self.handler_name(service, handler)):
+                return False
+        except Exception as e:
+            logging.getLogger("tomodachi.inbox").warning(
+                "Unable to look up message in inbox ({})".format(str(e) or e.__class__.__name__), handler=handler
+            )
+            return False
+
+        increase_execution_context_value("inbox_duplicate_messages")
+        logging.getLogger("tomodachi.inbox").info(
+            "discarded duplicate message", handler=handler, message_uuid=message_uuid
+        )
+        return True
+
+    async def record(self, service: Any, message_uuid: str, handler: str) -> None:
+        try:
+            await self.add(message_uuid, self.handler_name(service, handler))
+        except Exception as e:
+            logging.getLogger("tomodachi.inbox").warning(
+                "Unable to record message in inbox ({})".format(str(e) or e.__class__.__name__), handler=handler
+            )
+
+    def start(self, service: Any) -> None:
+        if self._closing or (self._compaction_task and not self._compaction_task.done()):
+            return
+
+        # started in an empty context instead of the context of the handler of the first received message
+        self._compaction_task = contextvars.Context().run(asyncio.ensure_future, self._compact())
+
+        # the compaction task may be started again if it has ended, while the store is closed only once
+        if self._stop_chained:
+            return
+        self._stop_chained = True
+
+        stop_method = getattr(service, "_stop_service", None)
+
+        async def stop_service(*args: Any, **kwargs: Any) -> None:
+            await self.stop()
+            if stop_method:
+                await stop_method(*args, **kwargs)
+
+        setattr(service, "_stop_service", stop_service)
+
+    async def stop(self) -> None:
+        self._closing = True
+        if self._compaction_task is not None and not self._compaction_task.done():
+            self._compaction_task.cancel()
+            try:
+                await self._compaction_task
+            except (Exception, asyncio.CancelledError):
+                pass
+        await self.store.close()
+
+    async def compact(self) -> int:
+        now = time.time()
+        for key in [key for key, expires_at in self._cache.items() if expires_at <= now]:
+            del self._cache[key]
+
+        removed = await self.store.compact(now)
+        increase_execution_context_value("inbox_compacted_messages", removed)
+        return removed
+
+    async def _compact(self) -> None:
+        while True:
+            try:
+                await self.compact()
+            except Exception as e:
+                logging.getLogger("tomodachi.inbox").warning(
+                    "Unable to compact inbox ({})".format(str(e) or e.__class__.__name__)
+                )
+            await asyncio.sleep(self.compaction_interval)
@@ -0,0 +1,117 @@
+import asyncio
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SQLiteInboxStore(object):
+    # Inbox store in a local SQLite database, which may be shared by the services running on the same host, as the
+    # messages are recorded per service and handler. Messages that are added while a previous write is in progress are
+    # written together in a single transaction.
+    __slots__ = ("path", "table_name", "_connection", "_executor", "_batch")
+
+    def __init__(self, path: str, table_name: str = "tomodachi_inbox") -> None:
+        if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", table_name):
+            raise ValueError("Invalid inbox table name: {}".format(table_name))
+
+        self.path = path
+        self.table_name = table_name
+        self._connection: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._batch: Optional[Tuple[List[Tuple[str, str, float]], asyncio.Future]] = None
+
+    def create_table(self, connection: sqlite3.Connection) -> None:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS {} ("
+            "handler TEXT NOT NULL, "
+            "message_uuid TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, "
+            "PRIMARY KEY (handler, message_uuid)) WITHOUT ROWID".format(self.table_name)
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS {0}_expires_at ON {0} (expires_at)".format(self.table_name))
+
+    async def contains(self, message_uuid: str, handler: str) -> bool:
+        def _contains(connection: sqlite3.Connection) -> bool:
+            row = connection.execute(
+                "SELECT 1 FROM {} WHERE handler = ? AND message_uuid = ? AND expires_at > ?".format(self.table_name),
+                (handler, message_uuid, time.time()),
+            ).fetchone()
+            return row is not None
+
+        return await self._run(_contains)
+
+    async def add(self, message_uuid: str, handler: str, expires_at: float) -> None:
+        if self._batch is None:
+            self._batch = ([], asyncio.get_event_loop().create_future())
+            asyncio.ensure_future(self._write_batch())
+
+        rows, future = self._batch
+        rows.append((handler, message_uuid, expires_at))
+        await asyncio.shield(future)
+
+    async def compact(self, now: float) -> int:
+        def _compact(connection: sqlite3.Connection) -> int:
+            with connection:
+                cursor = connection.execute(
+                    "DELETE FROM {} WHERE expires_at <= ?".format(self.table_name),
+                    (now,),
+                )
+            return cursor.rowcount
+
+        return await self._run(_compact)
+
+    async def close(self) -> None:
+        if self._executor is None:
+            return
+
+        def _close(connection: sqlite3.Connection) -> None:
+            connection.close()
+
+        await self._run(_close)
+        self._connection = None
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    async def _write_batch(self) -> None:
+        if self._batch is None:
+            return
+        rows, future = self._batch
+        self._batch = None
+
+        def _add(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO {} (handler, message_uuid, expires_at) VALUES (?, ?, ?)".format(
+                        self.table_name
+                    ),
+                    rows,
+                )
+
+        try:
+            await self._run(_add)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+        else:
+            future.set_result(None)
+
+    async def _run(self, func: Callable[[sqlite3.Connection], T]) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tomodachi.inbox")
+
+        def _call() -> T:
+            if self._connection is None:
+                connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.execute("PRAGMA busy_timeout=5000")
+                self.create_table(connection)
+                connection.isolation_level = "DEFERRED"
+                self._connection = connection
+            return func(self._connection)
+
+        return await asyncio.get_event_loop().run_in_executor(self._executor, _call)
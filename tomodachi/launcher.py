@@ -4,6 +4,7 @@ import importlib
 import os
 import platform
 import signal
+import subprocess
 import sys
 import traceback
 from typing import Any, Callable, Dict, List, Optional, Set, Union, cast
@@ -33,7 +34,9 @@ class ServiceLauncher(object):
     stop_services_pre_hook: Optional[Callable] = None
     stop_services_post_hook: Optional[Callable] = None
     restart_services = False
+    reload_timeout: float = 60.0
     services: Set = set()
+    _reload_process: Optional[subprocess.Popen] = None
 
     @classmethod
     def stop_services(cls) -> None:
@@ -57,6 +60,89 @@ class ServiceLauncher(object):
         if cls.stop_services_post_hook:
             await cls.stop_services_post_hook()
 
+    @classmethod
+    def reload_services(cls) -> None:
+        asyncio.ensure_future(cls._reload_services())
+
+    @classmethod
+    async def _reload_services(cls) -> None:
+        # Starts a replacement process (using the same arguments) which binds to the same ports (SO_REUSEPORT) and
+        # only once the replacement process has reported that its services have started, the current services are
+        # gracefully stopped - the http transport stops accepting new connections and awaits in-flight requests.
+        logger = logging.getLogger("tomodachi.reload")
+
+        if not cls._close_waiter or cls._close_waiter.done():
+            return
+
+        if cls._reload_process and cls._reload_process.poll() is None:
+            logger.warning("reload already in progress", process_id=os.getpid())
+            return
+
+        run_args = tomodachi.context("run.args")
+        if not run_args:
+            logger.warning("reload not available - service was not started from the cli", process_id=os.getpid())
+            return
+
+        logger.info("reloading services", signal="SIGHUP", process_id=os.getpid())
+
+        loop = asyncio.get_running_loop()
+        read_fd, write_fd = os.pipe()
+        ready_future: asyncio.Future = loop.create_future()
+
+        def _ready_callback() -> None:
+            try:
+                data = os.read(read_fd, 1)
+            except OSError:
+                data = b""
+            if not ready_future.done():
+                ready_future.set_result(bool(data))
+
+        try:
+            process = subprocess.Popen(
+                [sys.executable, "-m", "tomodachi", "run", *run_args],
+                env={**os.environ, "TOMODACHI_READY_FD": str(write_fd)},
+                pass_fds=(write_fd,),
+            )
+        except Exception as e:
+            os.close(read_fd)
+            os.close(write_fd)
+            logger.warning("reload failed - could not start replacement process", error=str(e))
+            return
+
+        os.close(write_fd)
+        cls._reload_process = process
+
+        loop.add_reader(read_fd, _ready_callback)
+        try:
+            ready = await asyncio.wait_for(asyncio.shield(ready_future), timeout=cls.reload_timeout)
+        except asyncio.TimeoutError:
+            ready = False
+        finally:
+            loop.remove_reader(read_fd)
+            os.close(read_fd)
+
+        if not ready:
+            logger.warning("reload failed - replacement process did not start", replacement_process_id=process.pid)
+            if process.poll() is None:
+                process.terminate()
+            return
+
+        logger.info("replacement process started - stopping services", replacement_process_id=process.pid)
+        cls.stop_services()
+
+    @classmethod
+    async def _notify_ready(cls, ready_fd: int) -> None:
+        # Reports back to the process that initiated a reload (or the process supervisor), once all services have
+        # started successfully. Closing the file descriptor without writing is interpreted as a failed start.
+        try:
+            await asyncio.gather(*[service.started_waiter for service in cls.services if service.started_waiter])
+            if cls._close_waiter and not cls._close_waiter.done() and not tomodachi.SERVICE_EXIT_CODE:
+                os.write(ready_fd, b"1")
+        except Exception:
+            pass
+        finally:
+            os.close(ready_fd)
+
     @classmethod
     def run_until_complete(
         cls,
@@ -95,6 +181,18 @@ class ServiceLauncher(object):
         for signame in ("SIGINT", "SIGTERM"):
             loop.add_signal_handler(getattr(signal, signame), cls.stop_services)
 
+        # rolling reloads on SIGHUP - worker processes are instead reloaded by the process supervisor
+        reload_enabled = not watcher and tomodachi.context("run.worker_id") is None
+        if reload_enabled:
+            loop.add_signal_handler(signal.SIGHUP, cls.reload_services)
+
+        ready_fd: Optional[int] = None
+        if os.environ.get("TOMODACHI_READY_FD"):
+            try:
+                ready_fd = int(os.environ.pop("TOMODACHI_READY_FD"))
+            except ValueError:
+                pass
+
         signal.siginterrupt(signal.SIGTERM, False)
         signal.siginterrupt(signal.SIGUSR1, False)
         signal.signal(signal.SIGINT, sigintHandler)
@@ -245,6 +343,14 @@ class ServiceLauncher(object):
                 }
             )
 
+            worker_id = tomodachi.context("run.worker_id")
+            if worker_id is not None:
+                set_execution_context(
+                    {
+                        "worker_id": worker_id,
+                    }
+                )
+
             if event_loop_version:
                 set_execution_context(
                     {
@@ -283,9 +389,22 @@ class ServiceLauncher(object):
                 )
 
                 async def _run_until_complete() -> Any:
-                    return await asyncio.wait(
-                        [asyncio.ensure_future(service.run_until_complete()) for service in cls.services]
-                    )
+                    nonlocal ready_fd
+                    ready_task = None
+                    if ready_fd is not None:
+                        for service in cls.services:
+                            service.started_waiter = asyncio.Future()
+                        ready_task = asyncio.ensure_future(cls._notify_ready(ready_fd))
+                        ready_fd = None
+
+                    try:
+                        return await asyncio.wait(
+                            [asyncio.ensure_future(service.run_until_complete()) for service in cls.services]
+                        )
+                    finally:
+                        if ready_task and not ready_task.done():
+                            ready_task.cancel()
+                            await asyncio.wait([ready_task])
 
                 result = loop.run_until_complete(_run_until_complete())
                 exception = [v.exception() for v in [value for value in result if value][0] if v.exception()]
@@ -371,6 +490,9 @@ class ServiceLauncher(object):
 
             restarting = True
 
+        if reload_enabled and not loop.is_closed():
+            loop.remove_signal_handler(signal.SIGHUP)
+
         if watcher:
             if watcher_future and not watcher_future.done():
                 try:
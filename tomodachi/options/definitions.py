@@ -12,7 +12,44 @@ def DEFAULT(cls: Type[T]) -> T:
     return cast(T, type("DEFAULT", (type(cls),), {"_default": True}))
 
 
+class _HTTP_Client(OptionsInterface):
+    limit: int
+    limit_per_host: int
+    keepalive_timeout: float
+    dns_cache_ttl: Optional[int]
+    connect_timeout: Optional[float]
+    read_timeout: Optional[float]
+    total_timeout: Optional[float]
+
+    _hierarchy: Tuple[str, ...] = ("http", "client")
+
+    def __init__(
+        self,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 15.0,
+        dns_cache_ttl: Optional[int] = 10,
+        connect_timeout: Optional[float] = 8.0,
+        read_timeout: Optional[float] = 35.0,
+        total_timeout: Optional[float] = None,
+        **kwargs: Any,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+
+        self._load_keyword_options(**kwargs)
+
+
 class _HTTP(OptionsInterface):
+    class Client(_HTTP_Client):
+        pass
+
     port: int
     host: Optional[str]
     reuse_port: bool
@@ -21,6 +58,9 @@ class _HTTP(OptionsInterface):
     client_max_size: Union[str, int]
     termination_grace_period_seconds: int
     access_log: Union[bool, str]
+    access_log_sample_rate: float
+    access_log_slow_request_threshold: Optional[float]
+    access_log_summary_interval: Optional[float]
     real_ip_from: Union[str, List[str]]
     real_ip_header: str
     keepalive_timeout: int
@@ -28,6 +68,11 @@ class _HTTP(OptionsInterface):
     max_keepalive_time: Optional[int]
     max_keepalive_requests: Optional[int]
     server_header: str
+    max_concurrent_requests: Optional[int]
+    max_queued_requests: int
+    max_queue_time: Optional[float]
+    overload_retry_after: int
+    client: Client
 
     _hierarchy: Tuple[str, ...] = ("http",)
     _legacy_fallback: Dict[str, Union[str, Tuple[str, ...]]] = {
@@ -46,6 +91,9 @@ class _HTTP(OptionsInterface):
         client_max_size: Union[str, int] = (1024**2) * 100,
         termination_grace_period_seconds: int = 30,
         access_log: Union[bool, str] = True,
+        access_log_sample_rate: float = 1.0,
+        access_log_slow_request_threshold: Optional[float] = None,
+        access_log_summary_interval: Optional[float] = None,
         real_ip_from: Optional[Union[str, List[str]]] = None,
         real_ip_header: str = "X-Forwarded-For",
         keepalive_timeout: int = 0,
@@ -53,6 +101,11 @@ class _HTTP(OptionsInterface):
         max_keepalive_time: Optional[int] = None,
         max_keepalive_requests: Optional[int] = None,
         server_header: str = "tomodachi",
+        max_concurrent_requests: Optional[int] = None,
+        max_queued_requests: int = 0,
+        max_queue_time: Optional[float] = 1.0,
+        overload_retry_after: int = 1,
+        client: Union[Mapping[str, Any], Client] = DEFAULT(Client),
         **kwargs: Any,
     ):
         self.port = port
@@ -63,6 +116,9 @@ class _HTTP(OptionsInterface):
         self.client_max_size = client_max_size
         self.termination_grace_period_seconds = termination_grace_period_seconds
         self.access_log = access_log
+        self.access_log_sample_rate = access_log_sample_rate
+        self.access_log_slow_request_threshold = access_log_slow_request_threshold
+        self.access_log_summary_interval = access_log_summary_interval
         self.real_ip_from = real_ip_from if real_ip_from is not None and real_ip_from != "" else []
         self.real_ip_header = real_ip_header
         self.keepalive_timeout = keepalive_timeout
@@ -70,7 +126,15 @@ class _HTTP(OptionsInterface):
         self.max_keepalive_time = max_keepalive_time
         self.max_keepalive_requests = max_keepalive_requests
         self.server_header = server_header
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_queued_requests = max_queued_requests
+        self.max_queue_time = max_queue_time
+        self.overload_retry_after = overload_retry_after
 
+        input_: Tuple[Tuple[str, Union[Mapping[str, Any], OptionsInterface], type], ...] = (
+            ("client", client, self.Client),
+        )
+        self._load_initial_input(input_)
         self._load_keyword_options(**kwargs)
 
 
@@ -85,6 +149,12 @@ class _AWSSNSSQS(OptionsInterface):
     sqs_kms_data_key_reuse_period: Optional[int]
     queue_policy: Optional[str]
     wildcard_queue_policy: Optional[str]
+    spool_directory: Optional[str]
+    spool_fsync: str
+    spool_segment_size: int
+    publish_rate_limit: Optional[float]
+    publish_rate_limit_burst: Optional[int]
+    publish_rate_limits: Optional[Dict[str, float]]
 
     _hierarchy: Tuple[str, ...] = ("aws_sns_sqs",)
     _legacy_fallback: Dict[str, Union[str, Tuple[str, ...]]] = {
@@ -121,6 +191,12 @@ class _AWSSNSSQS(OptionsInterface):
         sqs_kms_data_key_reuse_period: Optional[int] = None,
         queue_policy: Optional[str] = None,
         wildcard_queue_policy: Optional[str] = None,
+        spool_directory: Optional[str] = None,
+        spool_fsync: str = "interval",
+        spool_segment_size: int = 16777216,
+        publish_rate_limit: Optional[float] = None,
+        publish_rate_limit_burst: Optional[int] = None,
+        publish_rate_limits: Optional[Dict[str, float]] = None,
         **kwargs: Any,
     ):
         self.region_name = region_name
@@ -133,6 +209,12 @@ class _AWSSNSSQS(OptionsInterface):
         self.sqs_kms_data_key_reuse_period = sqs_kms_data_key_reuse_period
         self.queue_policy = queue_policy
         self.wildcard_queue_policy = wildcard_queue_policy
+        self.spool_directory = spool_directory
+        self.spool_fsync = spool_fsync
+        self.spool_segment_size = spool_segment_size
+        self.publish_rate_limit = publish_rate_limit
+        self.publish_rate_limit_burst = publish_rate_limit_burst
+        self.publish_rate_limits = publish_rate_limits
 
         self._load_keyword_options(**kwargs)
 
@@ -159,6 +241,11 @@ class _AWSEndpointURLs(OptionsInterface):
 class _AMQP_QOS(OptionsInterface):
     queue_prefetch_count: int
     global_prefetch_count: int
+    adaptive: bool
+    min_prefetch_count: int
+    max_prefetch_count: int
+    latency_tolerance: float
+    adjust_interval: float
 
     _hierarchy: Tuple[str, ...] = ("amqp", "qos")
 
@@ -167,10 +254,20 @@ class _AMQP_QOS(OptionsInterface):
         *,
         queue_prefetch_count: int = 100,
         global_prefetch_count: int = 400,
+        adaptive: bool = False,
+        min_prefetch_count: int = 10,
+        max_prefetch_count: int = 1000,
+        latency_tolerance: float = 1.5,
+        adjust_interval: float = 5.0,
         **kwargs: Any,
     ):
         self.queue_prefetch_count = queue_prefetch_count
         self.global_prefetch_count = global_prefetch_count
+        self.adaptive = adaptive
+        self.min_prefetch_count = min_prefetch_count
+        self.max_prefetch_count = max_prefetch_count
+        self.latency_tolerance = latency_tolerance
+        self.adjust_interval = adjust_interval
 
         self._load_keyword_options(**kwargs)
 
@@ -190,6 +287,19 @@ class _AMQP(OptionsInterface):
     ssl: bool
     heartbeat: int
     queue_ttl: int
+    publish_channel_count: int
+    publisher_confirms: bool
+    max_unconfirmed_messages: int
+    spool_directory: Optional[str]
+    spool_fsync: str
+    spool_segment_size: int
+    publish_rate_limit: Optional[float]
+    publish_rate_limit_burst: Optional[int]
+    publish_rate_limits: Optional[Dict[str, float]]
+    subscriptions_per_channel: int
+    coalesce_acks: bool
+    ack_flush_interval: float
+    ack_flush_threshold: int
     qos: QOS
 
     _hierarchy: Tuple[str, ...] = ("amqp",)
@@ -208,6 +318,19 @@ class _AMQP(OptionsInterface):
         ssl: bool = False,
         heartbeat: int = 60,
         queue_ttl: int = 86400,
+        publish_channel_count: int = 2,
+        publisher_confirms: bool = False,
+        max_unconfirmed_messages: int = 1000,
+        spool_directory: Optional[str] = None,
+        spool_fsync: str = "interval",
+        spool_segment_size: int = 16777216,
+        publish_rate_limit: Optional[float] = None,
+        publish_rate_limit_burst: Optional[int] = None,
+        publish_rate_limits: Optional[Dict[str, float]] = None,
+        subscriptions_per_channel: int = 1,
+        coalesce_acks: bool = False,
+        ack_flush_interval: float = 0.1,
+        ack_flush_threshold: int = 50,
         qos: Union[Mapping[str, Any], QOS] = DEFAULT(QOS),
         **kwargs: Any,
     ):
@@ -222,6 +345,19 @@ class _AMQP(OptionsInterface):
         self.ssl = ssl
         self.heartbeat = heartbeat
         self.queue_ttl = queue_ttl
+        self.publish_channel_count = publish_channel_count
+        self.publisher_confirms = publisher_confirms
+        self.max_unconfirmed_messages = max_unconfirmed_messages
+        self.spool_directory = spool_directory
+        self.spool_fsync = spool_fsync
+        self.spool_segment_size = spool_segment_size
+        self.publish_rate_limit = publish_rate_limit
+        self.publish_rate_limit_burst = publish_rate_limit_burst
+        self.publish_rate_limits = publish_rate_limits
+        self.subscriptions_per_channel = subscriptions_per_channel
+        self.coalesce_acks = coalesce_acks
+        self.ack_flush_interval = ack_flush_interval
+        self.ack_flush_threshold = ack_flush_threshold
 
         input_: Tuple[Tuple[str, Union[Mapping[str, Any], OptionsInterface], type], ...] = (("qos", qos, self.QOS),)
         self._load_initial_input(input_)
@@ -250,7 +386,8 @@ class _Watcher(OptionsInterface):
 
 class Options(OptionsInterface):
     class HTTP(_HTTP):
-        pass
+        class Client(_HTTP_Client):
+            pass
 
     class AWSSNSSQS(_AWSSNSSQS):
         pass
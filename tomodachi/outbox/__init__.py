@@ -0,0 +1,35 @@
+from typing import Any, Dict
+
+__cached_defs: Dict[str, Any] = {}
+
+
+def __getattr__(name: str) -> Any:
+    if name in __cached_defs:
+        return __cached_defs[name]
+
+    import importlib  # noqa  # isort:skip
+
+    result: Any
+    if name in ("Outbox", "OutboxMessage", "OutboxStore"):
+        module = importlib.import_module(".outbox", "tomodachi.outbox")
+        result = getattr(module, name)
+    elif name in ("SQLiteOutboxStore",):
+        module = importlib.import_module(".sqlite", "tomodachi.outbox")
+        result = getattr(module, name)
+    elif name in ("outbox", "sqlite"):
+        result = importlib.import_module(".{}".format(name), "tomodachi.outbox")
+    else:
+        raise AttributeError("module 'tomodachi.outbox' has no attribute '{}'".format(name))
+
+    __cached_defs[name] = result
+    return __cached_defs[name]
+
+
+__all__ = [
+    "Outbox",
+    "OutboxMessage",
+    "OutboxStore",
+    "SQLiteOutboxStore",
+    "outbox",
+    "sqlite",
+]
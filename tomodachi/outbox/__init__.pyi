@@ -0,0 +1,15 @@
+from tomodachi.outbox import outbox as outbox
+from tomodachi.outbox import sqlite as sqlite
+from tomodachi.outbox.outbox import Outbox as Outbox
+from tomodachi.outbox.outbox import OutboxMessage as OutboxMessage
+from tomodachi.outbox.outbox import OutboxStore as OutboxStore
+from tomodachi.outbox.sqlite import SQLiteOutboxStore as SQLiteOutboxStore
+
+__all__ = [
+    "Outbox",
+    "OutboxMessage",
+    "OutboxStore",
+    "SQLiteOutboxStore",
+    "outbox",
+    "sqlite",
+]
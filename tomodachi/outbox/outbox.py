@@ -0,0 +1,243 @@
+import asyncio
+import contextvars
+import dataclasses
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Protocol, Sequence, cast
+
+from tomodachi import logging
+from tomodachi.helpers.execution_context import increase_execution_context_value
+
+AWS_SNS_SQS_PUBLISH = "aws_sns_sqs_publish"
+SQS_SEND_MESSAGE = "sqs_send_message"
+AMQP_PUBLISH = "amqp_publish"
+
+
+@dataclasses.dataclass(frozen=True)
+class OutboxMessage:
+    transport: str
+    destination: str
+    data: Any
+    options: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    key: Optional[str] = None
+    id: Optional[int] = None
+    created_at: float = dataclasses.field(default_factory=time.time)
+
+
+class OutboxStore(Protocol):
+    # Messages are claimed by a relay for the duration of the lease, in the order they were added. A message isn't
+    # claimed while an earlier unpublished message with the same key is claimed by another relay.
+    async def add(self, messages: Sequence[OutboxMessage], connection: Any = None) -> None: ...
+
+    async def claim(self, relay_id: str, limit: int, lease: float) -> List[OutboxMessage]: ...
+
+    async def mark_published(self, relay_id: str, ids: Sequence[int]) -> int: ...
+
+    async def release(self, relay_id: str, ids: Sequence[int]) -> None: ...
+
+    async def purge(self, published_before: float) -> int: ...
+
+    async def close(self) -> None: ...
+
+
+class Outbox(object):
+    # Messages are written to the outbox store (optionally as part of the caller's own database transaction) instead of
+    # being published inline. A background relay task claims the stored messages in batches and publishes them with
+    # the AWS SNS+SQS and AMQP transports. Messages with the same key are published one at a time in the order they
+    # were added, while messages with different keys are published concurrently. A message is marked as published
+    # once, by the relay holding its claim - a message may be published again if the relay stops between publishing
+    # and marking the message.
+    __slots__ = (
+        "store",
+        "batch_size",
+        "poll_interval",
+        "lease",
+        "retention",
+        "relay_id",
+        "_service",
+        "_relay_task",
+        "_stop_chained",
+        "_wakeup",
+        "_closing",
+        "_purged_at",
+    )
+
+    def __init__(
+        self,
+        store: OutboxStore,
+        *,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        lease: float = 60.0,
+        retention: float = 86400.0,
+    ) -> None:
+        self.store = store
+        self.batch_size = max(batch_size, 1)
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.retention = retention
+        self.relay_id = str(uuid.uuid4())
+        self._service: Any = None
+        self._relay_task: Optional[asyncio.Future] = None
+        self._stop_chained = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+        self._purged_at = 0.0
+
+    async def aws_sns_sqs_publish(
+        self, service: Any, data: Any, topic: str, *, key: Optional[str] = None, connection: Any = None, **kwargs: Any
+    ) -> None:
+        await self.add(service, OutboxMessage(AWS_SNS_SQS_PUBLISH, topic, data, kwargs, key), connection=connection)
+
+    async def sqs_send_message(
+        self,
+        service: Any,
+        data: Any,
+        queue_name: str,
+        *,
+        key: Optional[str] = None,
+        connection: Any = None,
+        **kwargs: Any,
+    ) -> None:
+        await self.add(service, OutboxMessage(SQS_SEND_MESSAGE, queue_name, data, kwargs, key), connection=connection)
+
+    async def amqp_publish(
+        self,
+        service: Any,
+        data: Any,
+        routing_key: str,
+        *,
+        key: Optional[str] = None,
+        connection: Any = None,
+        **kwargs: Any,
+    ) -> None:
+        await self.add(service, OutboxMessage(AMQP_PUBLISH, routing_key, data, kwargs, key), connection=connection)
+
+    async def add(self, service: Any, *messages: OutboxMessage, connection: Any = None) -> None:
+        await self.store.add(messages, connection=connection)
+        increase_execution_context_value("outbox_added_messages", len(messages))
+        self.start(service)
+        if self._wakeup and connection is None:
+            self._wakeup.set()
+
+    def start(self, service: Any) -> None:
+        if self._closing or (self._relay_task and not self._relay_task.done()):
+            return
+
+        self._service = service
+        self._wakeup = asyncio.Event()
+        # the relay task is started in an empty context, since it would otherwise keep the context of the first caller
+        # (such as its deadline) and pass it on to every message that it relays
+        self._relay_task = contextvars.Context().run(asyncio.ensure_future, self._relay())
+
+        # the relay task may be started again if it has ended, while the store is closed only once
+        if self._stop_chained:
+            return
+        self._stop_chained = True
+
+        stop_method = getattr(service, "_stop_service", None)
+
+        async def stop_service(*args: Any, **kwargs: Any) -> None:
+            await self.stop()
+            if stop_method:
+                await stop_method(*args, **kwargs)
+
+        setattr(service, "_stop_service", stop_service)
+
+    async def stop(self) -> None:
+        self._closing = True
+        if self._wakeup:
+            self._wakeup.set()
+        if self._relay_task:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._relay_task), timeout=10)
+            except (Exception, asyncio.CancelledError):
+                self._relay_task.cancel()
+            self._relay_task = None
+        await self.store.close()
+
+    async def relay_batch(self, service: Any) -> int:
+        messages = await self.store.claim(self.relay_id, self.batch_size, self.lease)
+        if not messages:
+            return 0
+
+        groups: Dict[Any, List[OutboxMessage]] = {}
+        for message in messages:
+            groups.setdefault(message.key if message.key is not None else ("", message.id), []).append(message)
+
+        published: List[int] = []
+        unpublished: List[int] = []
+
+        async def _publish_group(group: List[OutboxMessage]) -> None:
+            for index, message in enumerate(group):
+                try:
+                    await self.publish(service, message)
+                except Exception as e:
+                    # later messages with the same key are kept in the outbox to be published after this message
+                    increase_execution_context_value("outbox_publish_failures")
+                    logging.getLogger("tomodachi.outbox").warning(
+                        "Unable to publish outbox message ({})".format(str(e) or e.__class__.__name__),
+                        transport=message.transport,
+                        destination=message.destination,
+                    )
+                    unpublished.extend([cast(int, m.id) for m in group[index:]])
+                    return
+                published.append(cast(int, message.id))
+
+        await asyncio.gather(*[_publish_group(group) for group in groups.values()])
+
+        if published:
+            marked = await self.store.mark_published(self.relay_id, published)
+            increase_execution_context_value("outbox_published_messages", marked)
+        if unpublished:
+            await self.store.release(self.relay_id, unpublished)
+
+        return len(messages)
+
+    @staticmethod
+    async def publish(service: Any, message: OutboxMessage) -> None:
+        if message.transport == AWS_SNS_SQS_PUBLISH:
+            from tomodachi.transport.aws_sns_sqs import AWSSNSSQSTransport  # noqa  # isort:skip
+
+            await AWSSNSSQSTransport.publish(service, message.data, message.destination, wait=True, **message.options)
+        elif message.transport == SQS_SEND_MESSAGE:
+            from tomodachi.transport.aws_sns_sqs import AWSSNSSQSTransport  # noqa  # isort:skip
+
+            await AWSSNSSQSTransport.send_message(
+                service, message.data, message.destination, wait=True, **message.options
+            )
+        elif message.transport == AMQP_PUBLISH:
+            from tomodachi.transport.amqp import AmqpTransport  # noqa  # isort:skip
+
+            await AmqpTransport.publish(service, message.data, message.destination, wait=True, **message.options)
+        else:
+            raise ValueError("Invalid outbox transport: {}".format(message.transport))
+
+    async def _relay(self) -> None:
+        attempt = 0
+        while True:
+            closing = self._closing
+            try:
+                claimed = await self.relay_batch(self._service)
+                attempt = 0
+                if self.retention > 0 and time.time() - self._purged_at >= 60:
+                    self._purged_at = time.time()
+                    await self.store.purge(time.time() - self.retention)
+            except Exception as e:
+                attempt += 1
+                claimed = 0
+                logging.getLogger("tomodachi.outbox").warning(
+                    "Unable to relay outbox messages ({})".format(str(e) or e.__class__.__name__), attempt=attempt
+                )
+                await asyncio.sleep(min(0.5 * 2 ** (attempt - 1), 30.0))
+
+            if closing:
+                # a last batch is relayed once the service has started to stop
+                return
+
+            if claimed < self.batch_size and self._wakeup:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
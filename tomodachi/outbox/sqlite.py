@@ -0,0 +1,188 @@
+import asyncio
+import json
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+from tomodachi.outbox.outbox import OutboxMessage
+
+T = TypeVar("T")
+
+
+class SQLiteOutboxStore(object):
+    # Outbox store in a SQLite database. The store's own connection is used from a dedicated thread, while a connection
+    # to the same database passed to add() is used as is and the messages are committed as part of the caller's
+    # transaction. Message data and publish options are stored as JSON.
+    __slots__ = ("path", "table_name", "_connection", "_executor", "_table_created")
+
+    def __init__(self, path: str, table_name: str = "tomodachi_outbox") -> None:
+        if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", table_name):
+            raise ValueError("Invalid outbox table name: {}".format(table_name))
+
+        self.path = path
+        self.table_name = table_name
+        self._connection: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._table_created = False
+
+    def create_table(self, connection: sqlite3.Connection) -> None:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS {} ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "transport TEXT NOT NULL, "
+            "destination TEXT NOT NULL, "
+            "data TEXT NOT NULL, "
+            "options TEXT NOT NULL, "
+            "ordering_key TEXT, "
+            "created_at REAL NOT NULL, "
+            "claimed_by TEXT, "
+            "claimed_until REAL, "
+            "published_at REAL)".format(self.table_name)
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS {0}_pending ON {0} (published_at, id)".format(self.table_name))
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS {0}_ordering_key ON {0} (ordering_key, published_at)".format(self.table_name)
+        )
+        self._table_created = True
+
+    async def add(self, messages: Sequence[OutboxMessage], connection: Any = None) -> None:
+        rows = [
+            (
+                message.transport,
+                message.destination,
+                json.dumps(message.data),
+                json.dumps(message.options),
+                message.key,
+                message.created_at,
+            )
+            for message in messages
+        ]
+        query = (
+            "INSERT INTO {} (transport, destination, data, options, ordering_key, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)".format(self.table_name)
+        )
+
+        if connection is not None:
+            # committed (or rolled back) together with the caller's other changes
+            if not self._table_created:
+                self.create_table(connection)
+            connection.executemany(query, rows)
+            return
+
+        def _add(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(query, rows)
+
+        await self._run(_add)
+
+    async def claim(self, relay_id: str, limit: int, lease: float) -> List[OutboxMessage]:
+        def _claim(connection: sqlite3.Connection) -> List[OutboxMessage]:
+            now = time.time()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = connection.execute(
+                    "SELECT id, transport, destination, data, options, ordering_key, created_at FROM {0} o "
+                    "WHERE o.published_at IS NULL AND (o.claimed_until IS NULL OR o.claimed_until < ?) "
+                    "AND (o.ordering_key IS NULL OR NOT EXISTS ("
+                    "SELECT 1 FROM {0} p WHERE p.ordering_key = o.ordering_key AND p.published_at IS NULL "
+                    "AND p.id < o.id AND p.claimed_until >= ?)) "
+                    "ORDER BY o.id LIMIT ?".format(self.table_name),
+                    (now, now, limit),
+                ).fetchall()
+                connection.executemany(
+                    "UPDATE {} SET claimed_by = ?, claimed_until = ? WHERE id = ?".format(self.table_name),
+                    [(relay_id, now + lease, row[0]) for row in rows],
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+            return [
+                OutboxMessage(
+                    transport=transport,
+                    destination=destination,
+                    data=json.loads(data),
+                    options=json.loads(options),
+                    key=ordering_key,
+                    id=id_,
+                    created_at=created_at,
+                )
+                for id_, transport, destination, data, options, ordering_key, created_at in rows
+            ]
+
+        return await self._run(_claim)
+
+    async def mark_published(self, relay_id: str, ids: Sequence[int]) -> int:
+        def _mark_published(connection: sqlite3.Connection) -> int:
+            now = time.time()
+            with connection:
+                cursor = connection.executemany(
+                    "UPDATE {} SET published_at = ?, claimed_until = NULL "
+                    "WHERE id = ? AND claimed_by = ? AND published_at IS NULL".format(self.table_name),
+                    [(now, id_, relay_id) for id_ in ids],
+                )
+            return cursor.rowcount
+
+        return await self._run(_mark_published)
+
+    async def release(self, relay_id: str, ids: Sequence[int]) -> None:
+        def _release(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(
+                    "UPDATE {} SET claimed_by = NULL, claimed_until = NULL "
+                    "WHERE id = ? AND claimed_by = ? AND published_at IS NULL".format(self.table_name),
+                    [(id_, relay_id) for id_ in ids],
+                )
+
+        await self._run(_release)
+
+    async def purge(self, published_before: float) -> int:
+        def _purge(connection: sqlite3.Connection) -> int:
+            with connection:
+                cursor = connection.execute(
+                    "DELETE FROM {} WHERE published_at IS NOT NULL AND published_at < ?".format(self.table_name),
+                    (published_before,),
+                )
+            return cursor.rowcount
+
+        return await self._run(_purge)
+
+    async def pending(self) -> int:
+        def _pending(connection: sqlite3.Connection) -> int:
+            row = connection.execute(
+                "SELECT COUNT(*) FROM {} WHERE published_at IS NULL".format(self.table_name)
+            ).fetchone()
+            return int(row[0])
+
+        return await self._run(_pending)
+
+    async def close(self) -> None:
+        if self._executor is None:
+            return
+
+        def _close(connection: sqlite3.Connection) -> None:
+            connection.close()
+
+        await self._run(_close)
+        self._connection = None
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    async def _run(self, func: Callable[[sqlite3.Connection], T]) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tomodachi.outbox")
+
+        def _call() -> T:
+            if self._connection is None:
+                connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA busy_timeout=5000")
+                self.create_table(connection)
+                connection.isolation_level = "DEFERRED"
+                self._connection = connection
+            return func(self._connection)
+
+        return await asyncio.get_event_loop().run_in_executor(self._executor, _call)
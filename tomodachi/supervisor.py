@@ -0,0 +1,310 @@
+import os
+import select
+import signal
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import tomodachi
+from tomodachi import logging
+
+
+class WorkerProcess(object):
+    __slots__ = ("worker_id", "pid", "start_time", "replaces", "ready_fd")
+
+    def __init__(
+        self, worker_id: int, pid: int, replaces: Optional[int] = None, ready_fd: Optional[int] = None
+    ) -> None:
+        self.worker_id = worker_id
+        self.pid = pid
+        self.start_time = time.monotonic()
+        self.replaces = replaces
+        self.ready_fd = ready_fd
+
+
+class ProcessSupervisor(object):
+    restart_delay: float = 1.0
+    max_restart_delay: float = 30.0
+    min_uptime: float = 5.0
+    max_failed_starts: int = 5
+    poll_interval: float = 0.1
+    reload_timeout: float = 60.0
+
+    def __init__(self, workers: int) -> None:
+        if workers < 1:
+            raise ValueError("Invalid number of worker processes: {}".format(workers))
+
+        self.workers = workers
+        self.worker_processes: Dict[int, WorkerProcess] = {}
+        self.replacement_processes: Dict[int, WorkerProcess] = {}
+        self.retiring_processes: Set[int] = set()
+        self.pending_restarts: Dict[int, float] = {}
+        self.failed_starts: Dict[int, int] = {}
+        self.received_signals: List[int] = []
+        self.stopping = False
+        self.exit_code = 0
+        self.logger = logging.getLogger("tomodachi.supervisor")
+
+    def run(self) -> Optional[int]:
+        # Returns None within forked worker processes, which should continue to start the services.
+        # The supervising process returns the exit code once all of its worker processes have terminated.
+        for worker_id in range(self.workers):
+            if self.spawn_worker(worker_id):
+                return None
+
+        previous_handlers = {
+            signum: signal.signal(signum, self._signal_handler)
+            for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP)
+        }
+
+        try:
+            while self.worker_processes or self.replacement_processes or self.pending_restarts:
+                if self._process_received_signals():
+                    return None
+                self.reap_workers()
+                self.check_replacements()
+
+                current_time = time.monotonic()
+                for worker_id, restart_at in list(self.pending_restarts.items()):
+                    if restart_at > current_time:
+                        continue
+                    self.pending_restarts.pop(worker_id, None)
+                    if self.spawn_worker(worker_id):
+                        return None
+
+                time.sleep(self.poll_interval)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        self.logger.info("worker processes terminated", exit_code=self.exit_code)
+        return self.exit_code
+
+    def spawn_worker(self, worker_id: int, replaces: Optional[int] = None) -> bool:
+        # Replacement worker processes report back on a pipe once their services have started.
+        read_fd: Optional[int] = None
+        write_fd: Optional[int] = None
+        if replaces is not None:
+            read_fd, write_fd = os.pipe()
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, signal.SIG_DFL)
+            for worker in self.replacement_processes.values():
+                if worker.ready_fd is not None:
+                    os.close(worker.ready_fd)
+            if read_fd is not None:
+                os.close(read_fd)
+                os.environ["TOMODACHI_READY_FD"] = str(write_fd)
+            tomodachi.get_contextvar("run.worker_id").set(worker_id)
+            return True
+
+        if write_fd is not None:
+            os.close(write_fd)
+            self.replacement_processes[pid] = WorkerProcess(worker_id, pid, replaces=replaces, ready_fd=read_fd)
+            self.logger.info(
+                "started replacement worker process",
+                worker_id=worker_id,
+                worker_process_id=pid,
+                replaced_worker_process_id=replaces,
+            )
+            return False
+
+        self.worker_processes[pid] = WorkerProcess(worker_id, pid)
+        self.logger.info("started worker process", worker_id=worker_id, worker_process_id=pid)
+        return False
+
+    def reload_workers(self) -> bool:
+        # Rolling reload - each worker process is replaced by a newly forked worker process, which binds to the same
+        # ports (SO_REUSEPORT). The previous worker process is gracefully stopped when its replacement has started.
+        if self.stopping:
+            return False
+
+        if self.replacement_processes:
+            self.logger.warning("reload already in progress")
+            return False
+
+        self.logger.info("reloading worker processes", signal="SIGHUP")
+        for worker in sorted(self.worker_processes.values(), key=lambda w: w.worker_id):
+            if worker.pid in self.retiring_processes:
+                continue
+            if self.spawn_worker(worker.worker_id, replaces=worker.pid):
+                return True
+
+        return False
+
+    def check_replacements(self) -> None:
+        if not self.replacement_processes:
+            return
+
+        ready_fds = {
+            worker.ready_fd: worker for worker in self.replacement_processes.values() if worker.ready_fd is not None
+        }
+        try:
+            readable_fds, _, _ = select.select(list(ready_fds.keys()), [], [], 0)
+        except InterruptedError:  # pragma: no cover
+            return
+
+        current_time = time.monotonic()
+        for fd, worker in ready_fds.items():
+            if fd in readable_fds:
+                try:
+                    ready = bool(os.read(fd, 1))
+                except OSError:
+                    ready = False
+            elif worker.start_time + self.reload_timeout < current_time:
+                ready = False
+            else:
+                continue
+
+            os.close(fd)
+            worker.ready_fd = None
+            self.replacement_processes.pop(worker.pid, None)
+            self.worker_processes[worker.pid] = worker
+
+            if not ready:
+                self.logger.warning(
+                    "replacement worker process did not start - keeping previous worker process",
+                    worker_id=worker.worker_id,
+                    worker_process_id=worker.pid,
+                )
+                self.retire_worker(worker.pid)
+                continue
+
+            self.logger.info(
+                "replacement worker process started - stopping previous worker process",
+                worker_id=worker.worker_id,
+                worker_process_id=worker.pid,
+                replaced_worker_process_id=worker.replaces,
+            )
+            if worker.replaces is not None:
+                self.retire_worker(worker.replaces)
+
+    def retire_worker(self, pid: int) -> None:
+        # Retired worker processes are gracefully stopped and will not be restarted.
+        self.retiring_processes.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def reap_workers(self) -> None:
+        while self.worker_processes or self.replacement_processes:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.worker_processes.clear()
+                return
+            if not pid:
+                return
+
+            exit_code = self.get_exit_code(status)
+
+            replacement = self.replacement_processes.pop(pid, None)
+            if replacement:
+                if replacement.ready_fd is not None:
+                    os.close(replacement.ready_fd)
+                if self.stopping:
+                    continue
+                self.logger.warning(
+                    "replacement worker process exited before it was started - keeping previous worker process",
+                    worker_id=replacement.worker_id,
+                    worker_process_id=pid,
+                    exit_code=exit_code,
+                )
+                continue
+
+            worker = self.worker_processes.pop(pid, None)
+            if not worker:
+                continue
+
+            uptime = time.monotonic() - worker.start_time
+
+            if pid in self.retiring_processes:
+                self.retiring_processes.discard(pid)
+                self.logger.info(
+                    "worker process exited", worker_id=worker.worker_id, worker_process_id=pid, exit_code=exit_code
+                )
+                continue
+
+            if self.stopping or not exit_code:
+                if exit_code:
+                    self.exit_code = exit_code
+                self.logger.info(
+                    "worker process exited", worker_id=worker.worker_id, worker_process_id=pid, exit_code=exit_code
+                )
+                continue
+
+            if uptime >= self.min_uptime:
+                self.failed_starts[worker.worker_id] = 0
+            self.failed_starts[worker.worker_id] = self.failed_starts.get(worker.worker_id, 0) + 1
+
+            if self.failed_starts[worker.worker_id] > self.max_failed_starts:
+                self.logger.error(
+                    "worker process keeps failing - stopping all worker processes",
+                    worker_id=worker.worker_id,
+                    worker_process_id=pid,
+                    exit_code=exit_code,
+                )
+                self.exit_code = exit_code
+                self.stop(signal.SIGTERM)
+                continue
+
+            restart_delay = min(
+                self.restart_delay * (2 ** (self.failed_starts[worker.worker_id] - 1)), self.max_restart_delay
+            )
+            self.logger.warning(
+                "worker process crashed - restarting",
+                worker_id=worker.worker_id,
+                worker_process_id=pid,
+                exit_code=exit_code,
+                restart_delay="{0:.1f}s".format(restart_delay),
+            )
+            self.pending_restarts[worker.worker_id] = time.monotonic() + restart_delay
+
+    def stop(self, signum: int) -> None:
+        if not self.stopping:
+            self.logger.info("stopping worker processes", signal=signal.Signals(signum).name)
+        self.stopping = True
+        self.pending_restarts.clear()
+        self.signal_workers(signum)
+
+    def signal_workers(self, signum: int) -> None:
+        for pid in list(self.worker_processes.keys()) + list(self.replacement_processes.keys()):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    @staticmethod
+    def get_exit_code(status: int) -> int:
+        if os.WIFSIGNALED(status):
+            return 128 + os.WTERMSIG(status)
+        if os.WIFEXITED(status):
+            return os.WEXITSTATUS(status)
+        return 1
+
+    def _signal_handler(self, signum: int, *args: Any) -> None:
+        # forward signals immediately - logging and bookkeeping is done from the supervisor loop
+        self.received_signals.append(signum)
+        if signum == signal.SIGHUP:
+            return
+        self.stopping = True
+        self.signal_workers(signum)
+
+    def _process_received_signals(self) -> bool:
+        # Returns True within worker processes forked during a reload.
+        while self.received_signals:
+            signum = self.received_signals.pop(0)
+            if signum == signal.SIGHUP:
+                if self.reload_workers():
+                    return True
+                continue
+            self.logger.info("forwarded signal to worker processes", signal=signal.Signals(signum).name)
+            self.pending_restarts.clear()
+        return False
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import binascii
+import bisect
 import functools
 import hashlib
 import inspect
@@ -11,15 +12,28 @@ from typing import Any, Callable, Dict, List, Literal, Match, Optional, Set, Tup
 
 import aioamqp
 import aioamqp.properties
+import aioamqp.protocol
 
 from tomodachi import get_contextvar, logging
 from tomodachi._exception import limit_exception_traceback
+from tomodachi.helpers.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, get_circuit_breaker
+from tomodachi.helpers.deadline import (
+    DEADLINE_AMQP_HEADER,
+    format_deadline,
+    get_deadline,
+    parse_deadline,
+    reset_deadline,
+    set_deadline,
+)
 from tomodachi.helpers.execution_context import (
     decrease_execution_context_value,
+    get_execution_context,
     increase_execution_context_value,
     set_execution_context,
 )
+from tomodachi.helpers.limiters import ThroughputLimiter
 from tomodachi.helpers.middleware import execute_middlewares
+from tomodachi.helpers.spool import PublishSpool
 from tomodachi.invoker import Invoker
 from tomodachi.options import Options
 
@@ -61,11 +75,376 @@ class AmqpChannelClosed(AmqpException):
     pass
 
 
+class AmqpPublishRejectedException(AmqpException):
+    pass
+
+
+class AmqpPublishConfirms(object):
+    # Publisher confirms for a channel in confirm mode. Published messages are numbered with consecutive delivery tags
+    # and each publish waits for the broker to confirm its delivery tag, also when a single confirm covers several
+    # messages (multiple=True), while other publishes are sent in the meantime. The number of unconfirmed messages on
+    # the channel is bounded by max_unconfirmed_messages.
+    __slots__ = ("channel", "max_unconfirmed_messages", "_delivery_tag", "_unconfirmed", "_window")
+
+    def __init__(self, channel: Any, max_unconfirmed_messages: int) -> None:
+        self.channel = channel
+        self.max_unconfirmed_messages = max(max_unconfirmed_messages, 1)
+        self._delivery_tag = 0
+        self._unconfirmed: Dict[int, asyncio.Future] = {}
+        self._window = asyncio.Semaphore(self.max_unconfirmed_messages)
+
+    def __len__(self) -> int:
+        return len(self._unconfirmed)
+
+    @classmethod
+    async def enable(cls, channel: Any, max_unconfirmed_messages: int) -> "AmqpPublishConfirms":
+        confirms = cls(channel, max_unconfirmed_messages)
+        await channel.confirm_select()
+
+        # the confirms are tracked here instead of by aioamqp, which only resolves the highest delivery tag of a
+        # confirm with the multiple flag set.
+        channel.publisher_confirms = False
+        channel.basic_server_ack = confirms.on_ack
+        channel.basic_server_nack = confirms.on_nack
+
+        connection_closed = channel.connection_closed
+
+        def _connection_closed(
+            server_code: Optional[int] = None, server_reason: Optional[str] = None, exception: Any = None
+        ) -> None:
+            connection_closed(server_code, server_reason, exception)
+            confirms.on_close(server_code, server_reason, exception)
+
+        channel.connection_closed = _connection_closed
+
+        return confirms
+
+    async def publish(self, payload: bytes, exchange_name: str, routing_key: str, properties: Dict) -> None:
+        await self._window.acquire()
+
+        # the frames of a message are written without yielding to the event loop, so delivery tags are assigned in
+        # the order that the messages are published on the channel.
+        self._delivery_tag += 1
+        delivery_tag = self._delivery_tag
+        future: asyncio.Future = asyncio.get_event_loop().create_future()
+        self._unconfirmed[delivery_tag] = future
+        try:
+            await self.channel.basic_publish(payload, exchange_name, routing_key, properties)
+        except BaseException:
+            self._resolve(delivery_tag, AmqpChannelClosed("Unable to publish message"))
+            future.exception()
+            raise
+
+        await future
+
+    async def on_ack(self, frame: Any) -> None:
+        for delivery_tag in self._delivery_tags(frame.delivery_tag, frame.multiple):
+            self._resolve(delivery_tag)
+
+    async def on_nack(self, frame: Any) -> None:
+        for delivery_tag in self._delivery_tags(frame.delivery_tag, frame.multiple):
+            self._resolve(delivery_tag, AmqpPublishRejectedException("Message was rejected (nack) by the broker"))
+
+    def on_close(self, server_code: Optional[int], server_reason: Optional[str], exception: Any) -> None:
+        # unconfirmed messages are published again if the connection was lost, while a channel closed by the broker
+        # (for example when publishing to a non-existing exchange) raises the channel error.
+        error: BaseException = (
+            AmqpChannelClosed(str(exception))
+            if exception is not None or server_code is None
+            else aioamqp.exceptions.ChannelClosed(server_code, server_reason)
+        )
+        for delivery_tag in list(self._unconfirmed):
+            self._resolve(delivery_tag, error)
+
+    def _delivery_tags(self, delivery_tag: int, multiple: bool) -> List[int]:
+        if not multiple:
+            return [delivery_tag] if delivery_tag in self._unconfirmed else []
+        return [tag for tag in self._unconfirmed if tag <= delivery_tag]
+
+    def _resolve(self, delivery_tag: int, exception: Optional[BaseException] = None) -> None:
+        future = self._unconfirmed.pop(delivery_tag, None)
+        if future is None:
+            return
+        self._window.release()
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(None)
+
+
+class AmqpAckCoalescer(object):
+    # Acknowledgements of handled messages on a consume channel are sent in batches, once flush_threshold messages are
+    # waiting to be acknowledged or after at most flush_interval seconds. A single ack with the multiple flag set is
+    # sent for the highest delivery tag up to which all messages have been handled, while messages handled out of
+    # order (after a message that is still being processed) are acknowledged individually. Delivery tags that have
+    # been settled ahead of the acked up to tag are kept as ranges of consecutive tags.
+    __slots__ = (
+        "channel",
+        "flush_interval",
+        "flush_threshold",
+        "_acked_up_to",
+        "_pending",
+        "_settled",
+        "_flush_handle",
+    )
+
+    def __init__(self, channel: Any, flush_interval: float, flush_threshold: int) -> None:
+        self.channel = channel
+        self.flush_interval = flush_interval
+        self.flush_threshold = max(flush_threshold, 1)
+        self._acked_up_to = 0
+        self._pending: Set[int] = set()
+        self._settled: List[List[int]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def ack(self, delivery_tag: int) -> None:
+        self._pending.add(delivery_tag)
+        if len(self._pending) >= self.flush_threshold or self.flush_interval <= 0:
+            await self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_event_loop().call_later(
+                self.flush_interval, lambda: asyncio.ensure_future(self.flush())
+            )
+
+    async def nack(self, delivery_tag: int) -> None:
+        self._settle(delivery_tag)
+        await self.channel.basic_client_nack(delivery_tag)
+
+    def skip(self, delivery_tag: int) -> None:
+        # messages that the handler gives up on without an ack or nack of their own, which are acknowledged together
+        # with the messages after them, instead of stopping the multiple acks at their delivery tag
+        self._settle(delivery_tag)
+
+    async def flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        delivery_tag = self._acked_up_to
+        multiple_delivery_tag = 0
+        while True:
+            if delivery_tag + 1 in self._pending:
+                delivery_tag += 1
+                multiple_delivery_tag = delivery_tag
+            elif self._settled and self._settled[0][0] == delivery_tag + 1:
+                delivery_tag = self._settled.pop(0)[1]
+            else:
+                break
+        out_of_order_delivery_tags = sorted(tag for tag in self._pending if tag > delivery_tag)
+        acks = len(self._pending) - len(out_of_order_delivery_tags)
+
+        self._acked_up_to = delivery_tag
+        self._pending = set()
+        for tag in out_of_order_delivery_tags:
+            self._settle(tag)
+
+        if acks > 1:
+            increase_execution_context_value("amqp_coalesced_acks", acks - 1)
+        try:
+            if multiple_delivery_tag:
+                await self.channel.basic_client_ack(multiple_delivery_tag, multiple=acks > 1)
+            for tag in out_of_order_delivery_tags:
+                await self.channel.basic_client_ack(tag)
+        except (aioamqp.exceptions.AmqpClosedConnection, aioamqp.exceptions.ChannelClosed):
+            # unacknowledged messages are redelivered by the broker once the channel is closed
+            pass
+
+    def _settle(self, delivery_tag: int) -> None:
+        if delivery_tag <= self._acked_up_to:
+            return
+
+        settled = self._settled
+        i = bisect.bisect_left(settled, [delivery_tag, delivery_tag])
+        if i > 0 and settled[i - 1][1] >= delivery_tag - 1:
+            i -= 1
+            settled[i][1] = max(settled[i][1], delivery_tag)
+        elif i < len(settled) and settled[i][0] == delivery_tag:
+            return
+        else:
+            settled.insert(i, [delivery_tag, delivery_tag])
+        if i + 1 < len(settled) and settled[i + 1][0] <= settled[i][1] + 1:
+            settled[i][1] = max(settled[i][1], settled.pop(i + 1)[1])
+
+
+class AmqpPrefetchTuner(object):
+    # Adjusts the prefetch count of a consume channel based on the latency of its handlers, measured every
+    # adjust_interval seconds. The prefetch count is increased additively (by min_prefetch_count) while the latency
+    # stays within latency_tolerance times the lowest latency seen, and halved once the latency rises above that, which
+    # happens when the consumer (or the services that its handlers depend on) is saturated. The prefetch count is kept
+    # within the bounds.
+    __slots__ = (
+        "channel",
+        "prefetch_count",
+        "min_prefetch_count",
+        "max_prefetch_count",
+        "latency_tolerance",
+        "adjust_interval",
+        "latency",
+        "baseline_latency",
+        "throughput",
+        "_handled",
+        "_latency_sum",
+        "_interval_started_at",
+    )
+
+    def __init__(
+        self,
+        channel: Any,
+        prefetch_count: int,
+        min_prefetch_count: int,
+        max_prefetch_count: int,
+        latency_tolerance: float,
+        adjust_interval: float,
+    ) -> None:
+        self.channel = channel
+        self.min_prefetch_count = max(min_prefetch_count, 1)
+        self.max_prefetch_count = max(max_prefetch_count, self.min_prefetch_count)
+        self.prefetch_count = min(max(prefetch_count, self.min_prefetch_count), self.max_prefetch_count)
+        self.latency_tolerance = max(latency_tolerance, 1.0)
+        self.adjust_interval = adjust_interval
+        self.latency = 0.0
+        self.baseline_latency = 0.0
+        self.throughput = 0.0
+        self._handled = 0
+        self._latency_sum = 0.0
+        self._interval_started_at = time.monotonic()
+
+    def record(self, latency: float) -> None:
+        self._handled += 1
+        self._latency_sum += latency
+
+        elapsed = time.monotonic() - self._interval_started_at
+        if elapsed >= self.adjust_interval:
+            prefetch_count = self.adjust(elapsed)
+            if prefetch_count is not None:
+                asyncio.ensure_future(self.set_prefetch_count(prefetch_count))
+
+    def adjust(self, elapsed: float) -> Optional[int]:
+        handled = self._handled
+        latency_sum = self._latency_sum
+        self._handled = 0
+        self._latency_sum = 0.0
+        self._interval_started_at = time.monotonic()
+
+        # the prefetch count is kept as is while the consumers are idle
+        if not handled or elapsed <= 0:
+            return None
+
+        throughput = handled / elapsed
+        latency = latency_sum / handled
+        self.throughput = (self.throughput + throughput) / 2 if self.throughput else throughput
+        self.latency = (self.latency + latency) / 2 if self.latency else latency
+        if not self.baseline_latency or self.latency < self.baseline_latency:
+            self.baseline_latency = self.latency
+
+        if self.latency <= self.baseline_latency * self.latency_tolerance:
+            prefetch_count = self.prefetch_count + self.min_prefetch_count
+        elif self.prefetch_count > self.min_prefetch_count:
+            prefetch_count = self.prefetch_count // 2
+        else:
+            # the latency isn't caused by the number of messages in flight, but by slower handling in general
+            self.baseline_latency = self.latency
+            prefetch_count = self.prefetch_count
+
+        prefetch_count = max(min(prefetch_count, self.max_prefetch_count), self.min_prefetch_count)
+        if prefetch_count == self.prefetch_count:
+            return None
+
+        self.prefetch_count = prefetch_count
+        return prefetch_count
+
+    async def set_prefetch_count(self, prefetch_count: int) -> None:
+        try:
+            await self.channel.basic_qos(prefetch_count=prefetch_count, prefetch_size=0, connection_global=True)
+        except (aioamqp.exceptions.AmqpClosedConnection, aioamqp.exceptions.ChannelClosed):
+            return
+
+        logging.getLogger("tomodachi.amqp").debug(
+            "adjusted prefetch count",
+            channel_id=self.channel.channel_id,
+            prefetch_count=prefetch_count,
+            handler_latency=round(self.latency, 4),
+            handler_throughput=round(self.throughput, 2),
+        )
+        increase_execution_context_value("amqp_prefetch_adjustments")
+        self.export()
+
+    def export(self) -> None:
+        context = get_execution_context()
+        context["amqp_prefetch_counts"] = {
+            **context.get("amqp_prefetch_counts", {}),
+            self.channel.channel_id: self.prefetch_count,
+        }
+
+
+class AmqpChannelPool(object):
+    # Channels used for publishing. Each publish uses the open channel with the fewest in-flight publishes (rotating
+    # between equally busy channels), so that publishing isn't serialized through a single channel.
+    __slots__ = ("channels", "_in_flight", "_index")
+
+    def __init__(self, channels: List[Any]) -> None:
+        self.channels = channels
+        self._in_flight = [0] * len(channels)
+        self._index = 0
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self._in_flight)
+
+    def acquire(self) -> Any:
+        selected: Optional[int] = None
+        for offset in range(len(self.channels)):
+            index = (self._index + offset) % len(self.channels)
+            if not self.channels[index].is_open:
+                continue
+            if selected is None or self._in_flight[index] < self._in_flight[selected]:
+                selected = index
+        if selected is None:
+            raise AmqpChannelClosed("No open channels available for publishing")
+
+        self._index = (selected + 1) % len(self.channels)
+        self._in_flight[selected] += 1
+        return self.channels[selected]
+
+    def release(self, channel: Any) -> None:
+        for index, channel_ in enumerate(self.channels):
+            if channel_ is channel:
+                self._in_flight[index] = max(self._in_flight[index] - 1, 0)
+                return
+
+    def replace(self, channel: Any, new_channel: Any) -> bool:
+        for index, channel_ in enumerate(self.channels):
+            if channel_ is channel:
+                self.channels[index] = new_channel
+                self._in_flight[index] = 0
+                return True
+        return False
+
+
 class AmqpTransport(Invoker):
     channel: Any = None
     protocol: Any = None
     transport: Any = None
     exchange_name: str
+    publish_channel_pool: Optional[AmqpChannelPool] = None
+    publish_confirms: Dict[Any, AmqpPublishConfirms] = {}
+    consume_channels: List[Any] = []
+    ack_coalescers: Dict[Any, AmqpAckCoalescer] = {}
+    prefetch_tuners: Dict[Any, AmqpPrefetchTuner] = {}
+    publish_spool: Optional[PublishSpool] = None
+    publish_rate_limiter: Optional[ThroughputLimiter] = None
+    closing: bool = False
+    _reconnect_lock: Optional[asyncio.Lock] = None
 
     @overload
     @classmethod
@@ -80,6 +459,7 @@ class AmqpTransport(Invoker):
         message_envelope: Any = MESSAGE_ENVELOPE_DEFAULT,
         message_protocol: Any = MESSAGE_ENVELOPE_DEFAULT,  # deprecated
         routing_key_prefix: Optional[str] = MESSAGE_ROUTING_KEY_PREFIX,
+        propagate_deadline: bool = True,
         **kwargs: Any,
     ) -> None: ...
 
@@ -96,6 +476,7 @@ class AmqpTransport(Invoker):
         message_envelope: Any = MESSAGE_ENVELOPE_DEFAULT,
         message_protocol: Any = MESSAGE_ENVELOPE_DEFAULT,  # deprecated
         routing_key_prefix: Optional[str] = MESSAGE_ROUTING_KEY_PREFIX,
+        propagate_deadline: bool = True,
         **kwargs: Any,
     ) -> asyncio.Task[None]: ...
 
@@ -112,6 +493,7 @@ class AmqpTransport(Invoker):
         message_envelope: Any = MESSAGE_ENVELOPE_DEFAULT,
         message_protocol: Any = MESSAGE_ENVELOPE_DEFAULT,  # deprecated
         routing_key_prefix: Optional[str] = MESSAGE_ROUTING_KEY_PREFIX,
+        propagate_deadline: bool = True,
         **kwargs: Any,
     ) -> asyncio.Task[None]: ...
 
@@ -127,10 +509,17 @@ class AmqpTransport(Invoker):
         message_envelope: Any = MESSAGE_ENVELOPE_DEFAULT,
         message_protocol: Any = MESSAGE_ENVELOPE_DEFAULT,  # deprecated
         routing_key_prefix: Optional[str] = MESSAGE_ROUTING_KEY_PREFIX,
+        propagate_deadline: bool = True,
         **kwargs: Any,
     ) -> Optional[asyncio.Task[None]]:
         if not cls.channel:
-            await cls.connect(service, service.context)
+            try:
+                await cls.connect(service, service.context)
+            except AmqpConnectionException:
+                # the message is spooled and published once the broker is reachable
+                if cls.get_publish_spool(service.context) is None:
+                    raise
+                exchange_name = exchange_name or cls.options(service.context).amqp.exchange_name
         exchange_name = exchange_name or cls.exchange_name or "amq.topic"
 
         if message_envelope == MESSAGE_ENVELOPE_DEFAULT and message_protocol != MESSAGE_ENVELOPE_DEFAULT:
@@ -151,6 +540,11 @@ class AmqpTransport(Invoker):
 
         async def _publish_message() -> None:
             properties: Dict = {}
+            deadline = get_deadline() if propagate_deadline else None
+            if deadline is not None:
+                # the message expires from the queue when the remaining time of the current deadline has passed
+                properties["headers"] = {DEADLINE_AMQP_HEADER: format_deadline(deadline)}
+                properties["expiration"] = str(max(int((deadline - time.time()) * 1000), 0))
             await cls._publish_message(
                 routing_key, exchange_name, payload, properties, routing_key_prefix, service, service.context
             )
@@ -172,18 +566,262 @@ class AmqpTransport(Invoker):
         service: Any,
         context: Dict,
     ) -> None:
-        success = False
-        while not success:
+        encoded_routing_key = cls.encode_routing_key(cls.get_routing_key(routing_key, context, routing_key_prefix))
+
+        spool = cls.get_publish_spool(context)
+        if spool is not None and (len(spool) or not cls.is_connected() or cls.is_publish_saturated()):
+            # messages are spooled behind already spooled messages to keep the order in which they're published
+            await cls.spool_message(exchange_name, encoded_routing_key, payload, properties, service, context)
+            return
+
+        await cls.limit_publish_rate(encoded_routing_key, context)
+
+        attempt = 0
+        while True:
             try:
-                await cls.channel.basic_publish(
-                    str.encode(payload),
-                    exchange_name,
-                    cls.encode_routing_key(cls.get_routing_key(routing_key, context, routing_key_prefix)),
-                    properties,
+                await cls.publish_to_channel(
+                    str.encode(payload), exchange_name, encoded_routing_key, properties, context
+                )
+                return
+            except (AssertionError, aioamqp.exceptions.AmqpClosedConnection, AmqpChannelClosed):
+                if cls.closing:
+                    raise
+                if spool is not None:
+                    await cls.spool_message(exchange_name, encoded_routing_key, payload, properties, service, context)
+                    return
+                attempt += 1
+                if attempt > 1:
+                    await asyncio.sleep(min(0.1 * 2 ** (attempt - 2), 10.0))
+                await cls.reconnect(service, context)
+
+    @classmethod
+    async def publish_to_channel(
+        cls, payload: bytes, exchange_name: str, routing_key: str, properties: Dict, context: Dict
+    ) -> None:
+        channel = await cls.get_publish_channel(context)
+        try:
+            confirms = cls.publish_confirms.get(channel)
+            if confirms is not None:
+                await confirms.publish(payload, exchange_name, routing_key, properties)
+            else:
+                await channel.basic_publish(payload, exchange_name, routing_key, properties)
+        finally:
+            if cls.publish_channel_pool:
+                cls.publish_channel_pool.release(channel)
+
+    @classmethod
+    async def limit_publish_rate(cls, routing_key: str, context: Dict) -> None:
+        # publishes exceeding the throughput limit of a routing key wait in line for their turn
+        amqp_options: Options.AMQP = cls.options(context).amqp
+        rate = amqp_options.publish_rate_limit or None
+        rates = amqp_options.publish_rate_limits or {}
+        if not rate and not rates:
+            return
+
+        limiter = cls.publish_rate_limiter
+        burst = amqp_options.publish_rate_limit_burst
+        if (
+            limiter is None
+            or limiter.rate != rate
+            or limiter.rates != rates
+            or (burst is not None and limiter.burst != burst)
+        ):
+            limiter = cls.publish_rate_limiter = ThroughputLimiter(rate, burst, rates)
+
+        waited = await limiter.acquire(routing_key)
+        if waited:
+            increase_execution_context_value("amqp_publish_rate_limited_messages")
+            increase_execution_context_value("amqp_publish_rate_limit_wait_time_ms", int(waited * 1000))
+
+    @classmethod
+    def is_publish_saturated(cls) -> bool:
+        # with publisher confirms, every publish channel has the max number of messages waiting to be confirmed
+        return bool(cls.publish_confirms) and all(
+            len(confirms) >= confirms.max_unconfirmed_messages for confirms in cls.publish_confirms.values()
+        )
+
+    @classmethod
+    def get_publish_spool(cls, context: Dict) -> Optional[PublishSpool]:
+        if cls.publish_spool is None:
+            amqp_options: Options.AMQP = cls.options(context).amqp
+            if amqp_options.spool_directory:
+                cls.publish_spool = PublishSpool(
+                    amqp_options.spool_directory,
+                    "amqp",
+                    segment_size=amqp_options.spool_segment_size,
+                    fsync=amqp_options.spool_fsync,
                 )
-                success = True
-            except AssertionError:
-                await cls.connect(service, context)
+        return cls.publish_spool
+
+    @classmethod
+    async def spool_message(
+        cls, exchange_name: str, routing_key: str, payload: Any, properties: Dict, service: Any, context: Dict
+    ) -> None:
+        spool = cls.publish_spool
+        if spool is None:
+            return
+        await spool.append(
+            {"exchange_name": exchange_name, "routing_key": routing_key, "payload": payload, "properties": properties}
+        )
+        if not cls.closing:
+            spool.start_drain(functools.partial(cls.replay_spooled_message, service, context))
+
+    @classmethod
+    async def replay_spooled_message(cls, service: Any, context: Dict, record: Dict[str, Any]) -> None:
+        if not cls.is_connected():
+            await cls.reconnect(service, context)
+
+        properties: Dict = record["properties"]
+        deadline = parse_deadline((properties.get("headers") or {}).get(DEADLINE_AMQP_HEADER))
+        if deadline is not None:
+            properties = {**properties, "expiration": str(max(int((deadline - time.time()) * 1000), 0))}
+
+        await cls.limit_publish_rate(record["routing_key"], context)
+        try:
+            await cls.publish_to_channel(
+                str.encode(record["payload"]), record["exchange_name"], record["routing_key"], properties, context
+            )
+        except (aioamqp.exceptions.ChannelClosed, AmqpPublishRejectedException) as e:
+            # messages rejected by the broker are discarded, since they would block the replay of later messages
+            if isinstance(e, aioamqp.exceptions.ChannelClosed) and not e.code:
+                raise
+            increase_execution_context_value("amqp_spool_discarded_messages")
+            logging.getLogger("tomodachi.amqp").warning(
+                "Unable to publish spooled message [amqp] ({})".format(str(e) or e.__class__.__name__),
+                routing_key=record["routing_key"],
+            )
+
+    @classmethod
+    async def open_publish_channel(cls, context: Dict) -> Any:
+        channel = await cls.protocol.channel()
+        amqp_options: Options.AMQP = cls.options(context).amqp
+        if amqp_options.publisher_confirms:
+            cls.publish_confirms[channel] = await AmqpPublishConfirms.enable(
+                channel, amqp_options.max_unconfirmed_messages
+            )
+        return channel
+
+    @classmethod
+    async def get_publish_channel(cls, context: Dict) -> Any:
+        pool = cls.publish_channel_pool
+        if not pool:
+            return cls.channel
+
+        if cls.is_connected(publish=False):
+            # channels closed by the broker (for example when publishing to a non-existing exchange) are replaced
+            for channel in [channel for channel in pool.channels if not channel.is_open]:
+                new_channel = await cls.open_publish_channel(context)
+                if not pool.replace(channel, new_channel):
+                    cls.publish_confirms.pop(new_channel, None)
+                    await new_channel.close()
+                cls.publish_confirms.pop(channel, None)
+
+        try:
+            return pool.acquire()
+        except AmqpChannelClosed:
+            return cls.channel
+
+    @classmethod
+    def is_connected(cls, publish: bool = True) -> bool:
+        if not cls.protocol or cls.protocol.state != aioamqp.protocol.OPEN:
+            return False
+        if not cls.channel or not cls.channel.is_open:
+            return False
+        if any(not channel.is_open for channel in cls.consume_channels):
+            return False
+        if (
+            publish
+            and cls.publish_channel_pool
+            and not any(channel.is_open for channel in cls.publish_channel_pool.channels)
+        ):
+            return False
+        return True
+
+    @classmethod
+    async def reconnect(cls, obj: Any, context: Dict) -> None:
+        # Sets up a new connection with new channels for publishing and consuming. Consumers are restarted on the
+        # new channels, since delivered messages can only be acknowledged on the channel they were delivered on.
+        if not cls._reconnect_lock:
+            cls._reconnect_lock = asyncio.Lock()
+
+        async with cls._reconnect_lock:
+            attempt = 0
+            while not cls.closing and not cls.is_connected():
+                attempt += 1
+                if cls.transport:
+                    try:
+                        cls.transport.close()
+                    except Exception:
+                        pass
+
+                try:
+                    await cls.connect(obj, context)
+                    start_consumers = context.get("_amqp_start_consumers")
+                    if start_consumers:
+                        await start_consumers()
+                except (AmqpException, aioamqp.exceptions.AioamqpException, OSError) as e:
+                    delay = min(0.5 * 2 ** (attempt - 1), 30.0)
+                    logging.getLogger("tomodachi.amqp").warning(
+                        "Unable to reconnect [amqp] ({})".format(str(e) or e.__class__.__name__),
+                        attempt=attempt,
+                        retry_delay=delay,
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+
+                increase_execution_context_value("amqp_reconnects")
+                logging.getLogger("tomodachi.amqp").info("reconnected [amqp]", attempt=attempt)
+
+    @classmethod
+    async def ack_message(cls, channel: Any, delivery_tag: Any) -> None:
+        ack_coalescer = cls.ack_coalescers.get(channel)
+        if ack_coalescer is not None:
+            await ack_coalescer.ack(delivery_tag)
+        else:
+            await channel.basic_client_ack(delivery_tag)
+
+    @classmethod
+    async def nack_message(cls, channel: Any, delivery_tag: Any) -> None:
+        ack_coalescer = cls.ack_coalescers.get(channel)
+        if ack_coalescer is not None:
+            await ack_coalescer.nack(delivery_tag)
+        else:
+            await channel.basic_client_nack(delivery_tag)
+
+    @classmethod
+    def skip_message(cls, channel: Any, delivery_tag: Any) -> None:
+        ack_coalescer = cls.ack_coalescers.get(channel)
+        if ack_coalescer is not None:
+            ack_coalescer.skip(delivery_tag)
+
+    @classmethod
+    async def duplicate_message(cls, context: Dict, message_key: str, channel: Any, delivery_tag: Any) -> None:
+        # redeliveries of a message are left unacknowledged, unless acks are coalesced on the channel, in which case
+        # they are settled the same way as the message itself once it has been handled, to not stop the multiple acks
+        duplicate_messages = context.get("_amqp_duplicate_messages") or {}
+        if message_key in duplicate_messages:
+            duplicates = duplicate_messages[message_key]
+            if duplicates is not None:
+                duplicates.append((channel, delivery_tag))
+        elif cls.ack_coalescers.get(channel) is not None:
+            await cls.ack_message(channel, delivery_tag)
+
+    @classmethod
+    async def settle_duplicate_messages(cls, context: Dict, message_key: Optional[str], ack: Optional[bool]) -> None:
+        duplicate_messages = context.get("_amqp_duplicate_messages")
+        if not message_key or not duplicate_messages or duplicate_messages.get(message_key) is None:
+            return
+
+        duplicates = duplicate_messages.pop(message_key)
+        if ack is None:
+            # the message was neither acked nor nacked, which goes for its redeliveries as well
+            duplicate_messages[message_key] = None
+            return
+        for channel, delivery_tag in duplicates:
+            if ack:
+                await cls.ack_message(channel, delivery_tag)
+            else:
+                await cls.nack_message(channel, delivery_tag)
 
     @classmethod
     def get_routing_key(
@@ -262,9 +900,12 @@ class AmqpTransport(Invoker):
         *,
         message_envelope: Any = MESSAGE_ENVELOPE_DEFAULT,
         message_protocol: Any = MESSAGE_ENVELOPE_DEFAULT,  # deprecated
+        circuit_breaker: Optional[Union[CircuitBreaker, Dict[str, Any], bool]] = None,
         **kwargs: Any,
     ) -> Any:
         parser_kwargs = kwargs
+        handler_circuit_breaker = get_circuit_breaker(func.__name__, circuit_breaker)
+        message_inbox = context.get("message_inbox")
 
         if message_envelope == MESSAGE_ENVELOPE_DEFAULT and message_protocol != MESSAGE_ENVELOPE_DEFAULT:
             # Fallback if deprecated message_protocol keyword is used
@@ -303,12 +944,29 @@ class AmqpTransport(Invoker):
         args_set = (set(values.args[1:]) | set(values.kwonlyargs) | set(callback_kwargs or [])) - set(["self"])
 
         async def handler(
-            payload: Any, delivery_tag: Any, routing_key: str, properties: aioamqp.properties.Properties
+            payload: Any,
+            delivery_tag: Any,
+            routing_key: str,
+            properties: aioamqp.properties.Properties,
+            channel: Any = None,
         ) -> Any:
             logging.bind_logger(logging.getLogger("tomodachi.amqp").new(logger="tomodachi.amqp"))
 
+            # messages are acknowledged on the channel that they were delivered on
+            channel = channel or cls.channel
+
             kwargs = dict(original_kwargs)
 
+            deadline = parse_deadline((getattr(properties, "headers", None) or {}).get(DEADLINE_AMQP_HEADER))
+            if deadline is not None and deadline <= time.time():
+                # the message is no longer relevant to process, since the deadline set by its publisher has passed
+                increase_execution_context_value("amqp_deadline_exceeded_messages")
+                logging.getLogger("tomodachi.amqp").info(
+                    "discarded message past deadline", handler=func.__name__, routing_key=routing_key
+                )
+                await cls.ack_message(channel, delivery_tag)
+                return
+
             message = payload
             message_uuid = None
             message_key = None
@@ -327,8 +985,12 @@ class AmqpTransport(Invoker):
                             context["_amqp_received_messages"] = {}
                         message_key = "{}:{}".format(message_uuid, func.__name__)
                         if context["_amqp_received_messages"].get(message_key):
+                            await cls.duplicate_message(context, message_key, channel, delivery_tag)
                             return
                         context["_amqp_received_messages"][message_key] = time.time()
+                        if cls.ack_coalescers.get(channel) is not None:
+                            context["_amqp_duplicate_messages"] = context.get("_amqp_duplicate_messages") or {}
+                            context["_amqp_duplicate_messages"][message_key] = []
                         _received_messages = context["_amqp_received_messages"]
                         if (
                             _received_messages
@@ -338,6 +1000,12 @@ class AmqpTransport(Invoker):
                             context["_amqp_received_messages"] = {
                                 k: v for k, v in context["_amqp_received_messages"].items() if v > time.time() - 60
                             }
+                            if context.get("_amqp_duplicate_messages"):
+                                context["_amqp_duplicate_messages"] = {
+                                    k: v
+                                    for k, v in context["_amqp_duplicate_messages"].items()
+                                    if v is not None or k in context["_amqp_received_messages"]
+                                }
 
                     if args_set:
                         for k, v in message.items():
@@ -362,12 +1030,14 @@ class AmqpTransport(Invoker):
                 except (Exception, asyncio.CancelledError, BaseException) as e:
                     limit_exception_traceback(e, ("tomodachi.transport.amqp",))
                     logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+                    await cls.settle_duplicate_messages(context, message_key, None)
                     if message is not False and not message_uuid:
-                        await cls.channel.basic_client_ack(delivery_tag)
+                        await cls.ack_message(channel, delivery_tag)
                     elif message is False and message_uuid:
-                        pass  # incompatible envelope, should probably ack if old message
+                        # incompatible envelope, should probably ack if old message
+                        cls.skip_message(channel, delivery_tag)
                     elif message is False:
-                        await cls.channel.basic_client_ack(delivery_tag)
+                        await cls.ack_message(channel, delivery_tag)
                     return
             else:
                 if args_set:
@@ -406,11 +1076,30 @@ class AmqpTransport(Invoker):
                 else:
                     return_value = routine
 
-                await cls.channel.basic_client_ack(delivery_tag)
+                if message_inbox and message_uuid:
+                    await message_inbox.record(obj, message_uuid, func.__name__)
+                await cls.ack_message(channel, delivery_tag)
+                await cls.settle_duplicate_messages(context, message_key, True)
                 return return_value
 
+            if message_inbox and message_uuid and await message_inbox.is_duplicate(obj, message_uuid, func.__name__):
+                # the message was already handled, before a restart or by another instance of the service
+                await cls.ack_message(channel, delivery_tag)
+                await cls.settle_duplicate_messages(context, message_key, True)
+                return
+
+            if handler_circuit_breaker and not handler_circuit_breaker.allow_request():
+                # the message was delivered before the consumer was cancelled by the opened circuit breaker
+                if message_key:
+                    del context["_amqp_received_messages"][message_key]
+                await cls.nack_message(channel, delivery_tag)
+                await cls.settle_duplicate_messages(context, message_key, False)
+                return
+
             increase_execution_context_value("amqp_current_tasks")
             increase_execution_context_value("amqp_total_tasks")
+            deadline_token = set_deadline(deadline) if deadline is not None else None
+            started_at = time.perf_counter()
             try:
                 logging.bind_logger(
                     logging.getLogger("tomodachi.amqp.middleware").bind(
@@ -430,6 +1119,8 @@ class AmqpTransport(Invoker):
                         properties=properties,
                     )
                 )
+                if handler_circuit_breaker:
+                    handler_circuit_breaker.record_success()
             except (Exception, asyncio.CancelledError, BaseException) as e:
                 limit_exception_traceback(
                     e,
@@ -437,22 +1128,34 @@ class AmqpTransport(Invoker):
                 )
                 logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
                 return_value = None
+                if handler_circuit_breaker:
+                    handler_circuit_breaker.record_failure()
                 if issubclass(
                     e.__class__,
                     (AmqpInternalServiceError, AmqpInternalServiceErrorException, AmqpInternalServiceException),
                 ):
                     if message_key:
                         del context["_amqp_received_messages"][message_key]
-                    await cls.channel.basic_client_nack(delivery_tag)
+                    await cls.nack_message(channel, delivery_tag)
+                    await cls.settle_duplicate_messages(context, message_key, False)
                 else:
-                    await cls.channel.basic_client_ack(delivery_tag)
+                    await cls.ack_message(channel, delivery_tag)
+                    await cls.settle_duplicate_messages(context, message_key, True)
+            finally:
+                if deadline_token is not None:
+                    reset_deadline(deadline_token)
+                prefetch_tuner = cls.prefetch_tuners.get(channel)
+                if prefetch_tuner:
+                    prefetch_tuner.record(time.perf_counter() - started_at)
             decrease_execution_context_value("amqp_current_tasks")
 
             return return_value
 
         exchange_name = exchange_name or cls.options(context).amqp.exchange_name
         context["_amqp_subscribers"] = context.get("_amqp_subscribers", [])
-        context["_amqp_subscribers"].append((routing_key, exchange_name, competing, queue_name, func, handler))
+        context["_amqp_subscribers"].append(
+            (routing_key, exchange_name, competing, queue_name, func, handler, handler_circuit_breaker)
+        )
 
         start_func = cls.subscribe(obj, context)
         return (await start_func) if start_func else None
@@ -475,8 +1178,17 @@ class AmqpTransport(Invoker):
         ssl = amqp_options.ssl
         heartbeat = amqp_options.heartbeat
 
+        if not cls.channel:
+            cls.closing = False
+
+        async def on_error(exception: Exception) -> None:
+            if cls.closing or protocol is not cls.protocol:
+                return
+            logger.warning("Connection lost [amqp] ({})".format(str(exception) or exception.__class__.__name__))
+            await cls.reconnect(obj, context)
+
         try:
-            protocol: Any
+            protocol: Any = None
             transport, protocol = await aioamqp.connect(
                 host=host,
                 port=port,
@@ -485,6 +1197,7 @@ class AmqpTransport(Invoker):
                 virtualhost=virtualhost,
                 ssl=ssl,
                 heartbeat=heartbeat,
+                on_error=on_error,
             )
             cls.protocol = protocol
             cls.transport = transport
@@ -502,23 +1215,47 @@ class AmqpTransport(Invoker):
             raise AmqpConnectionException(str(e), log_level=context.get("log_level")) from e
 
         channel = await protocol.channel()
+        cls.publish_confirms = {}
+        publish_channels = [
+            await cls.open_publish_channel(context) for _ in range(max(amqp_options.publish_channel_count, 1))
+        ]
         if not cls.channel:
             stop_method = getattr(obj, "_stop_service", None)
 
             async def stop_service(*args: Any, **kwargs: Any) -> None:
+                cls.closing = True
+                for ack_coalescer in list(cls.ack_coalescers.values()):
+                    await ack_coalescer.flush()
+                cls.ack_coalescers = {}
+                cls.prefetch_tuners = {}
+                if cls.publish_spool is not None:
+                    await cls.publish_spool.close()
+                    cls.publish_spool = None
                 logging.getLogger("aioamqp.protocol").setLevel(logging.ERROR)
-                await cls.protocol.close()
+                try:
+                    await cls.protocol.close()
+                except aioamqp.exceptions.AioamqpException:
+                    pass
                 cls.transport.close()
                 cls.channel = None
                 cls.transport = None
                 cls.protocol = None
+                cls.publish_channel_pool = None
+                cls.publish_confirms = {}
+                cls.consume_channels = []
                 if stop_method:
                     await stop_method(*args, **kwargs)
 
             setattr(obj, "_stop_service", stop_service)
 
         cls.channel = channel
-        cls.exchange_name = cls.options(context).amqp.exchange_name
+        cls.publish_channel_pool = AmqpChannelPool(publish_channels)
+        cls.exchange_name = amqp_options.exchange_name
+        set_execution_context({"amqp_publish_channels": len(publish_channels)})
+
+        spool = cls.get_publish_spool(context)
+        if spool is not None and len(spool):
+            spool.start_drain(functools.partial(cls.replay_spooled_message, obj, context))
 
         return channel
 
@@ -541,14 +1278,8 @@ class AmqpTransport(Invoker):
         )
 
         cls.channel = None
-        channel = await cls.connect(obj, context)
+        await cls.connect(obj, context)
         options: Options = cls.options(context)
-        await channel.basic_qos(
-            prefetch_count=options.amqp.qos.queue_prefetch_count, prefetch_size=0, connection_global=False
-        )
-        await channel.basic_qos(
-            prefetch_count=options.amqp.qos.global_prefetch_count, prefetch_size=0, connection_global=True
-        )
 
         async def _subscribe() -> None:
             logger = logging.getLogger("tomodachi.amqp")
@@ -576,7 +1307,7 @@ class AmqpTransport(Invoker):
 
                 try:
                     if exchange_name and exchange_name != "amq.topic":
-                        await channel.exchange_declare(
+                        await cls.channel.exchange_declare(
                             exchange_name=exchange_name,
                             type_name=exchange_type,
                             passive=False,
@@ -624,7 +1355,7 @@ class AmqpTransport(Invoker):
                     amqp_arguments["x-expires"] = int(ttl * 1000)
 
                 try:
-                    data = await channel.queue_declare(
+                    data = await cls.channel.queue_declare(
                         queue_name,
                         passive=passive,
                         durable=durable,
@@ -644,7 +1375,7 @@ class AmqpTransport(Invoker):
                         raise AmqpExclusiveQueueLockedException(str(e)) from e
                     raise AmqpException(str(e)) from e
 
-                await channel.queue_bind(
+                await cls.channel.queue_bind(
                     queue_name,
                     exchange_name or "amq.topic",
                     cls.encode_routing_key(cls.get_routing_key(routing_key, context)),
@@ -657,23 +1388,178 @@ class AmqpTransport(Invoker):
                     self: Any, body: bytes, envelope: Any, properties: aioamqp.properties.Properties
                 ) -> None:
                     # await channel.basic_reject(delivery_tag, requeue=True)
-                    await asyncio.shield(handler(body.decode(), envelope.delivery_tag, routing_key, properties))
+                    await asyncio.shield(handler(body.decode(), envelope.delivery_tag, routing_key, properties, self))
 
                 return _callback
 
-            for routing_key, exchange_name, competing, queue_name, func, handler in context.get(
-                "_amqp_subscribers", []
-            ):
-                queue_name = await asyncio.create_task(
-                    declare_queue(
-                        routing_key,
-                        func,
-                        exchange_name=exchange_name,
-                        competing_consumer=competing,
-                        queue_name=queue_name,
-                    )
+            async def start_consumer(consumer: Dict[str, Any], prefetch_count: Optional[int] = None) -> None:
+                # The prefetch count per consumer is set on the channel and applies to the consumers started after it
+                # has been set, which is used to start a consumer with a different prefetch count than the others.
+                channel = consumer["channel"]
+                if prefetch_count is not None:
+                    await channel.basic_qos(prefetch_count=prefetch_count, prefetch_size=0, connection_global=False)
+                result = await channel.basic_consume(
+                    callback(consumer["routing_key"], consumer["handler"]), queue_name=consumer["queue_name"]
                 )
-                await channel.basic_consume(callback(routing_key, handler), queue_name=queue_name)
+                consumer["consumer_tag"] = result.get("consumer_tag", "")
+                if prefetch_count is not None:
+                    await channel.basic_qos(
+                        prefetch_count=consumer["prefetch_count"], prefetch_size=0, connection_global=False
+                    )
+
+            def pause_consumer(consumer: Dict[str, Any]) -> Callable:
+                # The consumer is cancelled while the circuit breaker is open, so that messages are left in the queue
+                # for other consumers, and is resumed to receive probe messages when the circuit breaker is half-open.
+                # While half-open, the consumer is only sent as many messages as there are probe calls allowed, and
+                # is started again with its regular prefetch count once the circuit breaker is closed.
+                async def _pause(circuit_breaker: CircuitBreaker) -> None:
+                    try:
+                        channel = consumer["channel"]
+                        if consumer["consumer_tag"] and channel.is_open:
+                            await channel.basic_cancel(consumer["consumer_tag"])
+                            consumer["consumer_tag"] = ""
+                        await asyncio.sleep(circuit_breaker.remaining_open_time())
+                        channel = consumer["channel"]
+                        if circuit_breaker.state == OPEN or consumer["consumer_tag"] or not channel.is_open:
+                            return
+                        consumer["probing"] = True
+                        await start_consumer(consumer, circuit_breaker.half_open_max_calls)
+                    except (aioamqp.exceptions.AmqpClosedConnection, aioamqp.exceptions.ChannelClosed) as e:
+                        logging.getLogger("tomodachi.amqp").warning(
+                            "Unable to pause consumer [amqp] for open circuit breaker ({})".format(str(e)),
+                            queue_name=consumer["queue_name"],
+                        )
+
+                async def _resume(circuit_breaker: CircuitBreaker) -> None:
+                    try:
+                        channel = consumer["channel"]
+                        consumer_tag = consumer["consumer_tag"]
+                        if not consumer_tag or not channel.is_open or circuit_breaker.state != CLOSED:
+                            return
+                        await start_consumer(consumer)
+                        await channel.basic_cancel(consumer_tag)
+                    except (aioamqp.exceptions.AmqpClosedConnection, aioamqp.exceptions.ChannelClosed) as e:
+                        logging.getLogger("tomodachi.amqp").warning(
+                            "Unable to resume consumer [amqp] for closed circuit breaker ({})".format(str(e)),
+                            queue_name=consumer["queue_name"],
+                        )
+
+                def _listener(circuit_breaker: CircuitBreaker, previous_state: str, state: str) -> None:
+                    if state == OPEN:
+                        consumer["probing"] = False
+                        asyncio.ensure_future(_pause(circuit_breaker))
+                    elif state == CLOSED and consumer.get("probing"):
+                        consumer["probing"] = False
+                        asyncio.ensure_future(_resume(circuit_breaker))
+
+                return _listener
+
+            consumers: List[Dict[str, Any]] = []
+
+            async def start_consumers() -> None:
+                # Each consume channel (shared by at most subscriptions_per_channel subscriptions) has its own QoS
+                # settings. Consumers are started on new channels again after a reconnect.
+                subscriptions_per_channel = max(options.amqp.subscriptions_per_channel, 1)
+                qos_options = options.amqp.qos
+                consume_channels: List[Any] = []
+                cls.consume_channels = consume_channels
+                cls.ack_coalescers = {}
+                cls.prefetch_tuners = {}
+
+                consume_channel: Any = None
+                for index, (
+                    routing_key,
+                    exchange_name,
+                    competing,
+                    queue_name,
+                    func,
+                    handler,
+                    circuit_breaker,
+                ) in enumerate(context.get("_amqp_subscribers", [])):
+                    if consume_channel is None or index % subscriptions_per_channel == 0:
+                        consume_channel = await cls.protocol.channel()
+                        if qos_options.adaptive:
+                            # the prefetch count of the channel is adjusted, since changes to the prefetch count per
+                            # consumer would only apply to consumers started afterwards.
+                            prefetch_tuner = AmqpPrefetchTuner(
+                                consume_channel,
+                                qos_options.queue_prefetch_count,
+                                qos_options.min_prefetch_count,
+                                qos_options.max_prefetch_count,
+                                qos_options.latency_tolerance,
+                                qos_options.adjust_interval,
+                            )
+                            cls.prefetch_tuners[consume_channel] = prefetch_tuner
+                            await consume_channel.basic_qos(
+                                prefetch_count=prefetch_tuner.max_prefetch_count,
+                                prefetch_size=0,
+                                connection_global=False,
+                            )
+                            await consume_channel.basic_qos(
+                                prefetch_count=prefetch_tuner.prefetch_count,
+                                prefetch_size=0,
+                                connection_global=True,
+                            )
+                            prefetch_tuner.export()
+                        else:
+                            await consume_channel.basic_qos(
+                                prefetch_count=qos_options.queue_prefetch_count,
+                                prefetch_size=0,
+                                connection_global=False,
+                            )
+                            await consume_channel.basic_qos(
+                                prefetch_count=qos_options.global_prefetch_count,
+                                prefetch_size=0,
+                                connection_global=True,
+                            )
+                        consume_channels.append(consume_channel)
+                        if options.amqp.coalesce_acks:
+                            cls.ack_coalescers[consume_channel] = AmqpAckCoalescer(
+                                consume_channel, options.amqp.ack_flush_interval, options.amqp.ack_flush_threshold
+                            )
+
+                    queue_name = await asyncio.create_task(
+                        declare_queue(
+                            routing_key,
+                            func,
+                            exchange_name=exchange_name,
+                            competing_consumer=competing,
+                            queue_name=queue_name,
+                        )
+                    )
+
+                    if index >= len(consumers):
+                        consumers.append({"routing_key": routing_key, "handler": handler})
+                        if circuit_breaker:
+                            circuit_breaker.add_listener(pause_consumer(consumers[index]))
+                    consumer = consumers[index]
+                    consumer.update(
+                        {
+                            "channel": consume_channel,
+                            "queue_name": queue_name,
+                            "consumer_tag": "",
+                            "prefetch_count": (
+                                qos_options.max_prefetch_count
+                                if qos_options.adaptive
+                                else qos_options.queue_prefetch_count
+                            ),
+                            "probing": False,
+                        }
+                    )
+
+                    if circuit_breaker and circuit_breaker.state == OPEN:
+                        # consuming is resumed once the circuit breaker is half-open
+                        continue
+                    if circuit_breaker and circuit_breaker.state == HALF_OPEN:
+                        consumer["probing"] = True
+                        await start_consumer(consumer, circuit_breaker.half_open_max_calls)
+                        continue
+                    await start_consumer(consumer)
+
+                set_execution_context({"amqp_consume_channels": len(consume_channels)})
+
+            context["_amqp_start_consumers"] = start_consumers
+            await start_consumers()
 
         return _subscribe
 
@@ -693,6 +1579,7 @@ def amqp(
     *,
     message_envelope: Any = MESSAGE_ENVELOPE_DEFAULT,
     message_protocol: Any = MESSAGE_ENVELOPE_DEFAULT,  # deprecated
+    circuit_breaker: Optional[Union[CircuitBreaker, Dict[str, Any], bool]] = None,
     **kwargs: Any,
 ) -> Callable:
     return cast(
@@ -705,6 +1592,7 @@ def amqp(
             queue_name=queue_name,
             message_envelope=message_envelope,
             message_protocol=message_protocol,
+            circuit_breaker=circuit_breaker,
             **kwargs,
         ),
     )
@@ -11,6 +11,7 @@ import functools
 import hashlib
 import inspect
 import json
+import random
 import re
 import string
 import time
@@ -50,13 +51,24 @@ from tomodachi import get_contextvar, logging
 from tomodachi._exception import limit_exception_traceback
 from tomodachi.helpers.aiobotocore_connector import ClientConnector
 from tomodachi.helpers.aws_credentials import Credentials
+from tomodachi.helpers.circuit_breaker import CLOSED, OPEN, CircuitBreaker, get_circuit_breaker
+from tomodachi.helpers.deadline import (
+    DEADLINE_MESSAGE_ATTRIBUTE,
+    format_deadline,
+    get_deadline,
+    parse_deadline,
+    reset_deadline,
+    set_deadline,
+)
 from tomodachi.helpers.execution_context import (
     decrease_execution_context_value,
     get_execution_context,
     increase_execution_context_value,
     set_execution_context,
 )
+from tomodachi.helpers.limiters import ThroughputLimiter
 from tomodachi.helpers.middleware import execute_middlewares
+from tomodachi.helpers.spool import PublishSpool
 from tomodachi.invoker import Invoker
 from tomodachi.options import Options
 
@@ -83,6 +95,7 @@ MESSAGE_RETENTION_PERIOD_DEFAULT = "b3eb5107-ca13-2cfb-ca1e-1a14b5313e91"
 VISIBILITY_TIMEOUT_DEFAULT = -1
 MAX_RECEIVE_COUNT_DEFAULT = -1
 MAX_NUMBER_OF_CONSUMED_MESSAGES = 10
+SPOOLED_MESSAGE_ID = "spooled"  # returned by publish instead of a message id for messages appended to the spool
 
 SET_CONTEXTVAR_VALUES = False
 
@@ -310,10 +323,42 @@ class MessageBodyFormatter(MessageBodyFormatterProtocol):
         )
 
 
+@dataclasses.dataclass(frozen=True)
+class RetryPolicy:
+    # Messages that are kept in queue (handlers raising AWSSNSSQSInternalServiceError) are made visible again after an
+    # exponentially increasing delay based on the receive count of the message, instead of after the full visibility
+    # timeout of the queue. The jitter is the fraction of the delay that is randomized.
+    base_delay: float = 1.0
+    multiplier: float = 2.0
+    jitter: float = 0.5
+    max_delay: float = 900.0
+
+    # hack for import finder, that on module reload breaks the __module__ attribute
+    __module__: str = __name__.rsplit(".", 1)[0].replace("/", ".")
+
+    def __post_init__(self) -> None:
+        if self.base_delay < 0 or self.multiplier < 1 or not 0 <= self.jitter <= 1 or self.max_delay < 0:
+            raise ValueError("Invalid values specified for SQS retry policy")
+        if self.max_delay > 43200:
+            raise ValueError("SQS retry policy max_delay may not exceed 43200 seconds (12 hours)")
+
+    def delay(self, approximate_receive_count: Optional[int]) -> int:
+        attempt = max(approximate_receive_count or 1, 1)
+        try:
+            delay = min(self.base_delay * self.multiplier ** (attempt - 1), self.max_delay)
+        except OverflowError:
+            delay = self.max_delay
+        if self.jitter:
+            delay -= delay * self.jitter * random.random()
+        return max(min(int(round(delay)), 43200), 0)
+
+
 class AWSSNSSQSTransport(Invoker):
     topics: Optional[Dict[str, str]] = None
     queues: Optional[Dict[Tuple[str, Optional[str], Optional[str]], str]] = None
     close_waiter: Optional[asyncio.Future] = None
+    publish_spool: Optional[PublishSpool] = None
+    publish_rate_limiter: Optional[ThroughputLimiter] = None
 
     @overload
     @classmethod
@@ -332,6 +377,7 @@ class AWSSNSSQSTransport(Invoker):
         overwrite_topic_attributes: bool = False,
         group_id: Optional[str] = None,
         deduplication_id: Optional[str] = None,
+        propagate_deadline: bool = True,
         **kwargs: Any,
     ) -> str: ...
 
@@ -352,6 +398,7 @@ class AWSSNSSQSTransport(Invoker):
         overwrite_topic_attributes: bool = False,
         group_id: Optional[str] = None,
         deduplication_id: Optional[str] = None,
+        propagate_deadline: bool = True,
         **kwargs: Any,
     ) -> asyncio.Task[str]: ...
 
@@ -371,6 +418,7 @@ class AWSSNSSQSTransport(Invoker):
         overwrite_topic_attributes: bool = False,
         group_id: Optional[str] = None,
         deduplication_id: Optional[str] = None,
+        propagate_deadline: bool = True,
         **kwargs: Any,
     ) -> Union[str, asyncio.Task[str]]:
         logging.getLogger("tomodachi.awssnssqs").new(logger="tomodachi.awssnssqs")
@@ -397,6 +445,9 @@ class AWSSNSSQSTransport(Invoker):
             )
 
         message_attributes = {} if not message_attributes else copy.deepcopy(message_attributes)
+        deadline = get_deadline() if propagate_deadline else None
+        if deadline is not None and DEADLINE_MESSAGE_ATTRIBUTE not in message_attributes:
+            message_attributes[DEADLINE_MESSAGE_ATTRIBUTE] = format_deadline(deadline)
 
         payload = data
         if message_envelope:
@@ -408,29 +459,64 @@ class AWSSNSSQSTransport(Invoker):
 
         topic_arn: str = cls.topics[topic] if cls.topics and topic in cls.topics and cls.topics[topic] else ""
 
-        if not topic_arn or not isinstance(topic_arn, str):
-            topic_arn = await asyncio.create_task(
-                cls.create_topic(
-                    topic,
-                    service.context,
-                    topic_prefix,
-                    fifo=group_id is not None,
-                    attributes=topic_attributes,
-                    overwrite_attributes=overwrite_topic_attributes,
+        spool = cls.get_publish_spool(service)
+        if group_id is not None and spool is not None and not deduplication_id:
+            # replayed messages are deduplicated by FIFO topics if they were already published
+            deduplication_id = str(uuid.uuid4())
+
+        if (not topic_arn or not isinstance(topic_arn, str)) and not (spool is not None and len(spool)):
+            try:
+                topic_arn = await asyncio.create_task(
+                    cls.create_topic(
+                        topic,
+                        service.context,
+                        topic_prefix,
+                        fifo=group_id is not None,
+                        attributes=topic_attributes,
+                        overwrite_attributes=overwrite_topic_attributes,
+                    )
                 )
+            except Exception as e:
+                if spool is None or not cls.is_transient_error(e):
+                    raise
+                topic_arn = ""
+
+        async def _spool_message() -> str:
+            # messages are spooled behind already spooled messages to keep the order in which they're published
+            await cls.spool_message(
+                {
+                    "topic": topic,
+                    "topic_arn": topic_arn,
+                    "topic_prefix": topic_prefix,
+                    "topic_attributes": topic_attributes,
+                    "overwrite_topic_attributes": overwrite_topic_attributes,
+                    "message": payload,
+                    "message_attributes": message_attributes,
+                    "group_id": group_id,
+                    "deduplication_id": deduplication_id,
+                },
+                service,
             )
+            return SPOOLED_MESSAGE_ID
 
         async def _publish_message() -> str:
             logging.getLogger("tomodachi.awssnssqs").bind(topic=topic)
-            return await cls._publish_message(
-                topic_arn,
-                payload,
-                cast(Dict, message_attributes),
-                service.context,
-                group_id=group_id,
-                deduplication_id=deduplication_id,
-                service=service,
-            )
+            if spool is not None and (len(spool) or not topic_arn):
+                return await _spool_message()
+            try:
+                return await cls._publish_message(
+                    topic_arn,
+                    payload,
+                    cast(Dict, message_attributes),
+                    service.context,
+                    group_id=group_id,
+                    deduplication_id=deduplication_id,
+                    service=service,
+                )
+            except Exception as e:
+                if spool is None or not cls.is_transient_error(e):
+                    raise
+                return await _spool_message()
 
         if wait:
             return await asyncio.create_task(_publish_message())
@@ -456,6 +542,7 @@ class AWSSNSSQSTransport(Invoker):
         message_body_formatter: Optional[
             type[MessageBodyFormatterProtocol] | MessageBodyFormatterProtocol
         ] = MessageBodyFormatter,
+        propagate_deadline: bool = True,
         **kwargs: Any,
     ) -> str: ...
 
@@ -478,6 +565,7 @@ class AWSSNSSQSTransport(Invoker):
         message_body_formatter: Optional[
             type[MessageBodyFormatterProtocol] | MessageBodyFormatterProtocol
         ] = MessageBodyFormatter,
+        propagate_deadline: bool = True,
         **kwargs: Any,
     ) -> asyncio.Task[str]: ...
 
@@ -499,6 +587,7 @@ class AWSSNSSQSTransport(Invoker):
         message_body_formatter: Optional[
             type[MessageBodyFormatterProtocol] | MessageBodyFormatterProtocol
         ] = MessageBodyFormatter,
+        propagate_deadline: bool = True,
         **kwargs: Any,
     ) -> Union[str, asyncio.Task[str]]:
         logging.getLogger("tomodachi.awssnssqs").new(logger="tomodachi.awssnssqs")
@@ -625,6 +714,9 @@ class AWSSNSSQSTransport(Invoker):
             raise error_type(error_value, "GetQueueUrl")
 
         message_attributes = {} if not message_attributes else copy.deepcopy(message_attributes)
+        deadline = get_deadline() if propagate_deadline else None
+        if deadline is not None and DEADLINE_MESSAGE_ATTRIBUTE not in message_attributes:
+            message_attributes[DEADLINE_MESSAGE_ATTRIBUTE] = format_deadline(deadline)
 
         # @todo proper dependency injections for the enveloping of data and message body formatter
         _message_body_formatter: Optional[MessageBodyFormatterProtocol] = None
@@ -822,10 +914,17 @@ class AWSSNSSQSTransport(Invoker):
         max_receive_count: Optional[int] = MAX_RECEIVE_COUNT_DEFAULT,
         fifo: bool = False,
         max_number_of_consumed_messages: Optional[int] = MAX_NUMBER_OF_CONSUMED_MESSAGES,
+        retry_policy: Optional[Union[RetryPolicy, Mapping[str, Any]]] = None,
+        circuit_breaker: Optional[Union[CircuitBreaker, Dict[str, Any], bool]] = None,
         **kwargs: Any,
     ) -> Any:
         parser_kwargs = kwargs
 
+        if retry_policy is not None and not isinstance(retry_policy, RetryPolicy):
+            retry_policy = RetryPolicy(**retry_policy)
+        handler_circuit_breaker = get_circuit_breaker(func.__name__, circuit_breaker)
+        message_inbox = context.get("message_inbox")
+
         if message_envelope == MESSAGE_ENVELOPE_DEFAULT and message_protocol != MESSAGE_ENVELOPE_DEFAULT:
             # Fallback if deprecated message_protocol keyword is used
             message_envelope = message_protocol
@@ -914,6 +1013,17 @@ class AWSSNSSQSTransport(Invoker):
             message_attributes_values: MessageAttributesType = (
                 cls.transform_message_attributes_from_response(message_attributes) if message_attributes else {}
             )
+
+            deadline = parse_deadline(message_attributes_values.get(DEADLINE_MESSAGE_ATTRIBUTE))
+            if deadline is not None and deadline <= time.time():
+                # the message is no longer relevant to process, since the deadline set by its publisher has passed
+                increase_execution_context_value("aws_sns_sqs_deadline_exceeded_messages")
+                logging.getLogger("tomodachi.awssnssqs").info(
+                    "discarded message past deadline", handler=func.__name__, sqs_message_id=sqs_message_id
+                )
+                await cls.delete_message(receipt_handle, queue_url, context)
+                return
+
             message_uuid = None
             message_key = None
 
@@ -1078,9 +1188,22 @@ class AWSSNSSQSTransport(Invoker):
 
                 return return_value
 
+            if message_inbox and message_uuid and await message_inbox.is_duplicate(obj, message_uuid, func.__name__):
+                # the message was already handled, before a restart or by another instance of the service
+                await cls.delete_message(receipt_handle, queue_url, context)
+                return
+
+            if handler_circuit_breaker and not handler_circuit_breaker.allow_request():
+                # the circuit breaker opened after the message was received - make it visible again for other consumers
+                if message_key:
+                    del context["_aws_sns_sqs_received_messages"][message_key]
+                await cls.change_message_visibility(receipt_handle, queue_url, 0, context)
+                return
+
             increase_execution_context_value("aws_sns_sqs_current_tasks")
             increase_execution_context_value("aws_sns_sqs_total_tasks")
             keep_message_in_queue = False
+            deadline_token = set_deadline(deadline) if deadline is not None else None
             try:
                 logging.bind_logger(
                     logging.getLogger("tomodachi.awssnssqs.middleware").bind(
@@ -1109,11 +1232,17 @@ class AWSSNSSQSTransport(Invoker):
                         message_group_id=message_group_id,
                     )
                 )
+                if message_inbox and message_uuid:
+                    await message_inbox.record(obj, message_uuid, func.__name__)
+                if handler_circuit_breaker:
+                    handler_circuit_breaker.record_success()
             except (Exception, asyncio.CancelledError, BaseException) as e:
                 # todo: don't log exception in case the error is of a AWSSNSSQSInternalServiceError (et. al) type
                 limit_exception_traceback(e, ("tomodachi.transport.aws_sns_sqs", "tomodachi.helpers.middleware"))
                 logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
                 return_value = None
+                if handler_circuit_breaker:
+                    handler_circuit_breaker.record_failure()
                 if issubclass(
                     e.__class__,
                     (
@@ -1125,9 +1254,23 @@ class AWSSNSSQSTransport(Invoker):
                     keep_message_in_queue = True
                     if message_key:
                         del context["_aws_sns_sqs_received_messages"][message_key]
+            finally:
+                if deadline_token is not None:
+                    reset_deadline(deadline_token)
 
             if not keep_message_in_queue:
                 await cls.delete_message(receipt_handle, queue_url, context)
+            elif retry_policy is not None:
+                delay = retry_policy.delay(approximate_receive_count)
+                increase_execution_context_value("aws_sns_sqs_delayed_retries")
+                logging.getLogger("tomodachi.awssnssqs").info(
+                    "delayed retry of message",
+                    handler=func.__name__,
+                    sqs_message_id=sqs_message_id,
+                    approximate_receive_count=approximate_receive_count,
+                    delay=delay,
+                )
+                await cls.change_message_visibility(receipt_handle, queue_url, delay, context)
             decrease_execution_context_value("aws_sns_sqs_current_tasks")
 
             return return_value
@@ -1155,6 +1298,7 @@ class AWSSNSSQSTransport(Invoker):
                 max_receive_count,
                 fifo,
                 max_number_of_consumed_messages,
+                handler_circuit_breaker,
             )
         )
 
@@ -1527,6 +1671,7 @@ class AWSSNSSQSTransport(Invoker):
 
         response: Union[PublishResponseTypeDef, Dict[str, Any]] = {}
         for retry in range(1, 4):
+            await cls.limit_publish_rate(topic_arn, context)
             try:
                 async with connector("tomodachi.sns", service_name="sns") as client:
                     response = await asyncio.wait_for(
@@ -1553,6 +1698,9 @@ class AWSSNSSQSTransport(Invoker):
                         "Unable to publish message [sns] on AWS ({})".format(error_message)
                     )
                     raise AWSSNSSQSException(error_message, log_level=context.get("log_level")) from e
+                if cls.is_throttling_error(e):
+                    # retrying throttled requests right away would add to the throttling
+                    await asyncio.sleep(0.2 * 2 ** (retry - 1))
                 continue
             # AWS API can respond with empty body as 408 error - botocore adds "Further retries may succeed"
             except ResponseParserError as e:
@@ -1571,6 +1719,131 @@ class AWSSNSSQSTransport(Invoker):
 
         return message_id
 
+    @classmethod
+    async def limit_publish_rate(cls, key: str, context: Dict) -> None:
+        # publishes exceeding the throughput limit of a topic or queue wait in line instead of being throttled by AWS
+        aws_sns_sqs_options: Options.AWSSNSSQS = cls.options(context).aws_sns_sqs
+        rate = aws_sns_sqs_options.publish_rate_limit or None
+        rates = aws_sns_sqs_options.publish_rate_limits or {}
+        if not rate and not rates:
+            return
+
+        limiter = cls.publish_rate_limiter
+        burst = aws_sns_sqs_options.publish_rate_limit_burst
+        if (
+            limiter is None
+            or limiter.rate != rate
+            or limiter.rates != rates
+            or (burst is not None and limiter.burst != burst)
+        ):
+            limiter = cls.publish_rate_limiter = ThroughputLimiter(rate, burst, rates)
+
+        # topics and queues are limited by their name (the last part of the topic ARN or the queue URL)
+        name = key.rsplit(":", 1)[-1] if key.startswith("arn:") else key.rsplit("/", 1)[-1]
+        waited = await limiter.acquire(name)
+        if waited:
+            increase_execution_context_value("aws_sns_sqs_publish_rate_limited_messages")
+            increase_execution_context_value("aws_sns_sqs_publish_rate_limit_wait_time_ms", int(waited * 1000))
+
+    @classmethod
+    def get_publish_spool(cls, service: Any) -> Optional[PublishSpool]:
+        if cls.publish_spool is None:
+            aws_sns_sqs_options: Options.AWSSNSSQS = cls.options(service.context).aws_sns_sqs
+            if not aws_sns_sqs_options.spool_directory:
+                return None
+
+            spool = PublishSpool(
+                aws_sns_sqs_options.spool_directory,
+                "aws_sns_sqs",
+                segment_size=aws_sns_sqs_options.spool_segment_size,
+                fsync=aws_sns_sqs_options.spool_fsync,
+            )
+            cls.publish_spool = spool
+
+            stop_method = getattr(service, "_stop_service", None)
+
+            async def stop_service(*args: Any, **kwargs: Any) -> None:
+                if stop_method:
+                    await stop_method(*args, **kwargs)
+                await spool.close()
+                if cls.publish_spool is spool:
+                    cls.publish_spool = None
+
+            setattr(service, "_stop_service", stop_service)
+
+            # messages spooled before a restart are published again
+            if len(spool):
+                spool.start_drain(functools.partial(cls.replay_spooled_message, service))
+
+        return cls.publish_spool
+
+    @classmethod
+    async def spool_message(cls, record: Dict[str, Any], service: Any) -> None:
+        spool = cls.publish_spool
+        if spool is None:
+            return
+        await spool.append(record)
+        spool.start_drain(functools.partial(cls.replay_spooled_message, service))
+
+    @classmethod
+    async def replay_spooled_message(cls, service: Any, record: Dict[str, Any]) -> None:
+        try:
+            topic_arn = record["topic_arn"]
+            if not topic_arn:
+                topic_arn = await cls.create_topic(
+                    record["topic"],
+                    service.context,
+                    record["topic_prefix"],
+                    fifo=record["group_id"] is not None,
+                    attributes=record["topic_attributes"],
+                    overwrite_attributes=record["overwrite_topic_attributes"],
+                )
+            await cls._publish_message(
+                topic_arn,
+                record["message"],
+                record["message_attributes"],
+                service.context,
+                group_id=record["group_id"],
+                deduplication_id=record["deduplication_id"],
+                service=service,
+            )
+        except Exception as e:
+            if cls.is_transient_error(e):
+                raise
+            # messages that can't be published are discarded, since they would block the replay of later messages
+            increase_execution_context_value("aws_sns_sqs_spool_discarded_messages")
+            logging.getLogger("tomodachi.awssnssqs").warning(
+                "Unable to publish spooled message [sns] on AWS ({})".format(str(e) or e.__class__.__name__),
+                topic=record["topic"],
+            )
+
+    @staticmethod
+    def is_throttling_error(exception: BaseException) -> bool:
+        if isinstance(exception, botocore.exceptions.ClientError):
+            error_code = exception.response.get("Error", {}).get("Code") or ""
+            return "Throttl" in error_code or error_code in ("TooManyRequestsException", "RequestThrottled")
+        return False
+
+    @classmethod
+    def is_transient_error(cls, exception: BaseException) -> bool:
+        # connection errors, timeouts, server errors and throttling
+        error = exception.__cause__ if isinstance(exception, AWSSNSSQSException) else exception
+        if isinstance(error, botocore.exceptions.ClientError):
+            status_code = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+            return status_code >= 500 or cls.is_throttling_error(error)
+        return isinstance(
+            error,
+            (
+                aiohttp.client_exceptions.ClientError,
+                botocore.exceptions.EndpointConnectionError,
+                botocore.exceptions.ConnectionClosedError,
+                ResponseParserError,
+                asyncio.TimeoutError,
+                OSError,
+                RuntimeError,
+            ),
+        )
+
     @classmethod
     async def send_raw_message(
         cls,
@@ -1631,6 +1904,7 @@ class AWSSNSSQSTransport(Invoker):
 
         response: Union[SendMessageResultTypeDef, Dict[str, Any]] = {}
         for retry in range(1, 4):
+            await cls.limit_publish_rate(queue_url, context)
             try:
                 async with connector("tomodachi.sqs", service_name="sqs") as client:
                     response = await asyncio.wait_for(
@@ -1657,6 +1931,9 @@ class AWSSNSSQSTransport(Invoker):
                         "Unable to send message [sqs] on AWS ({})".format(error_message)
                     )
                     raise AWSSNSSQSException(error_message, log_level=context.get("log_level")) from e
+                if cls.is_throttling_error(e):
+                    # retrying throttled requests right away would add to the throttling
+                    await asyncio.sleep(0.2 * 2 ** (retry - 1))
                 continue
             # AWS API can respond with empty body as 408 error - botocore adds "Further retries may succeed"
             except ResponseParserError as e:
@@ -1724,6 +2001,107 @@ class AWSSNSSQSTransport(Invoker):
 
         await _delete_message()
 
+    @classmethod
+    async def change_message_visibility(
+        cls, receipt_handle: str, queue_url: str, visibility_timeout: int, context: Dict
+    ) -> None:
+        if not receipt_handle:
+            logging.getLogger("tomodachi.awssnssqs").warning(
+                "Unable to change visibility of message [sqs] without receipt handle", queue_url=queue_url
+            )
+            return
+
+        if not connector.get_client("tomodachi.sqs"):
+            await cls.create_client("sqs", context)
+
+        for retry in range(1, 5):
+            try:
+                async with connector("tomodachi.sqs", service_name="sqs") as client:
+                    await asyncio.wait_for(
+                        client.change_message_visibility(
+                            ReceiptHandle=receipt_handle, QueueUrl=queue_url, VisibilityTimeout=visibility_timeout
+                        ),
+                        timeout=12,
+                    )
+            except (
+                aiohttp.client_exceptions.ServerDisconnectedError,
+                aiohttp.client_exceptions.ClientConnectorError,
+                RuntimeError,
+                asyncio.CancelledError,
+            ) as e:
+                if retry >= 4:
+                    raise e
+                continue
+            except botocore.exceptions.ClientError as e:
+                # the message will instead become visible again when the visibility timeout of the queue has passed
+                error_message = str(e)
+                logging.getLogger("tomodachi.awssnssqs").warning(
+                    "Unable to change visibility of message [sqs] on AWS ({})".format(error_message)
+                )
+            except asyncio.TimeoutError as e:
+                if retry >= 4:
+                    error_message = "Network timeout"
+                    logging.getLogger("tomodachi.awssnssqs").warning(
+                        "Unable to change visibility of message [sqs] on AWS ({})".format(error_message)
+                    )
+                    raise AWSSNSSQSException(error_message, log_level=context.get("log_level")) from e
+                continue
+            except ResponseParserError as e:
+                if retry >= 4 or "Further retries may succeed" not in str(e):
+                    raise e
+                continue
+            break
+
+    @classmethod
+    async def release_messages(cls, receipt_handles: List[str], queue_url: str, context: Dict) -> None:
+        # Makes received messages that won't be handled visible again in the queue, so that they can be received
+        # immediately by other consumers, for example when messages are received while the service is stopping.
+        receipt_handles = [receipt_handle for receipt_handle in receipt_handles if receipt_handle]
+        if not receipt_handles:
+            return
+
+        if not connector.get_client("tomodachi.sqs"):
+            await cls.create_client("sqs", context)
+
+        released_count = 0
+        for i in range(0, len(receipt_handles), 10):
+            entries = [
+                {"Id": str(index), "ReceiptHandle": receipt_handle, "VisibilityTimeout": 0}
+                for index, receipt_handle in enumerate(receipt_handles[i : i + 10])
+            ]
+            try:
+                async with connector("tomodachi.sqs", service_name="sqs") as client:
+                    response = await asyncio.wait_for(
+                        client.change_message_visibility_batch(QueueUrl=queue_url, Entries=entries), timeout=12
+                    )
+            except (
+                botocore.exceptions.ClientError,
+                aiohttp.client_exceptions.ServerDisconnectedError,
+                aiohttp.client_exceptions.ClientConnectorError,
+                ResponseParserError,
+                RuntimeError,
+                asyncio.TimeoutError,
+            ) as e:
+                error_message = str(e) if not isinstance(e, asyncio.TimeoutError) else "Network timeout"
+                logging.getLogger("tomodachi.awssnssqs").warning(
+                    "Unable to release messages [sqs] on AWS ({})".format(error_message), queue_url=queue_url
+                )
+                continue
+
+            released_count += len(entries) - len(response.get("Failed", []))
+            if response.get("Failed"):
+                logging.getLogger("tomodachi.awssnssqs").warning(
+                    "Unable to release messages [sqs] on AWS",
+                    queue_url=queue_url,
+                    failed_count=len(response.get("Failed", [])),
+                )
+
+        if released_count:
+            increase_execution_context_value("aws_sns_sqs_released_messages", released_count)
+            logging.getLogger("tomodachi.awssnssqs").info(
+                "released received messages", queue_url=queue_url, message_count=released_count
+            )
+
     @classmethod
     async def get_queue_url_from_arn(cls, queue_arn: str, context: Dict) -> Optional[str]:
         if not queue_arn.startswith("arn:aws:sqs:"):
@@ -2530,6 +2908,7 @@ class AWSSNSSQSTransport(Invoker):
         topic: Optional[str],
         queue_name: Optional[str],
         max_number_of_consumed_messages: int,
+        circuit_breaker: Optional[CircuitBreaker] = None,
     ) -> None:
         logger = logging.getLogger()
 
@@ -2546,6 +2925,20 @@ class AWSSNSSQSTransport(Invoker):
 
         stop_waiter: asyncio.Future = asyncio.Future()
         start_waiter: asyncio.Future = asyncio.Future()
+        release_tasks: List[asyncio.Future] = []
+
+        async def release_in_flight_receive(receive_task: asyncio.Future) -> None:
+            done, _ = await asyncio.wait([receive_task], timeout=2)
+            if not done:
+                receive_task.cancel()
+                return
+            if receive_task.cancelled() or receive_task.exception():
+                return
+            messages = receive_task.result().get("Messages", [])
+            if messages:
+                await cls.release_messages(
+                    [message.get("ReceiptHandle", "") for message in messages], queue_url, context
+                )
 
         async def receive_messages() -> None:
             logger = logging.getLogger("tomodachi.awssnssqs").bind(
@@ -2600,10 +2993,23 @@ class AWSSNSSQSTransport(Invoker):
                     # be able to ensure their execution order.
                     message_limit = 1 if queue_url.endswith(".fifo") else max_number_of_consumed_messages
 
+                    if circuit_breaker and circuit_breaker.state != CLOSED:
+                        if circuit_breaker.state == OPEN:
+                            # no messages are received while the circuit is open
+                            sleep_task: asyncio.Future = asyncio.ensure_future(
+                                asyncio.sleep(circuit_breaker.remaining_open_time())
+                            )
+                            await asyncio.wait([sleep_task, cls.close_waiter], return_when=asyncio.FIRST_COMPLETED)
+                            if not sleep_task.done():
+                                sleep_task.cancel()
+                            continue
+                        # half-open circuit - a limited number of messages are received to probe if the handler has recovered
+                        message_limit = min(message_limit, circuit_breaker.half_open_max_calls)
+
                     try:
                         try:
                             async with connector("tomodachi.sqs", service_name="sqs") as client:
-                                response = await asyncio.wait_for(
+                                receive_task = asyncio.ensure_future(
                                     client.receive_message(
                                         QueueUrl=queue_url,
                                         WaitTimeSeconds=wait_time_seconds,
@@ -2614,9 +3020,18 @@ class AWSSNSSQSTransport(Invoker):
                                             "MessageGroupId",
                                         ],
                                         MessageAttributeNames=["All"],
-                                    ),
-                                    timeout=40,
+                                    )
                                 )
+                                try:
+                                    response = await asyncio.wait_for(asyncio.shield(receive_task), timeout=40)
+                                except asyncio.TimeoutError:
+                                    receive_task.cancel()
+                                    raise
+                                except asyncio.CancelledError:
+                                    # the receiver is stopped - messages received by the in-flight request are made
+                                    # visible again, instead of being left invisible until their visibility timeout.
+                                    release_tasks.append(asyncio.ensure_future(release_in_flight_receive(receive_task)))
+                                    raise
                             if is_disconnected:
                                 is_disconnected = False
                                 logger.warning("Reconnected - receiving messages")
@@ -2695,6 +3110,12 @@ class AWSSNSSQSTransport(Invoker):
                         if not messages:
                             continue
 
+                        if not cls.close_waiter or cls.close_waiter.done():
+                            await cls.release_messages(
+                                [message.get("ReceiptHandle", "") for message in messages], queue_url, context
+                            )
+                            continue
+
                         for message in messages:
                             receipt_handle: str = message.get("ReceiptHandle", "")
                             raw_message_body = message.get("Body", "")
@@ -2825,6 +3246,8 @@ class AWSSNSSQSTransport(Invoker):
                         )
 
                 await stop_waiter
+                if release_tasks:
+                    await asyncio.wait(release_tasks)
                 if stop_method:
                     await stop_method(*args, **kwargs)
                 await connector.close()
@@ -3020,6 +3443,7 @@ class AWSSNSSQSTransport(Invoker):
                     max_receive_count,
                     fifo,
                     max_number_of_consumed_messages,
+                    handler_circuit_breaker,
                 ) in context.get("_aws_sns_sqs_subscribers", []):
                     queue_url = await asyncio.create_task(
                         setup_queue(
@@ -3044,6 +3468,7 @@ class AWSSNSSQSTransport(Invoker):
                             topic=topic,
                             queue_name=queue_name,
                             max_number_of_consumed_messages=max_number_of_consumed_messages,
+                            circuit_breaker=handler_circuit_breaker,
                         )
                     )
             except Exception:
@@ -3082,6 +3507,8 @@ def aws_sns_sqs(
     max_receive_count: Optional[int] = MAX_RECEIVE_COUNT_DEFAULT,
     fifo: bool = False,
     max_number_of_consumed_messages: Optional[int] = MAX_NUMBER_OF_CONSUMED_MESSAGES,
+    retry_policy: Optional[Union[RetryPolicy, Mapping[str, Any]]] = None,
+    circuit_breaker: Optional[Union[CircuitBreaker, Dict[str, Any], bool]] = None,
     **kwargs: Any,
 ) -> Callable:
     return cast(
@@ -3099,6 +3526,8 @@ def aws_sns_sqs(
             max_receive_count=max_receive_count,
             fifo=fifo,
             max_number_of_consumed_messages=max_number_of_consumed_messages,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
             **kwargs,
         ),
     )
@@ -3118,6 +3547,8 @@ def awssnssqs(
     max_receive_count: Optional[int] = MAX_RECEIVE_COUNT_DEFAULT,
     fifo: bool = False,
     max_number_of_consumed_messages: Optional[int] = MAX_NUMBER_OF_CONSUMED_MESSAGES,
+    retry_policy: Optional[Union[RetryPolicy, Mapping[str, Any]]] = None,
+    circuit_breaker: Optional[Union[CircuitBreaker, Dict[str, Any], bool]] = None,
     **kwargs: Any,
 ) -> Callable:
     return cast(
@@ -3135,6 +3566,8 @@ def awssnssqs(
             max_receive_count=max_receive_count,
             fifo=fifo,
             max_number_of_consumed_messages=max_number_of_consumed_messages,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
             **kwargs,
         ),
     )
@@ -4,17 +4,37 @@ import asyncio
 import functools
 import inspect
 import ipaddress
+import json
+import math
 import os
 import pathlib
 import platform
+import random
 import re
 import time
 import uuid
 import warnings
-from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, SupportsInt, Tuple, Union, cast
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    SupportsInt,
+    Tuple,
+    Union,
+    cast,
+)
 
 import yarl
-from aiohttp import WSMsgType
+from aiohttp import WSCloseCode, WSMsgType
 from aiohttp import __version__ as aiohttp_version
 from aiohttp import hdrs, web, web_protocol, web_server, web_urldispatcher
 from aiohttp.helpers import BasicAuth
@@ -25,15 +45,21 @@ from multidict import CIMultiDict, CIMultiDictProxy
 
 from tomodachi import get_contextvar, logging
 from tomodachi._exception import limit_exception_traceback
+from tomodachi.helpers.deadline import REQUEST_TIMEOUT_HEADER, parse_deadline, reset_deadline, set_deadline
 from tomodachi.helpers.execution_context import (
     decrease_execution_context_value,
     increase_execution_context_value,
     set_execution_context,
 )
+from tomodachi.helpers.limiters import ConcurrencyLimiter, RateLimiter
 from tomodachi.helpers.middleware import execute_middlewares
+from tomodachi.helpers.single_flight import SingleFlight
 from tomodachi.invoker import Invoker
 from tomodachi.options import Options
 
+# aiohttp versions prior to 3.9 cancel the task running the request handler when the client disconnects
+AIOHTTP_CANCELS_HANDLERS = tuple(int(v) for v in re.findall(r"\d+", aiohttp_version)[:2]) < (3, 9)
+
 
 class HttpException(Exception):
     pass
@@ -253,7 +279,7 @@ class Response(object):
     def __init__(
         self,
         *,
-        body: Optional[Union[bytes, str]] = None,
+        body: Optional[Union[bytes, str, AsyncIterable[Union[str, bytes]]]] = None,
         status: int = 200,
         reason: Optional[str] = None,
         headers: Optional[Union[Dict, CIMultiDict, CIMultiDictProxy]] = None,
@@ -276,11 +302,21 @@ class Response(object):
 
     def get_aiohttp_response(
         self, context: Dict, default_charset: Optional[str] = None, default_content_type: Optional[str] = None
-    ) -> web.Response:
+    ) -> Union[web.Response, AsyncIteratorResponse]:
         if self.missing_content_type:
             self.charset = default_charset
             self.content_type = default_content_type
 
+        if hasattr(self._body, "__aiter__"):
+            return AsyncIteratorResponse(
+                cast(AsyncIterable, self._body),
+                status=self._status,
+                reason=self._reason,
+                headers=self._headers,
+                content_type=self.content_type,
+                charset=self.charset,
+            )
+
         charset = self.charset
         if hdrs.CONTENT_TYPE in self._headers and ";" in self._headers[hdrs.CONTENT_TYPE]:
             try:
@@ -317,6 +353,446 @@ class Response(object):
         return response
 
 
+class AsyncIteratorResponse(web.StreamResponse):
+    # Chunked response with a body from an async iterator (such as an async generator returned from a handler), which
+    # is written to the client as the chunks are produced. Writes are awaited until the transport buffer is drained.
+    STARTED_KEY = "_tomodachi_response_started"
+
+    def __init__(
+        self,
+        body: AsyncIterable[Union[str, bytes]],
+        status: int = 200,
+        reason: Optional[str] = None,
+        headers: Optional[Union[Dict, CIMultiDict, CIMultiDictProxy]] = None,
+        content_type: Optional[str] = None,
+        charset: Optional[str] = None,
+    ) -> None:
+        super().__init__(status=status, reason=reason, headers=headers)
+        self._body_iterable = body
+
+        if hdrs.CONTENT_TYPE not in self.headers:
+            self.content_type = content_type or "application/octet-stream"
+            if charset:
+                self.charset = charset
+
+    def encode_chunk(self, chunk: Union[str, bytes]) -> bytes:
+        if isinstance(chunk, str):
+            return chunk.encode(self.charset or "utf-8")
+        return chunk
+
+    async def write_body(self, request: web.BaseRequest, context: Dict) -> None:
+        async for chunk in self._body_iterable:
+            if chunk:
+                await self.write(self.encode_chunk(chunk))
+
+    async def stream(self, request: web.BaseRequest, context: Dict) -> None:
+        if not use_keepalive(request, context):
+            # the headers are sent before the request handler decides on keep-alive, which closes the connection after
+            # the response - the client is told so in the headers instead of having the connection dropped on reuse
+            self.force_close()
+        await self.prepare(request)
+        request[self.STARTED_KEY] = True
+        try:
+            await self.write_body(request, context)
+            await self.write_eof()
+        except ConnectionError:
+            # client disconnected - logged as status code 499 by the access log
+            pass
+        except Exception as e:
+            # the response has already been prepared - the connection is closed to end the response prematurely
+            limit_exception_traceback(e, ("tomodachi.transport.http",))
+            logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
+            self._eof_sent = True
+            self.force_close()
+            if request.transport is not None:
+                request.transport.close()
+        finally:
+            close_func = getattr(self._body_iterable, "aclose", None)
+            if close_func:
+                await close_func()
+
+
+class EventStreamResponse(AsyncIteratorResponse):
+    # Server-sent events (text/event-stream) - events are written as they are produced and a comment line is sent as a
+    # heartbeat when there hasn't been any events within the heartbeat interval, which keeps the connection open through
+    # proxies and detects disconnected clients. Open event streams are ended when the service is stopping.
+    def __init__(
+        self,
+        events: AsyncIterable[Union[str, Dict[str, Any]]],
+        status: int = 200,
+        headers: Optional[Union[Dict, CIMultiDict, CIMultiDictProxy]] = None,
+        heartbeat_interval: Optional[float] = 15.0,
+        retry: Optional[int] = None,
+    ) -> None:
+        super().__init__(cast(AsyncIterable, events), status=status, headers=headers)
+        self.content_type = "text/event-stream"
+        self.charset = "utf-8"
+        self.headers[hdrs.CACHE_CONTROL] = "no-cache"
+        self.headers["X-Accel-Buffering"] = "no"
+        self.heartbeat_interval = heartbeat_interval
+        self.retry = retry
+        self._stop_waiter: Optional[asyncio.Future] = None
+
+    @staticmethod
+    def encode_event(event: Union[str, Dict[str, Any]]) -> str:
+        if not isinstance(event, dict):
+            event = {"data": event}
+
+        lines = []
+        for field in ("id", "event", "retry"):
+            if event.get(field) is not None:
+                lines.append("{}: {}".format(field, str(event[field]).replace("\n", " ").replace("\r", " ")))
+
+        data = event.get("data")
+        if data is not None:
+            if not isinstance(data, str):
+                data = json.dumps(data)
+            lines.extend(["data: {}".format(line) for line in data.splitlines() or [""]])
+
+        return "\n".join(lines) + "\n\n"
+
+    def stop(self) -> None:
+        if self._stop_waiter and not self._stop_waiter.done():
+            self._stop_waiter.set_result(None)
+
+    async def write_body(self, request: web.BaseRequest, context: Dict) -> None:
+        self._stop_waiter = asyncio.Future()
+        context["_http_open_event_streams"] = context.get("_http_open_event_streams", set())
+        context["_http_open_event_streams"].add(self)
+
+        iterator: AsyncIterator = self._body_iterable.__aiter__()
+        next_task: Optional[asyncio.Future] = None
+
+        try:
+            if self.retry is not None:
+                await self.write("retry: {}\n\n".format(int(self.retry)).encode())
+
+            while True:
+                if next_task is None:
+                    next_task = asyncio.ensure_future(iterator.__anext__())
+
+                done, _ = await asyncio.wait(
+                    [next_task, self._stop_waiter], timeout=self.heartbeat_interval, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if self._stop_waiter.done():
+                    break
+
+                if next_task not in done:
+                    if request.transport is None or request.transport.is_closing():
+                        break
+                    await self.write(b": heartbeat\n\n")
+                    continue
+
+                try:
+                    event = next_task.result()
+                except StopAsyncIteration:
+                    next_task = None
+                    break
+                next_task = None
+
+                await self.write(self.encode_event(event).encode("utf-8"))
+        finally:
+            if next_task is not None and not next_task.done():
+                next_task.cancel()
+                await asyncio.wait([next_task])
+            context["_http_open_event_streams"].discard(self)
+
+
+def event_stream(
+    events: AsyncIterable[Union[str, Dict[str, Any]]],
+    *,
+    status: int = 200,
+    headers: Optional[Union[Dict, CIMultiDict, CIMultiDictProxy]] = None,
+    heartbeat_interval: Optional[float] = 15.0,
+    retry: Optional[int] = None,
+) -> EventStreamResponse:
+    return EventStreamResponse(
+        events, status=status, headers=headers, heartbeat_interval=heartbeat_interval, retry=retry
+    )
+
+
+class RequestBodyStream(object):
+    # Async iterator over the chunks of a request body, which is used instead of buffering the whole body in memory.
+    # Chunks are read from the connection as they are consumed, which applies back-pressure on the client. The size
+    # limit is applied in the same way as aiohttp applies client_max_size when reading the full body.
+    __slots__ = ("request", "max_size", "chunk_size", "size")
+
+    def __init__(self, request: web.Request, max_size: int, chunk_size: int = 64 * 1024) -> None:
+        self.request = request
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.size = 0
+
+        content_length = request.content_length
+        if self.max_size > 0 and content_length is not None and content_length >= self.max_size:
+            raise web.HTTPRequestEntityTooLarge(max_size=self.max_size, actual_size=content_length)
+
+    def __aiter__(self) -> RequestBodyStream:
+        return self
+
+    async def __anext__(self) -> bytes:
+        chunk = await self.request.content.read(self.chunk_size)
+        if not chunk:
+            raise StopAsyncIteration
+
+        self.size += len(chunk)
+        if self.max_size > 0 and self.size >= self.max_size:
+            raise web.HTTPRequestEntityTooLarge(max_size=self.max_size, actual_size=self.size)
+
+        return chunk
+
+
+class WebSocketHub(object):
+    # Fans out messages to subscribed websocket connections. Each connection has a bounded send queue which is written
+    # to the client by a dedicated writer task, so that a slow client won't hold back messages to the other clients.
+    # Messages are serialized once per broadcast and the same payload is queued for every subscribed connection.
+    __slots__ = (
+        "max_queue_size",
+        "slow_consumer_policy",
+        "_connections",
+        "_topics",
+        "sent_messages",
+        "dropped_messages",
+        "disconnected_slow_consumers",
+    )
+
+    SLOW_CONSUMER_POLICIES = ("drop", "disconnect")
+    HUBS_KEY = "_tomodachi_websocket_hubs"
+
+    def __init__(self, *, max_queue_size: int = 100, slow_consumer_policy: str = "drop") -> None:
+        if max_queue_size < 1:
+            raise ValueError("Invalid max queue size: {}".format(max_queue_size))
+        if slow_consumer_policy not in self.SLOW_CONSUMER_POLICIES:
+            raise ValueError("Invalid slow consumer policy: {}".format(slow_consumer_policy))
+
+        self.max_queue_size = max_queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self._connections: Dict[web.WebSocketResponse, WebSocketHubConnection] = {}
+        self._topics: Dict[str, Set[WebSocketHubConnection]] = {}
+        self.sent_messages = 0
+        self.dropped_messages = 0
+        self.disconnected_slow_consumers = 0
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def subscribe(self, websocket: web.WebSocketResponse, *topics: str) -> None:
+        connection = self._connections.get(websocket)
+        if connection is None:
+            connection = WebSocketHubConnection(websocket, self)
+            self._connections[websocket] = connection
+            hubs = websocket.get(self.HUBS_KEY)
+            if hubs is None:
+                hubs = websocket[self.HUBS_KEY] = set()
+            hubs.add(self)
+
+        for topic in topics:
+            connection.topics.add(topic)
+            self._topics.setdefault(topic, set()).add(connection)
+
+    def unsubscribe(self, websocket: web.WebSocketResponse, *topics: str) -> None:
+        # Unsubscribes the connection from the specified topics, or removes the connection from the hub altogether if
+        # no topics are specified.
+        connection = self._connections.get(websocket)
+        if connection is None:
+            return
+
+        for topic in topics or tuple(connection.topics):
+            connection.topics.discard(topic)
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self._topics[topic]
+
+        if not topics:
+            self._remove(connection)
+
+    def broadcast(self, message: Any, topic: Optional[str] = None) -> int:
+        # Queues the message to every connection subscribed to the topic (or all connections if no topic is given) and
+        # returns the number of connections it was queued to. Other values than str and bytes are encoded as JSON.
+        connections = self._connections.values() if topic is None else self._topics.get(topic, ())
+        if not connections:
+            return 0
+
+        data = self.encode_message(message)
+        queued = 0
+        for connection in tuple(connections):
+            if connection.enqueue(data):
+                queued += 1
+
+        return queued
+
+    def send(self, websocket: web.WebSocketResponse, message: Any) -> bool:
+        connection = self._connections.get(websocket)
+        if connection is None:
+            return False
+        return connection.enqueue(self.encode_message(message))
+
+    def topics(self) -> List[str]:
+        return list(self._topics.keys())
+
+    def stats(self) -> Dict[str, int]:
+        queue_depths = [len(connection.queue) for connection in self._connections.values()]
+        return {
+            "connections": len(self._connections),
+            "topics": len(self._topics),
+            "queued_messages": sum(queue_depths),
+            "max_queue_depth": max(queue_depths) if queue_depths else 0,
+            "sent_messages": self.sent_messages,
+            "dropped_messages": self.dropped_messages,
+            "disconnected_slow_consumers": self.disconnected_slow_consumers,
+        }
+
+    @staticmethod
+    def encode_message(message: Any) -> Union[str, bytes]:
+        if isinstance(message, (str, bytes)):
+            return message
+        return json.dumps(message)
+
+    @classmethod
+    def discard_websocket(cls, websocket: web.WebSocketResponse) -> None:
+        for hub in tuple(websocket.get(cls.HUBS_KEY, ())):
+            hub.unsubscribe(websocket)
+
+    def _remove(self, connection: WebSocketHubConnection) -> None:
+        if self._connections.get(connection.websocket) is not connection:
+            return
+
+        del self._connections[connection.websocket]
+        for topic in connection.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self._topics[topic]
+        connection.topics.clear()
+        connection.websocket.get(self.HUBS_KEY, set()).discard(self)
+        connection.stop()
+
+
+class WebSocketHubConnection(object):
+    __slots__ = ("websocket", "hub", "topics", "queue", "_ready", "_writer")
+
+    def __init__(self, websocket: web.WebSocketResponse, hub: WebSocketHub) -> None:
+        self.websocket = websocket
+        self.hub = hub
+        self.topics: Set[str] = set()
+        self.queue: Deque[Union[str, bytes]] = deque()
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Future] = asyncio.ensure_future(self._write())
+
+    def enqueue(self, data: Union[str, bytes]) -> bool:
+        if len(self.queue) >= self.hub.max_queue_size:
+            if self.hub.slow_consumer_policy == "disconnect":
+                self.hub.disconnected_slow_consumers += 1
+                self.hub._remove(self)
+                asyncio.ensure_future(self._close(WSCloseCode.TRY_AGAIN_LATER))
+                return False
+
+            # drop the oldest queued message, so that the client receives the most recent messages
+            self.queue.popleft()
+            self.hub.dropped_messages += 1
+
+        self.queue.append(data)
+        self._ready.set()
+        return True
+
+    def stop(self) -> None:
+        self.queue.clear()
+        if self._writer is not None and not self._writer.done():
+            self._writer.cancel()
+        self._writer = None
+
+    async def _write(self) -> None:
+        websocket = self.websocket
+        queue = self.queue
+        try:
+            while True:
+                while queue:
+                    data = queue.popleft()
+                    if isinstance(data, str):
+                        await websocket.send_str(data)
+                    else:
+                        await websocket.send_bytes(data)
+                    self.hub.sent_messages += 1
+                self._ready.clear()
+                await self._ready.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # the connection was closed or broken - the websocket handler is ended by the connection being closed
+            self._writer = None
+            self.hub._remove(self)
+
+    async def _close(self, code: int) -> None:
+        try:
+            await self.websocket.close(code=code, message=b"slow consumer")
+        except Exception:
+            pass
+
+
+class AccessLogRouteStatistics(object):
+    __slots__ = ("request_count", "max_request_time", "status_codes", "samples")
+
+    def __init__(self) -> None:
+        self.request_count = 0
+        self.max_request_time = 0.0
+        self.status_codes: Dict[int, int] = {}
+        self.samples: List[float] = []
+
+
+class AccessLogSummary(object):
+    # Aggregates the number of requests, status codes and request times per route between periodically logged
+    # summaries. Latency percentiles are calculated from a bounded uniform sample of each route's request times.
+    __slots__ = ("max_samples", "_routes")
+
+    def __init__(self, max_samples: int = 1000) -> None:
+        self.max_samples = max_samples
+        self._routes: Dict[Optional[str], AccessLogRouteStatistics] = {}
+
+    def add(self, route: Optional[str], status_code: int, request_time: float) -> None:
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = AccessLogRouteStatistics()
+
+        stats.request_count += 1
+        if request_time > stats.max_request_time:
+            stats.max_request_time = request_time
+        stats.status_codes[status_code] = stats.status_codes.get(status_code, 0) + 1
+        if len(stats.samples) < self.max_samples:
+            stats.samples.append(request_time)
+        else:
+            i = random.randrange(stats.request_count)
+            if i < self.max_samples:
+                stats.samples[i] = request_time
+
+    def flush(self) -> List[Dict[str, Any]]:
+        routes = self._routes
+        self._routes = {}
+
+        result = []
+        for route, stats in routes.items():
+            samples = sorted(stats.samples)
+            result.append(
+                {
+                    "handler": route,
+                    "request_count": stats.request_count,
+                    "status_codes": {str(k): v for k, v in sorted(stats.status_codes.items())},
+                    "request_time_p50": self.percentile(samples, 50),
+                    "request_time_p90": self.percentile(samples, 90),
+                    "request_time_p99": self.percentile(samples, 99),
+                    "request_time_max": stats.max_request_time,
+                }
+            )
+        return result
+
+    @staticmethod
+    def percentile(sorted_values: List[float], percent: float) -> float:
+        return sorted_values[max(math.ceil(len(sorted_values) * percent / 100.0) - 1, 0)]
+
+
 class HttpTransport(Invoker):
     server_port_mapping: Dict[Any, str] = {}
 
@@ -331,11 +807,44 @@ class HttpTransport(Invoker):
         *,
         ignore_logging: Union[bool, List[int], Tuple[int, ...]] = False,
         pre_handler_func: Optional[Callable] = None,
+        stream_request_body: bool = False,
+        client_max_size: Optional[Union[str, int]] = None,
+        max_concurrent_requests: Optional[int] = None,
+        max_queued_requests: Optional[int] = None,
+        max_queue_time: Optional[float] = None,
+        ignore_concurrency_limit: bool = False,
+        rate_limit: Optional[float] = None,
+        rate_limit_burst: Optional[int] = None,
+        rate_limit_key: Optional[Callable[[web.Request], Any]] = None,
+        coalesce_requests: bool = False,
+        coalesce_headers: Optional[Union[str, List[str], Tuple[str, ...]]] = None,
     ) -> Any:
         pattern = r"^{}$".format(re.sub(r"\$$", "", re.sub(r"^\^?(.*)$", r"\1", url)))
         compiled_pattern = re.compile(pattern)
 
         http_options: Options.HTTP = cls.options(context).http
+        route_client_max_size = (
+            parse_client_max_size(client_max_size, upper_limit=None if stream_request_body else 1024**3)
+            if client_max_size is not None
+            else None
+        )
+        route_concurrency_limiter = (
+            ConcurrencyLimiter(
+                max_concurrent_requests,
+                max_queued=max_queued_requests if max_queued_requests is not None else http_options.max_queued_requests,
+                max_queue_time=max_queue_time if max_queue_time is not None else http_options.max_queue_time,
+            )
+            if max_concurrent_requests
+            else None
+        )
+        route_rate_limiter = RateLimiter(rate_limit, burst=rate_limit_burst) if rate_limit else None
+        single_flight = SingleFlight() if coalesce_requests else None
+        # requests with different credentials never share a response
+        coalesce_header_names: Tuple[str, ...] = (
+            hdrs.AUTHORIZATION,
+            hdrs.COOKIE,
+            *((coalesce_headers,) if isinstance(coalesce_headers, str) else tuple(coalesce_headers or ())),
+        )
         default_content_type = http_options.content_type
         default_charset = http_options.charset
         if default_content_type is not None and ";" in default_content_type:
@@ -361,7 +870,7 @@ class HttpTransport(Invoker):
 
         middlewares = context.get("http_middleware", [])
 
-        async def handler(request: web.Request) -> Union[web.Response, web.FileResponse]:
+        async def handler(request: web.Request) -> Union[web.Response, web.FileResponse, AsyncIteratorResponse]:
             logger = logging.getLogger("tomodachi.http.handler").bind(handler=func.__name__, type="tomodachi.http")
 
             kwargs = dict(original_kwargs)
@@ -384,10 +893,25 @@ class HttpTransport(Invoker):
             if not context.get("_http_accept_new_requests"):
                 raise web.HTTPServiceUnavailable()
 
+            if stream_request_body and "body_stream" in args_set:
+                body_stream = RequestBodyStream(request, max_size=request._client_max_size)
+                kwargs["body_stream"] = body_stream
+                if "body_stream" in values.args:
+                    arg_matches["body_stream"] = body_stream
+
             if pre_handler_func:
                 await pre_handler_func(obj, request)
                 logger = logging.getLogger("tomodachi.http.handler")
 
+            coalesce_key: Optional[Tuple] = None
+            if single_flight is not None and request.method in (hdrs.METH_GET, hdrs.METH_HEAD):
+                coalesce_key = (
+                    request.method,
+                    request.path,
+                    request.query_string,
+                    *(tuple(request.headers.getall(name, ())) for name in coalesce_header_names),
+                )
+
             @functools.wraps(func)
             async def routine_func(
                 *a: Any, **kw: Any
@@ -403,6 +927,14 @@ class HttpTransport(Invoker):
                 if values.varargs and not values.defaults and len(a) > len(args_values) + 1:
                     args_values += a[len(args_values) + 1 :]
 
+                if single_flight is not None and coalesce_key is not None:
+                    return cast(
+                        Union[str, bytes, Dict, List, Tuple, web.Response, web.FileResponse, Response],
+                        await coalesced_call(
+                            single_flight, coalesce_key, functools.partial(func, *(obj, *args_values), **kw_values)
+                        ),
+                    )
+
                 routine = func(*(obj, *args_values), **kw_values)
                 return_value: Union[str, bytes, Dict, List, Tuple, web.Response, web.FileResponse, Response] = (
                     (await routine) if inspect.isawaitable(routine) else routine
@@ -429,8 +961,13 @@ class HttpTransport(Invoker):
                 if values.varargs and not values.defaults and len(a) > len(args_values) + 1:
                     args_values += a[len(args_values) + 1 :]
 
-                routine = func(obj, *args_values, **kwargs)
-                return_value = (await routine) if inspect.isawaitable(routine) else routine
+                if single_flight is not None and coalesce_key is not None:
+                    return_value = await coalesced_call(
+                        single_flight, coalesce_key, functools.partial(func, obj, *args_values, **kwargs)
+                    )
+                else:
+                    routine = func(obj, *args_values, **kwargs)
+                    return_value = (await routine) if inspect.isawaitable(routine) else routine
 
             response = resolve_response_sync(
                 return_value,
@@ -439,10 +976,25 @@ class HttpTransport(Invoker):
                 default_content_type=default_content_type,
                 default_charset=default_charset,
             )
+
+            if isinstance(response, AsyncIteratorResponse):
+                # streamed within the handler, so that the response is awaited as an active request on shutdown
+                response.headers[hdrs.SERVER] = http_options.server_header or ""
+                await response.stream(request, context)
+
             return response
 
         context["_http_routes"] = context.get("_http_routes", [])
-        route_context = {"ignore_logging": ignore_logging}
+        route_context = {
+            "ignore_logging": ignore_logging,
+            "stream_request_body": stream_request_body,
+            "client_max_size": route_client_max_size,
+            "concurrency_limiter": route_concurrency_limiter,
+            "ignore_concurrency_limit": ignore_concurrency_limit,
+            "rate_limiter": route_rate_limiter,
+            "rate_limit_key": rate_limit_key or get_forwarded_remote_ip,
+            "handler_name": func.__name__,
+        }
         if isinstance(method, list) or isinstance(method, tuple):
             for m in method:
                 context["_http_routes"].append((m.upper(), pattern, handler, route_context))
@@ -518,7 +1070,7 @@ class HttpTransport(Invoker):
             except PermissionError:
                 raise web.HTTPForbidden()
 
-        route_context = {"ignore_logging": ignore_logging}
+        route_context = {"ignore_logging": ignore_logging, "handler_name": func.__name__}
         context["_http_routes"] = context.get("_http_routes", [])
         context["_http_routes"].append(("GET", pattern, handler, route_context))
 
@@ -553,7 +1105,7 @@ class HttpTransport(Invoker):
 
         middlewares = context.get("http_middleware", [])
 
-        async def handler(request: web.Request) -> Union[web.Response, web.FileResponse]:
+        async def handler(request: web.Request) -> Union[web.Response, web.FileResponse, AsyncIteratorResponse]:
             logger = logging.getLogger("tomodachi.http.handler").bind(
                 handler=func.__name__, type="tomodachi.http_error", status_code=status_code
             )
@@ -627,6 +1179,11 @@ class HttpTransport(Invoker):
                 default_content_type=default_content_type,
                 default_charset=default_charset,
             )
+
+            if isinstance(response, AsyncIteratorResponse):
+                response.headers[hdrs.SERVER] = http_options.server_header or ""
+                await response.stream(request, context)
+
             return response
 
         context["_http_error_handler"] = context.get("_http_error_handler", {})
@@ -746,6 +1303,8 @@ class HttpTransport(Invoker):
                 except Exception:
                     pass
 
+                WebSocketHub.discard_websocket(websocket)
+
                 if access_log:
                     response_logger.info(
                         websocket_state="error",
@@ -812,7 +1371,11 @@ class HttpTransport(Invoker):
                 except Exception:
                     pass
 
-        return await cls.request_handler(obj, context, _func, "GET", url, pre_handler_func=_pre_handler_func)
+                WebSocketHub.discard_websocket(websocket)
+
+        return await cls.request_handler(
+            obj, context, _func, "GET", url, pre_handler_func=_pre_handler_func, ignore_concurrency_limit=True
+        )
 
     @staticmethod
     async def start_server(obj: Any, context: Dict) -> Optional[Callable]:
@@ -827,6 +1390,9 @@ class HttpTransport(Invoker):
 
         server_header = http_options.server_header or ""
         access_log = http_options.access_log or False
+        access_log_sample_rate = http_options.access_log_sample_rate
+        access_log_slow_request_threshold = http_options.access_log_slow_request_threshold
+        access_log_summary = AccessLogSummary() if access_log and http_options.access_log_summary_interval else None
         real_ip_header = http_options.real_ip_header or ""
         real_ip_from = (
             [http_options.real_ip_from]
@@ -862,14 +1428,26 @@ class HttpTransport(Invoker):
             logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
 
             async def request_handler_func(
-                request: web.Request, handler: Callable, request_start_time: int = 0
+                request: web.Request,
+                handler: Callable,
+                request_start_time: int = 0,
+                response: Optional[Union[web.Response, web.FileResponse]] = None,
             ) -> Union[web.Response, web.FileResponse]:
-                response: Optional[Union[web.Response, web.FileResponse]] = None
                 request_ip = RequestHandler.get_request_ip(request, context)
 
-                # try to read body if it exists and can be read
+                route_client_max_size = getattr(handler, "client_max_size", None)
+                if route_client_max_size is not None:
+                    request._client_max_size = route_client_max_size
+
+                # try to read body if it exists and can be read - unless the body is streamed to the handler
                 premature_eof = False
-                if request.body_exists and request.can_read_body and (request.content_length or request.content):
+                if (
+                    response is None
+                    and not getattr(handler, "stream_request_body", False)
+                    and request.body_exists
+                    and request.can_read_body
+                    and (request.content_length or request.content)
+                ):
                     try:
                         if (
                             request._read_bytes is None
@@ -965,7 +1543,11 @@ class HttpTransport(Invoker):
                 try:
                     if not response:
                         handler_start_time = time.perf_counter_ns() if access_log else 0
-                        response = await handler(request)
+                        request_timeout = request.headers.get(REQUEST_TIMEOUT_HEADER)
+                        if request_timeout is None:
+                            response = await handler(request)
+                        else:
+                            response = await call_handler_with_timeout(handler, request, request_timeout)
                         handler_stop_time = time.perf_counter_ns() if access_log else 0
                 except web.HTTPException as e:
                     handler_stop_time = time.perf_counter_ns() if access_log else 0
@@ -1065,46 +1647,64 @@ class HttpTransport(Invoker):
                             elif isinstance(ignore_logging, (list, tuple)) and status_code in ignore_logging:
                                 pass
                             else:
-                                response_logger.info(
-                                    status_code=status_code,
-                                    replaced_status_code=replaced_status_code or Ellipsis,
-                                    remote_ip=request_ip,
-                                    auth_user=getattr(request._cache.get("auth") or {}, "login", None) or Ellipsis,
-                                    request_method=request.method,
-                                    request_path=request.path,
-                                    request_query_string=request.query_string or Ellipsis,
-                                    http_version=version_string,
-                                    response_content_length=(
-                                        response.content_length
-                                        if response is not None and response.content_length is not None
-                                        else Ellipsis
-                                    ),
-                                    replaced_response_content_length=replaced_response_content_length or Ellipsis,
-                                    request_content_length=(
-                                        request.content_length
-                                        if request.content_length
-                                        else (
+                                if access_log_summary is not None:
+                                    access_log_summary.add(
+                                        getattr(handler, "handler_name", None), status_code, total_request_time
+                                    )
+
+                                # errors and slow requests are always logged, while other requests are sampled
+                                if (
+                                    access_log_sample_rate >= 1.0
+                                    or status_code >= 500
+                                    or (
+                                        access_log_slow_request_threshold is not None
+                                        and total_request_time >= access_log_slow_request_threshold
+                                    )
+                                    or random.random() < access_log_sample_rate
+                                ):
+                                    response_logger.info(
+                                        status_code=status_code,
+                                        replaced_status_code=replaced_status_code or Ellipsis,
+                                        remote_ip=request_ip,
+                                        auth_user=getattr(request._cache.get("auth") or {}, "login", None) or Ellipsis,
+                                        request_method=request.method,
+                                        request_path=request.path,
+                                        request_query_string=request.query_string or Ellipsis,
+                                        http_version=version_string,
+                                        response_content_length=(
+                                            response.content_length
+                                            if response is not None and response.content_length is not None
+                                            else Ellipsis
+                                        ),
+                                        replaced_response_content_length=replaced_response_content_length or Ellipsis,
+                                        request_content_length=(
+                                            request.content_length
+                                            if request.content_length
+                                            else (
+                                                len(request._read_bytes)
+                                                if request._read_bytes is not None and len(request._read_bytes)
+                                                else Ellipsis
+                                            )
+                                        ),
+                                        request_content_read_length=(
                                             len(request._read_bytes)
                                             if request._read_bytes is not None and len(request._read_bytes)
+                                            else (
+                                                (request.content and getattr(request.content, "total_bytes", None))
+                                                or Ellipsis
+                                            )
+                                        ),
+                                        user_agent=request.headers.get("User-Agent", ""),
+                                        handler_elapsed_time=(
+                                            "{0:.5f}s".format(round(handler_elapsed_time, 5))
+                                            if handler_start_time and handler_stop_time
                                             else Ellipsis
-                                        )
-                                    ),
-                                    request_content_read_length=(
-                                        len(request._read_bytes)
-                                        if request._read_bytes is not None and len(request._read_bytes)
-                                        else (
-                                            (request.content and getattr(request.content, "total_bytes", None))
-                                            or Ellipsis
-                                        )
-                                    ),
-                                    user_agent=request.headers.get("User-Agent", ""),
-                                    handler_elapsed_time=(
-                                        "{0:.5f}s".format(round(handler_elapsed_time, 5))
-                                        if handler_start_time and handler_stop_time
-                                        else Ellipsis
-                                    ),
-                                    request_time="{0:.5f}s".format(round(total_request_time, 5)),
-                                )
+                                        ),
+                                        request_time="{0:.5f}s".format(round(total_request_time, 5)),
+                                        sample_rate=(
+                                            access_log_sample_rate if access_log_sample_rate < 1.0 else Ellipsis
+                                        ),
+                                    )
                         else:
                             response_logger.info(
                                 websocket_state="closed",
@@ -1121,34 +1721,7 @@ class HttpTransport(Invoker):
                         response.headers[hdrs.SERVER] = server_header
 
                         if request_version in ((1, 0), (1, 1)) and not request._cache.get("is_websocket"):
-                            use_keepalive = False
-                            if context["_http_tcp_keepalive"] and request.keep_alive and request.protocol:
-                                use_keepalive = True
-                                if any(
-                                    [
-                                        # keep-alive timeout not set or is non-positive
-                                        (
-                                            not context["_http_keepalive_timeout"]
-                                            or context["_http_keepalive_timeout"] <= 0
-                                        ),
-                                        # keep-alive request count has passed configured max for this connection
-                                        (
-                                            context["_http_max_keepalive_requests"]
-                                            and request.protocol._request_count
-                                            >= context["_http_max_keepalive_requests"]
-                                        ),
-                                        # keep-alive time has passed configured max for this connection
-                                        (
-                                            context["_http_max_keepalive_time"]
-                                            and time.time()
-                                            > getattr(request.protocol, "_connection_start_time", 0)
-                                            + context["_http_max_keepalive_time"]
-                                        ),
-                                    ]
-                                ):
-                                    use_keepalive = False
-
-                            if use_keepalive:
+                            if use_keepalive(request, context):
                                 response.headers[hdrs.CONNECTION] = "keep-alive"
                                 response.headers[hdrs.KEEP_ALIVE] = "timeout={}{}".format(
                                     request.protocol._keepalive_timeout,
@@ -1185,115 +1758,115 @@ class HttpTransport(Invoker):
 
                     return response
 
+            async def limited_request_handler_func(
+                request: web.Request,
+                handler: Callable,
+                rate_limiter: Optional[RateLimiter],
+                concurrency_limiters: Tuple[ConcurrencyLimiter, ...],
+                request_start_time: int = 0,
+            ) -> Union[web.Response, web.FileResponse]:
+                if rate_limiter is not None:
+                    rate_limit_key = getattr(handler, "rate_limit_key")(request)
+                    retry_after = rate_limiter.hit(rate_limit_key) if rate_limit_key is not None else 0.0
+                    if retry_after:
+                        increase_execution_context_value("http_rate_limited_requests")
+                        return await request_handler_func(
+                            request,
+                            handler,
+                            request_start_time=request_start_time,
+                            response=web.HTTPTooManyRequests(
+                                headers={
+                                    hdrs.RETRY_AFTER: str(math.ceil(retry_after)),
+                                    "X-RateLimit-Limit": str(rate_limiter.burst),
+                                    "X-RateLimit-Remaining": "0",
+                                }
+                            ),
+                        )
+
+                acquired_limiters: List[ConcurrencyLimiter] = []
+                try:
+                    for limiter in concurrency_limiters:
+                        if limiter.try_acquire():
+                            acquired = True
+                        else:
+                            increase_execution_context_value("http_queued_requests")
+                            try:
+                                acquired = await limiter.acquire()
+                            finally:
+                                decrease_execution_context_value("http_queued_requests")
+
+                        if not acquired:
+                            # shed load - respond early without reading the request body or calling the handler
+                            increase_execution_context_value("http_shed_requests")
+                            return await request_handler_func(
+                                request,
+                                handler,
+                                request_start_time=request_start_time,
+                                response=web.HTTPServiceUnavailable(
+                                    headers={hdrs.RETRY_AFTER: str(http_options.overload_retry_after)}
+                                ),
+                            )
+                        acquired_limiters.append(limiter)
+
+                    return await request_handler_func(request, handler, request_start_time=request_start_time)
+                finally:
+                    for limiter in acquired_limiters:
+                        limiter.release()
+
             @web.middleware
             async def middleware(request: web.Request, handler: Callable) -> Union[web.Response, web.FileResponse]:
                 request_start_time = time.perf_counter_ns() if access_log else 0
 
                 increase_execution_context_value("http_current_tasks")
                 increase_execution_context_value("http_total_tasks")
-
-                task = asyncio.ensure_future(
-                    request_handler_func(request, handler, request_start_time=request_start_time)
+                context["_http_active_requests"] += 1
+
+                rate_limiter = getattr(handler, "rate_limiter", None)
+                concurrency_limiters = getattr(handler, "concurrency_limiters", None)
+                coro = (
+                    limited_request_handler_func(
+                        request,
+                        handler,
+                        rate_limiter,
+                        concurrency_limiters or (),
+                        request_start_time=request_start_time,
+                    )
+                    if rate_limiter is not None or concurrency_limiters
+                    else request_handler_func(request, handler, request_start_time=request_start_time)
                 )
-                context["_http_active_requests"] = context.get("_http_active_requests", set())
-                context["_http_active_requests"].add(task)
+
                 try:
-                    await asyncio.shield(task)
-                except asyncio.CancelledError:
-                    try:
-                        await task
-                        decrease_execution_context_value("http_current_tasks")
-                        try:
-                            context["_http_active_requests"].remove(task)
-                        except KeyError:
-                            pass
-                        return task.result()
-                    except Exception:
-                        decrease_execution_context_value("http_current_tasks")
-                        try:
-                            context["_http_active_requests"].remove(task)
-                        except KeyError:
-                            pass
-                        raise
-                except web.HTTPException:
-                    decrease_execution_context_value("http_current_tasks")
+                    if not AIOHTTP_CANCELS_HANDLERS:
+                        return await coro
+
+                    # the handler is shielded from cancellation if the client disconnects, so that it will always
+                    # finish its execution.
+                    task = asyncio.ensure_future(coro)
                     try:
-                        context["_http_active_requests"].remove(task)
-                    except KeyError:
-                        pass
+                        return await asyncio.shield(task)
+                    except asyncio.CancelledError:
+                        return await task
+                except (web.HTTPException, asyncio.CancelledError):
                     raise
                 except Exception as e:
-                    decrease_execution_context_value("http_current_tasks")
-                    try:
-                        context["_http_active_requests"].remove(task)
-                    except KeyError:
-                        pass
                     limit_exception_traceback(e, ("tomodachi.transport.http",))
                     logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
                     raise
-                except BaseException:
+                finally:
                     decrease_execution_context_value("http_current_tasks")
-                    try:
-                        context["_http_active_requests"].remove(task)
-                    except KeyError:
-                        pass
-                    raise
-                decrease_execution_context_value("http_current_tasks")
-                try:
-                    context["_http_active_requests"].remove(task)
-                except KeyError:
-                    pass
+                    context["_http_active_requests"] -= 1
 
-                return task.result()
+            client_max_size = parse_client_max_size(http_options.client_max_size)
 
-            client_max_size_option = http_options.client_max_size
-            client_max_size_option_str = str(client_max_size_option).upper()
-            client_max_size = (1024**2) * 100
-            try:
-                if (
-                    client_max_size_option
-                    and isinstance(client_max_size_option, str)
-                    and (client_max_size_option_str.endswith("G") or client_max_size_option_str.endswith("GB"))
-                ):
-                    client_max_size = int(
-                        re.sub(cast(str, r"^([0-9]+)GB?$"), cast(str, r"\1"), client_max_size_option_str)
-                    ) * (1024**3)
-                elif (
-                    client_max_size_option
-                    and isinstance(client_max_size_option, str)
-                    and (client_max_size_option_str.endswith("M") or client_max_size_option_str.endswith("MB"))
-                ):
-                    client_max_size = int(re.sub(r"^([0-9]+)MB?$", r"\1", client_max_size_option_str)) * (1024**2)
-                elif (
-                    client_max_size_option
-                    and isinstance(client_max_size_option, str)
-                    and (client_max_size_option_str.endswith("K") or client_max_size_option_str.endswith("KB"))
-                ):
-                    client_max_size = int(re.sub(r"^([0-9]+)KB?$", r"\1", client_max_size_option_str)) * 1024
-                elif (
-                    client_max_size_option
-                    and isinstance(client_max_size_option, str)
-                    and (client_max_size_option_str.endswith("B"))
-                ):
-                    client_max_size = int(re.sub(r"^([0-9]+)B?$", r"\1", client_max_size_option_str))
-                elif client_max_size_option:
-                    client_max_size = int(client_max_size_option)
-            except Exception:
-                raise ValueError(
-                    "Bad value for http option client_max_size: {}".format(str(client_max_size_option))
-                ) from None
-            if client_max_size >= 0 and client_max_size < 1024:
-                raise ValueError(
-                    "Too low value for http option client_max_size: {} ({})".format(
-                        str(client_max_size_option), client_max_size_option
-                    )
-                )
-            if client_max_size > 1024**3:
-                raise ValueError(
-                    "Too high value for http option client_max_size: {} ({})".format(
-                        str(client_max_size_option), client_max_size_option
-                    )
+            concurrency_limiter = (
+                ConcurrencyLimiter(
+                    http_options.max_concurrent_requests,
+                    max_queued=http_options.max_queued_requests,
+                    max_queue_time=http_options.max_queue_time,
                 )
+                if http_options.max_concurrent_requests
+                else None
+            )
 
             middlewares = context.get("_aiohttp_pre_middleware", []) + [middleware]
             app: web.Application = web.Application(middlewares=middlewares, client_max_size=client_max_size)
@@ -1305,6 +1878,23 @@ class HttpTransport(Invoker):
                     raise ValueError("Bad http route pattern '{}': {}".format(pattern, exc)) from None
                 ignore_logging = route_context.get("ignore_logging", False)
                 setattr(handler, "ignore_logging", ignore_logging)
+                setattr(handler, "stream_request_body", route_context.get("stream_request_body", False))
+                setattr(handler, "client_max_size", route_context.get("client_max_size"))
+                setattr(
+                    handler,
+                    "concurrency_limiters",
+                    tuple(
+                        limiter
+                        for limiter in (
+                            route_context.get("concurrency_limiter"),
+                            None if route_context.get("ignore_concurrency_limit") else concurrency_limiter,
+                        )
+                        if limiter
+                    ),
+                )
+                setattr(handler, "rate_limiter", route_context.get("rate_limiter"))
+                setattr(handler, "rate_limit_key", route_context.get("rate_limit_key"))
+                setattr(handler, "handler_name", route_context.get("handler_name"))
                 resource = DynamicResource(compiled_pattern)
                 app.router.register_resource(resource)
                 if method.upper() == "GET":
@@ -1312,6 +1902,7 @@ class HttpTransport(Invoker):
                 resource.add_route(method.upper(), handler, expect_handler=None)
 
             context["_http_accept_new_requests"] = True
+            context["_http_active_requests"] = 0
 
             port = http_options.port
             host = http_options.host
@@ -1463,6 +2054,32 @@ class HttpTransport(Invoker):
                     HttpTransport.server_port_mapping[web_server] = str(port)
             context["_http_port"] = port
 
+            def log_access_log_summary() -> None:
+                if access_log_summary is None:
+                    return
+                for summary in access_log_summary.flush():
+                    response_logger.info(
+                        "access log summary",
+                        handler=summary["handler"] or Ellipsis,
+                        request_count=summary["request_count"],
+                        status_codes=summary["status_codes"],
+                        request_time_p50="{0:.5f}s".format(round(summary["request_time_p50"], 5)),
+                        request_time_p90="{0:.5f}s".format(round(summary["request_time_p90"], 5)),
+                        request_time_p99="{0:.5f}s".format(round(summary["request_time_p99"], 5)),
+                        request_time_max="{0:.5f}s".format(round(summary["request_time_max"], 5)),
+                    )
+
+            async def access_log_summary_loop(interval: float) -> None:
+                while True:
+                    await asyncio.sleep(interval)
+                    log_access_log_summary()
+
+            access_log_summary_task = (
+                asyncio.ensure_future(access_log_summary_loop(float(http_options.access_log_summary_interval or 0)))
+                if access_log_summary is not None
+                else None
+            )
+
             stop_method = getattr(obj, "_stop_service", None)
 
             async def stop_service(*args: Any, **kwargs: Any) -> None:
@@ -1499,6 +2116,12 @@ class HttpTransport(Invoker):
                         pass
                     context["_http_open_websockets"] = []
 
+                open_event_streams = list(context.get("_http_open_event_streams", set()))
+                if open_event_streams:
+                    logger.info("closing event streams", connection_count=len(open_event_streams))
+                    for event_stream_response in open_event_streams:
+                        event_stream_response.stop()
+
                 termination_grace_period_seconds = 30
                 try:
                     termination_grace_period_seconds = int(
@@ -1513,20 +2136,20 @@ class HttpTransport(Invoker):
                     wait_start_time = time.time()
 
                     while wait_start_time + max(2, termination_grace_period_seconds) > time.time():
-                        active_requests = context.get("_http_active_requests", set())
+                        active_requests = context["_http_active_requests"]
                         if not active_requests and not len(web_server.connections):
                             break
 
                         if log_wait_message:
                             log_wait_message = False
-                            if len(web_server.connections) and len(web_server.connections) != len(active_requests):
+                            if len(web_server.connections) and len(web_server.connections) != active_requests:
                                 logger.info(
                                     "awaiting keep-alive connections", connection_count=len(web_server.connections)
                                 )
                             if active_requests:
                                 logger.info(
                                     "awaiting requests to complete",
-                                    request_count=len(active_requests),
+                                    request_count=active_requests,
                                     grace_period_seconds=termination_grace_period_seconds,
                                 )
 
@@ -1536,30 +2159,30 @@ class HttpTransport(Invoker):
 
                 context["_http_accept_new_requests"] = False
 
-                active_requests = context.get("_http_active_requests", set())
+                active_requests = context["_http_active_requests"]
                 if active_requests:
                     if log_wait_message:
                         logger.info(
                             "awaiting requests to complete",
-                            request_count=len(active_requests),
+                            request_count=active_requests,
                             grace_period_seconds=termination_grace_period_seconds,
                         )
 
+                    # in-flight requests are only tracked as a count - poll until they have finished execution
+                    wait_start_time = time.time()
                     try:
-                        await asyncio.wait_for(
-                            asyncio.shield(asyncio.gather(*active_requests, return_exceptions=True)),
-                            timeout=max(2, termination_grace_period_seconds),
-                        )
-                        await asyncio.sleep(1)
-                        active_requests = context.get("_http_active_requests", set())
-                    except (Exception, asyncio.TimeoutError, asyncio.CancelledError):
-                        active_requests = context.get("_http_active_requests", set())
-                        if active_requests:
-                            logger.warning(
-                                "all requests did not gracefully finish execution",
-                                remaining_request_count=len(active_requests),
-                            )
-                    context["_http_active_requests"] = set()
+                        while context["_http_active_requests"] > 0:
+                            if wait_start_time + max(2, termination_grace_period_seconds) <= time.time():
+                                logger.warning(
+                                    "all requests did not gracefully finish execution",
+                                    remaining_request_count=context["_http_active_requests"],
+                                )
+                                break
+                            await asyncio.sleep(0.05)
+                        else:
+                            await asyncio.sleep(1)
+                    except (Exception, asyncio.CancelledError):
+                        pass
 
                 if shutdown_sleep > 0:
                     await asyncio.sleep(shutdown_sleep)
@@ -1573,6 +2196,10 @@ class HttpTransport(Invoker):
                 else:
                     await app.shutdown()
 
+                if access_log_summary_task:
+                    access_log_summary_task.cancel()
+                    log_access_log_summary()
+
                 if logger_handler:
                     response_logger = logging.getLogger("tomodachi.http.response")
                     response_logger.removeHandler(logger_handler)
@@ -1601,6 +2228,56 @@ class HttpTransport(Invoker):
         return _start_server
 
 
+def parse_client_max_size(client_max_size_option: Any, upper_limit: Optional[int] = 1024**3) -> int:
+    client_max_size_option_str = str(client_max_size_option).upper()
+    client_max_size = (1024**2) * 100
+    try:
+        if (
+            client_max_size_option
+            and isinstance(client_max_size_option, str)
+            and (client_max_size_option_str.endswith("G") or client_max_size_option_str.endswith("GB"))
+        ):
+            client_max_size = int(re.sub(cast(str, r"^([0-9]+)GB?$"), cast(str, r"\1"), client_max_size_option_str)) * (
+                1024**3
+            )
+        elif (
+            client_max_size_option
+            and isinstance(client_max_size_option, str)
+            and (client_max_size_option_str.endswith("M") or client_max_size_option_str.endswith("MB"))
+        ):
+            client_max_size = int(re.sub(r"^([0-9]+)MB?$", r"\1", client_max_size_option_str)) * (1024**2)
+        elif (
+            client_max_size_option
+            and isinstance(client_max_size_option, str)
+            and (client_max_size_option_str.endswith("K") or client_max_size_option_str.endswith("KB"))
+        ):
+            client_max_size = int(re.sub(r"^([0-9]+)KB?$", r"\1", client_max_size_option_str)) * 1024
+        elif (
+            client_max_size_option
+            and isinstance(client_max_size_option, str)
+            and (client_max_size_option_str.endswith("B"))
+        ):
+            client_max_size = int(re.sub(r"^([0-9]+)B?$", r"\1", client_max_size_option_str))
+        elif client_max_size_option:
+            client_max_size = int(client_max_size_option)
+    except Exception:
+        raise ValueError("Bad value for http option client_max_size: {}".format(str(client_max_size_option))) from None
+    if client_max_size >= 0 and client_max_size < 1024:
+        raise ValueError(
+            "Too low value for http option client_max_size: {} ({})".format(
+                str(client_max_size_option), client_max_size_option
+            )
+        )
+    if upper_limit is not None and client_max_size > upper_limit:
+        raise ValueError(
+            "Too high value for http option client_max_size: {} ({})".format(
+                str(client_max_size_option), client_max_size_option
+            )
+        )
+
+    return client_max_size
+
+
 async def resolve_response(
     value: Union[str, bytes, Dict, List, Tuple, web.Response, web.FileResponse, Response],
     request: Optional[web.Request] = None,
@@ -1608,7 +2285,7 @@ async def resolve_response(
     status_code: Optional[Union[str, int]] = None,
     default_content_type: Optional[str] = None,
     default_charset: Optional[str] = None,
-) -> Union[web.Response, web.FileResponse]:
+) -> Union[web.Response, web.FileResponse, AsyncIteratorResponse]:
     return resolve_response_sync(
         value=value,
         request=request,
@@ -1626,14 +2303,14 @@ def resolve_response_sync(
     status_code: Optional[Union[str, int]] = None,
     default_content_type: Optional[str] = None,
     default_charset: Optional[str] = None,
-) -> Union[web.Response, web.FileResponse]:
+) -> Union[web.Response, web.FileResponse, AsyncIteratorResponse]:
     if not context:
         context = {}
     if isinstance(value, Response):
         return value.get_aiohttp_response(
             context, default_content_type=default_content_type, default_charset=default_charset
         )
-    if isinstance(value, web.FileResponse):
+    if isinstance(value, (web.FileResponse, AsyncIteratorResponse)):
         return value
 
     status = (
@@ -1666,11 +2343,154 @@ def resolve_response_sync(
             value = ""  # type: ignore
         body = value
 
+    if hasattr(body, "__aiter__"):
+        return AsyncIteratorResponse(
+            cast(AsyncIterable, body),
+            status=status,
+            headers=headers,
+            content_type=default_content_type,
+            charset=default_charset,
+        )
+
     return Response(
         body=body, status=status, headers=headers, content_type=default_content_type, charset=default_charset
     ).get_aiohttp_response(context)
 
 
+def use_keepalive(request: web.BaseRequest, context: Dict) -> bool:
+    if not (context.get("_http_tcp_keepalive") and request.keep_alive and request.protocol):
+        return False
+    return not any(
+        [
+            # keep-alive timeout not set or is non-positive
+            (not context["_http_keepalive_timeout"] or context["_http_keepalive_timeout"] <= 0),
+            # keep-alive request count has passed configured max for this connection
+            (
+                context["_http_max_keepalive_requests"]
+                and request.protocol._request_count >= context["_http_max_keepalive_requests"]
+            ),
+            # keep-alive time has passed configured max for this connection
+            (
+                context["_http_max_keepalive_time"]
+                and time.time()
+                > getattr(request.protocol, "_connection_start_time", 0) + context["_http_max_keepalive_time"]
+            ),
+        ]
+    )
+
+
+async def call_handler_with_timeout(handler: Callable, request: web.Request, request_timeout: str) -> Any:
+    # The handler is cancelled if the time budget of the request (as sent by the client) runs out, and requests which
+    # have already passed their deadline are never handled. The deadline is propagated to outgoing messages.
+    timeout = parse_deadline(request_timeout)
+    if timeout is None:
+        return await handler(request)
+    if timeout <= 0:
+        increase_execution_context_value("http_deadline_exceeded_requests")
+        raise web.HTTPGatewayTimeout()
+
+    token = set_deadline(time.time() + timeout)
+    try:
+        task = asyncio.ensure_future(handler(request))
+    finally:
+        reset_deadline(token)
+
+    try:
+        done, _ = await asyncio.wait((task,), timeout=timeout)
+        if not done and request.get(AsyncIteratorResponse.STARTED_KEY):
+            # a streamed response can't be turned into an error once its headers have been sent and is left to finish
+            done, _ = await asyncio.wait((task,))
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+    if not done:
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        task.cancel()
+        increase_execution_context_value("http_deadline_exceeded_requests")
+        raise web.HTTPGatewayTimeout()
+
+    return task.result()
+
+
+async def coalesced_call(single_flight: SingleFlight, key: Tuple, func: Callable) -> Any:
+    # Concurrent calls with the same key share the return value (or raised exception) of a single handler execution.
+    # Return values that can only be sent once (such as streamed bodies) aren't shared, in which case the handler is
+    # called again for each of the waiting requests.
+    async def _call() -> Tuple[Any, Optional[web.HTTPException]]:
+        try:
+            routine = func()
+            return ((await routine) if inspect.isawaitable(routine) else routine), None
+        except web.HTTPException as e:
+            return None, e
+
+    (return_value, http_exception), shared = await single_flight.do(key, _call)
+    if shared:
+        if http_exception is None and not is_shareable_return_value(return_value):
+            routine = func()
+            return (await routine) if inspect.isawaitable(routine) else routine
+
+        increase_execution_context_value("http_coalesced_requests")
+        if http_exception is not None:
+            http_exception = copy_http_exception(http_exception)
+        else:
+            return_value = copy_response(return_value)
+
+    if http_exception is not None:
+        raise http_exception
+    return return_value
+
+
+def is_shareable_return_value(value: Any) -> bool:
+    if isinstance(value, web.StreamResponse) and not isinstance(value, (web.Response, web.FileResponse)):
+        return False
+    if isinstance(value, dict):
+        value = value.get("body")
+    elif isinstance(value, (list, tuple)):
+        value = value[1] if len(value) > 1 else None
+    return not hasattr(value, "__aiter__")
+
+
+def copy_response(value: Any) -> Any:
+    # aiohttp responses can only be sent once, so each request gets its own copy of a shared response. Cookies set by
+    # the handler belong to the request that it was called for and are left out of the copies.
+    if isinstance(value, web.FileResponse):
+        return web.FileResponse(
+            getattr(value, "_path"),
+            chunk_size=getattr(value, "_chunk_size"),
+            status=value.status,
+            reason=value.reason,
+            headers=without_set_cookie(value.headers),
+        )
+    if isinstance(value, web.Response):
+        return web.Response(
+            body=value.body, status=value.status, reason=value.reason, headers=without_set_cookie(value.headers)
+        )
+    if isinstance(value, dict) and value.get("headers"):
+        return {**value, "headers": without_set_cookie(value["headers"])}
+    if isinstance(value, (list, tuple)) and len(value) > 2 and value[2]:
+        copied_value = (*value[:2], without_set_cookie(value[2]), *value[3:])
+        return list(copied_value) if isinstance(value, list) else copied_value
+    return value
+
+
+def without_set_cookie(headers: Union[Mapping[str, Any], Iterable[Tuple[str, Any]]]) -> CIMultiDict:
+    copied_headers: CIMultiDict = CIMultiDict(headers)
+    copied_headers.popall(hdrs.SET_COOKIE, None)
+    return copied_headers
+
+
+def copy_http_exception(exception: web.HTTPException) -> web.HTTPException:
+    copied_exception = type(exception).__new__(type(exception))
+    web.HTTPException.__init__(
+        copied_exception, headers=without_set_cookie(exception.headers), reason=exception.reason, text=exception.text
+    )
+    for key, value in vars(exception).items():
+        if not key.startswith("_"):
+            setattr(copied_exception, key, value)
+    return copied_exception
+
+
 async def get_http_response_status(
     value: Union[str, bytes, Dict, List, Tuple, web.Response, web.FileResponse, Response, Exception],
     request: Optional[web.Request] = None,
@@ -1732,8 +2552,38 @@ def http(
     *,
     ignore_logging: Union[bool, List[int], Tuple[int, ...]] = False,
     pre_handler_func: Optional[Callable] = None,
+    stream_request_body: bool = False,
+    client_max_size: Optional[Union[str, int]] = None,
+    max_concurrent_requests: Optional[int] = None,
+    max_queued_requests: Optional[int] = None,
+    max_queue_time: Optional[float] = None,
+    ignore_concurrency_limit: bool = False,
+    rate_limit: Optional[float] = None,
+    rate_limit_burst: Optional[int] = None,
+    rate_limit_key: Optional[Callable[[web.Request], Any]] = None,
+    coalesce_requests: bool = False,
+    coalesce_headers: Optional[Union[str, List[str], Tuple[str, ...]]] = None,
 ) -> Callable:
-    return cast(Callable, __http(method, url, ignore_logging=ignore_logging, pre_handler_func=pre_handler_func))
+    return cast(
+        Callable,
+        __http(
+            method,
+            url,
+            ignore_logging=ignore_logging,
+            pre_handler_func=pre_handler_func,
+            stream_request_body=stream_request_body,
+            client_max_size=client_max_size,
+            max_concurrent_requests=max_concurrent_requests,
+            max_queued_requests=max_queued_requests,
+            max_queue_time=max_queue_time,
+            ignore_concurrency_limit=ignore_concurrency_limit,
+            rate_limit=rate_limit,
+            rate_limit_burst=rate_limit_burst,
+            rate_limit_key=rate_limit_key,
+            coalesce_requests=coalesce_requests,
+            coalesce_headers=coalesce_headers,
+        ),
+    )
 
 
 def http_error(status_code: int) -> Callable:
@@ -1,8 +1,9 @@
 import asyncio
 import datetime
 import functools
+import heapq
 import inspect
-import random
+import itertools
 import time
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union, cast
 
@@ -20,6 +21,8 @@ from tomodachi.helpers.execution_context import (
 from tomodachi.helpers.middleware import execute_middlewares
 from tomodachi.invoker import Invoker
 
+MAX_SLEEP_TIME = 60.0
+
 
 class Scheduler(Invoker):
     close_waiter: Optional[asyncio.Future] = None
@@ -30,7 +33,7 @@ class Scheduler(Invoker):
         obj: Any,
         context: Dict,
         func: Any,
-        interval: Optional[Union[str, int]] = None,
+        interval: Optional[Union[str, int, float]] = None,
         timestamp: Optional[str] = None,
         timezone: Optional[str] = None,
         immediately: Optional[bool] = False,
@@ -123,7 +126,7 @@ class Scheduler(Invoker):
         return (await start_func) if start_func else None
 
     @classmethod
-    def schedule_handler_with_interval(cls, interval: Union[str, int]) -> Callable:
+    def schedule_handler_with_interval(cls, interval: Union[str, int, float]) -> Callable:
         def _func(_: Any, obj: Any, context: Dict, func: Any) -> Any:
             return cls.schedule_handler(obj, context, func, interval=interval)
 
@@ -132,10 +135,10 @@ class Scheduler(Invoker):
     @staticmethod
     def next_call_at(
         current_time: float,
-        interval: Optional[Union[str, int]] = None,
+        interval: Optional[Union[str, int, float]] = None,
         timestamp: Optional[str] = None,
         timezone: Optional[str] = None,
-    ) -> int:
+    ) -> float:
         if not timezone:
             tz = tzlocal.get_localzone()
         else:
@@ -239,6 +242,10 @@ class Scheduler(Invoker):
         if interval is not None:
             if isinstance(interval, int):
                 return int(current_time + interval)
+            if isinstance(interval, float):
+                if interval <= 0:
+                    raise Exception("Invalid interval")
+                return current_time + interval
 
             interval_aliases: Dict[Tuple[str, ...], Union[str, int]] = {
                 ("every second", "1s", "1 s", "1second", "1 second", "second", "secondly", "once per second"): 1,
@@ -288,18 +295,31 @@ class Scheduler(Invoker):
             }
             interval = interval.lower()
 
-            if interval.endswith("s") or interval.endswith("seconds"):
+            if interval.endswith("ms") or interval.endswith("milliseconds"):
                 try:
-                    interval = int(interval.replace("seconds", "").replace("s", "").replace(" ", ""))
+                    interval = float(interval.replace("milliseconds", "").replace("ms", "").replace(" ", "")) / 1000
                 except ValueError:
                     pass
+            elif interval.endswith("s") or interval.endswith("seconds"):
+                seconds = interval.replace("seconds", "").replace("s", "").replace(" ", "")
+                try:
+                    interval = int(seconds)
+                except ValueError:
+                    try:
+                        interval = float(seconds)
+                    except ValueError:
+                        pass
 
             try:
-                interval_value: Union[str, int] = [v for k, v in interval_aliases.items() if interval in k][0]
+                interval_value: Union[str, int, float] = [v for k, v in interval_aliases.items() if interval in k][0]
             except IndexError:
                 interval_value = interval
             if isinstance(interval_value, int):
                 return int(current_time + interval_value)
+            if isinstance(interval_value, float):
+                if not interval_value > 0:
+                    raise Exception("Invalid interval")
+                return current_time + interval_value
 
             try:
                 next_at = get_next_datetime(
@@ -371,21 +391,87 @@ class Scheduler(Invoker):
         return timezone
 
     @classmethod
-    async def start_schedule_loop(
-        cls,
-        obj: Any,
-        context: Dict,
-        handler: Callable,
-        func: Callable,
-        interval: Optional[Union[str, int]] = None,
-        timestamp: Optional[str] = None,
-        timezone: Optional[str] = None,
-        immediately: Optional[bool] = False,
-    ) -> None:
-        logger = logging.getLogger("tomodachi.scheduler").bind(handler=func.__name__)
-        logging.bind_logger(logger)
+    def get_next_call_at(cls, scheduled_function: "ScheduledFunction", current_time: float) -> float:
+        interval = scheduled_function.interval
+        last_call_at = scheduled_function.last_call_at
+
+        if isinstance(interval, (int, float)) and not isinstance(interval, bool) and last_call_at is not None:
+            # numeric intervals are counted from the previous call, so that the calls don't drift over time
+            next_call_at = last_call_at + interval
+            if next_call_at > current_time:
+                return next_call_at
+
+        next_call_at = cls.next_call_at(
+            current_time, interval, scheduled_function.timestamp, scheduled_function.timezone
+        )
+        if last_call_at is not None and next_call_at <= last_call_at:
+            # the clock has been set back - the same point in time is never scheduled twice
+            next_call_at = cls.next_call_at(
+                last_call_at, interval, scheduled_function.timestamp, scheduled_function.timezone
+            )
+        return next_call_at
 
-        timezone = cls.get_timezone(timezone)
+    @classmethod
+    def call_scheduled_function(cls, scheduled_function: "ScheduledFunction", call_at: float) -> float:
+        # Starts a task for the scheduled function and returns the time of the next call. Calls are skipped while too
+        # many earlier calls of the function are still running.
+        logger = scheduled_function.logger
+        current_time = time.time()
+        tasks = scheduled_function.tasks = [task for task in scheduled_function.tasks if not task.done()]
+
+        if len(tasks) >= 20 or (scheduled_function.too_many_tasks and len(tasks) >= 15):
+            if not scheduled_function.too_many_tasks and len(tasks) >= scheduled_function.threshold:
+                scheduled_function.too_many_tasks = True
+                logger.warning(
+                    "too many scheduled tasks for function in scheduled function loop",
+                    task_count=len(tasks),
+                    task_limit=scheduled_function.threshold,
+                )
+                scheduled_function.threshold = scheduled_function.threshold * 2
+            scheduled_function.last_call_at = None
+            return cls.get_next_call_at(scheduled_function, current_time + 10)
+
+        if scheduled_function.too_many_tasks:
+            scheduled_function.threshold = 20
+            logger.info(
+                "scheduled function loop resumed as task count is within threshold",
+                task_count=len(tasks),
+                task_limit=scheduled_function.threshold,
+            )
+        scheduled_function.too_many_tasks = False
+
+        invocation_time = (
+            datetime.datetime.fromtimestamp(
+                call_at if scheduled_function.subsecond else int(call_at), tz=datetime.timezone.utc
+            )
+            .isoformat()
+            .replace("+00:00", "Z")
+        )
+
+        task = asyncio.ensure_future(scheduled_function.handler(invocation_time=invocation_time))
+        if hasattr(task, "set_name"):
+            getattr(task, "set_name")(
+                "{}/{}".format(
+                    scheduled_function.func.__qualname__,
+                    datetime.datetime.fromtimestamp(current_time, tz=datetime.timezone.utc)
+                    .isoformat(timespec="microseconds")
+                    .replace("+00:00", "Z"),
+                )
+            )
+        tasks.append(task)
+
+        if scheduled_function.immediately:
+            # the next call after the call made on service start is scheduled as if the service was started then
+            scheduled_function.immediately = False
+        else:
+            scheduled_function.last_call_at = call_at
+
+        return cls.get_next_call_at(scheduled_function, current_time)
+
+    @classmethod
+    async def start_schedule_loop(cls, obj: Any, context: Dict, scheduled_functions: List["ScheduledFunction"]) -> None:
+        logger = logging.getLogger("tomodachi.scheduler")
+        logging.bind_logger(logger)
 
         if not cls.close_waiter:
             cls.close_waiter = asyncio.Future()
@@ -394,8 +480,6 @@ class Scheduler(Invoker):
 
         async def schedule_loop() -> None:
             sleep_task: asyncio.Future
-            current_time = time.time()
-            max_sleep_time = 300
 
             try:
                 sleep_task = asyncio.ensure_future(asyncio.sleep(10))
@@ -418,138 +502,59 @@ class Scheduler(Invoker):
                             raise Exception("scheduled function loop not started for 120 seconds")
                         except Exception as e:
                             logging.getLogger("exception").exception(str(e))
-
-                await asyncio.sleep(0.001)
-                await start_waiter
-
-                if not cls.close_waiter or cls.close_waiter.done():
-                    logger.warning(
-                        "scheduled function loop never started before service termination",
-                    )
-                else:
-                    ts0 = cls.next_call_at(current_time, interval, timestamp, timezone)
-                    for _ in range(10):
-                        ts1 = cls.next_call_at(ts0, interval, timestamp, timezone)
-                        ts2 = cls.next_call_at(ts1, interval, timestamp, timezone)
-                        if int(ts2 - ts1) // 2 < max_sleep_time:
-                            max_sleep_time = int(ts2 - ts1) // 2
-                    max_sleep_time = min(max(max_sleep_time, 10), 300)
             except (Exception, asyncio.CancelledError) as e:
                 logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
 
-                await asyncio.sleep(0.001)
-                await start_waiter
-
-                if not cls.close_waiter or cls.close_waiter.done():
-                    logger.warning(
-                        "scheduled function loop never started before service termination",
-                    )
+            await asyncio.sleep(0.001)
+            await start_waiter
 
-            next_call_at: Optional[int] = None
-            prev_call_at: Optional[int] = None
-            tasks: List = []
-            too_many_tasks = False
-            threshold = 20
-            run_immediately = immediately
+            if not cls.close_waiter or cls.close_waiter.done():
+                logger.warning(
+                    "scheduled function loop never started before service termination",
+                )
 
-            while cls.close_waiter and not cls.close_waiter.done():
+            # A single min-heap of the next call of every scheduled function. The loop sleeps until the earliest call is
+            # due (or at most MAX_SLEEP_TIME seconds, to notice changes to the system clock) and is woken up early
+            # when the service is stopping.
+            heap: List[Tuple[float, int, ScheduledFunction]] = []
+            counter = itertools.count()
+            current_time = time.time()
+            for scheduled_function in scheduled_functions:
                 try:
-                    if not run_immediately:
-                        last_time = current_time
-                        actual_time = time.time()
-                        current_time = last_time + 1 if int(last_time + 1) < int(actual_time) else actual_time
-
-                        if next_call_at is None:
-                            next_call_at = cls.next_call_at(current_time, interval, timestamp, timezone)
-                            if prev_call_at and prev_call_at == next_call_at:
-                                if int(last_time + 60) < int(actual_time):
-                                    logger.warning(
-                                        "scheduled function loop has lost time sync and may not run",
-                                    )
-                                    try:
-                                        raise Exception("scheduled function loop has lost time sync and may not run")
-                                    except Exception as e:
-                                        logging.getLogger("exception").exception(str(e))
-
-                                next_call_at = None
-                                await asyncio.sleep(1)
-                                continue
-                        sleep_diff = int(current_time + 1) - actual_time + 0.001
-                        if next_call_at > time.time() + 8:
-                            sleep_diff = int((next_call_at - time.time()) / 3)
-                        if sleep_diff >= max_sleep_time:
-                            sleep_diff = int(max_sleep_time - random.random() * 5)
-                        if sleep_diff >= 2:
-                            sleep_task = asyncio.ensure_future(asyncio.sleep(sleep_diff))
-                            await asyncio.wait([sleep_task, cls.close_waiter], return_when=asyncio.FIRST_COMPLETED)
-                            if not sleep_task.done():
-                                sleep_task.cancel()
-                            current_time = time.time()
-                        else:
-                            await asyncio.sleep(sleep_diff)
-                        if next_call_at > time.time():
-                            continue
-                    run_immediately = False
-                    if cls.close_waiter.done():
-                        continue
-                    prev_call_at = next_call_at
-                    next_call_at = None
-
-                    tasks = [task for task in tasks if not task.done()]
-
-                    if len(tasks) >= 20:
-                        if not too_many_tasks and len(tasks) >= threshold:
-                            too_many_tasks = True
-                            logger.warning(
-                                "too many scheduled tasks for function in scheduled function loop",
-                                task_count=len(tasks),
-                                task_limit=threshold,
-                            )
-                            threshold = threshold * 2
-                        await asyncio.sleep(1)
-                        current_time = time.time()
-                        next_call_at = cls.next_call_at(current_time + 10, interval, timestamp, timezone)
-                        continue
-                    if too_many_tasks and len(tasks) >= 15:
-                        await asyncio.sleep(1)
-                        current_time = time.time()
-                        next_call_at = cls.next_call_at(current_time + 10, interval, timestamp, timezone)
-                        continue
-                    if too_many_tasks and len(tasks) < 15:
-                        threshold = 20
-                        logger.info(
-                            "scheduled function loop resumed as task count is within threshold",
-                            task_count=len(tasks),
-                            task_limit=threshold,
-                        )
-
-                    too_many_tasks = False
-
-                    current_time = time.time()
-                    invocation_time = (
-                        datetime.datetime.fromtimestamp(int(prev_call_at or current_time), tz=datetime.timezone.utc)
-                        .isoformat()
-                        .replace("+00:00", "Z")
+                    next_call_at = (
+                        current_time
+                        if scheduled_function.immediately
+                        else cls.get_next_call_at(scheduled_function, current_time)
                     )
-
-                    task = asyncio.ensure_future(handler(invocation_time=invocation_time))
-                    if hasattr(task, "set_name"):
-                        getattr(task, "set_name")(
-                            "{}/{}".format(
-                                func.__qualname__,
-                                datetime.datetime.fromtimestamp(current_time, tz=datetime.timezone.utc)
-                                .isoformat(timespec="microseconds")
-                                .replace("+00:00", "Z"),
-                            )
-                        )
-                    tasks.append(task)
-                except (Exception, asyncio.CancelledError) as e:
+                except Exception as e:
                     logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
-                    await asyncio.sleep(1)
-                except BaseException as e:
+                    continue
+                heap.append((next_call_at, next(counter), scheduled_function))
+            heapq.heapify(heap)
+
+            while heap and cls.close_waiter and not cls.close_waiter.done():
+                call_at, _, scheduled_function = heap[0]
+                current_time = time.time()
+                if call_at > current_time:
+                    await asyncio.wait([cls.close_waiter], timeout=min(call_at - current_time, MAX_SLEEP_TIME))
+                    continue
+
+                heapq.heappop(heap)
+                if current_time - call_at > 60:
+                    scheduled_function.logger.warning(
+                        "scheduled function loop has lost time sync and may not run",
+                    )
+                try:
+                    next_call_at = cls.call_scheduled_function(scheduled_function, call_at)
+                except (Exception, asyncio.CancelledError) as e:
                     logging.getLogger("exception").exception("uncaught exception: {}".format(str(e)))
-                    await asyncio.sleep(1)
+                    next_call_at = current_time + 1
+                heapq.heappush(heap, (next_call_at, next(counter), scheduled_function))
 
+            if not heap and cls.close_waiter and not cls.close_waiter.done():
+                await cls.close_waiter
+
+            tasks = [task for scheduled_function in scheduled_functions for task in scheduled_function.tasks]
             if tasks:
                 task_waiter = asyncio.ensure_future(asyncio.wait(tasks))
                 sleep_task = asyncio.ensure_future(asyncio.sleep(2))
@@ -559,7 +564,7 @@ class Scheduler(Invoker):
                 for task in tasks:
                     if task.done():
                         continue
-                    task_name = getattr(task, "get_name")() if hasattr(task, "get_name") else func.__name__
+                    task_name = getattr(task, "get_name")() if hasattr(task, "get_name") else "scheduled function"
                     logger.warning(
                         "awaiting task to complete",
                         task_name=task_name,
@@ -573,7 +578,7 @@ class Scheduler(Invoker):
                     for task in tasks:
                         if task.done():
                             continue
-                        task_name = getattr(task, "get_name")() if hasattr(task, "get_name") else func.__name__
+                        task_name = getattr(task, "get_name")() if hasattr(task, "get_name") else "scheduled function"
                         logger.warning(
                             "still awaiting task to finish",
                             task_name=task_name,
@@ -588,19 +593,12 @@ class Scheduler(Invoker):
             if cls.close_waiter and not cls.close_waiter.done():
                 cls.close_waiter.set_result(None)
 
-                if not start_waiter.done():
-                    start_waiter.set_result(None)
-
-                await stop_waiter
-                if stop_method:
-                    await stop_method(*args, **kwargs)
-            else:
-                if not start_waiter.done():
-                    start_waiter.set_result(None)
+            if not start_waiter.done():
+                start_waiter.set_result(None)
 
-                await stop_waiter
-                if stop_method:
-                    await stop_method(*args, **kwargs)
+            await stop_waiter
+            if stop_method:
+                await stop_method(*args, **kwargs)
 
         setattr(obj, "_stop_service", stop_service)
 
@@ -633,23 +631,71 @@ class Scheduler(Invoker):
         async def _schedule() -> None:
             cls.close_waiter = asyncio.Future()
 
+            scheduled_functions = []
             for interval, timestamp, timezone, immediately, func, handler in context.get(
                 "_schedule_scheduled_functions", []
             ):
-                cls.next_call_at(
-                    time.time(), interval, timestamp, cls.get_timezone(timezone)
-                )  # test provided interval/timestamp on init
-
-            for interval, timestamp, timezone, immediately, func, handler in context.get(
-                "_schedule_scheduled_functions", []
-            ):
-                await asyncio.create_task(
-                    cls.start_schedule_loop(obj, context, handler, func, interval, timestamp, timezone, immediately)
+                timezone = cls.get_timezone(timezone)
+                cls.next_call_at(time.time(), interval, timestamp, timezone)  # test provided interval/timestamp on init
+                scheduled_functions.append(
+                    ScheduledFunction(
+                        func,
+                        handler,
+                        interval,
+                        timestamp,
+                        timezone,
+                        bool(immediately),
+                        subsecond=not float(cls.next_call_at(0.0, interval, timestamp, timezone)).is_integer(),
+                    )
                 )
 
+            await asyncio.create_task(cls.start_schedule_loop(obj, context, scheduled_functions))
+
         return _schedule
 
 
+class ScheduledFunction(object):
+    # A scheduled function's position in the scheduler, together with the tasks of its calls that are still running.
+    __slots__ = (
+        "func",
+        "handler",
+        "interval",
+        "timestamp",
+        "timezone",
+        "immediately",
+        "subsecond",
+        "logger",
+        "last_call_at",
+        "tasks",
+        "too_many_tasks",
+        "threshold",
+    )
+
+    def __init__(
+        self,
+        func: Callable,
+        handler: Callable,
+        interval: Optional[Union[str, int, float]] = None,
+        timestamp: Optional[str] = None,
+        timezone: Optional[str] = None,
+        immediately: bool = False,
+        *,
+        subsecond: bool = False,
+    ) -> None:
+        self.func = func
+        self.handler = handler
+        self.interval = interval
+        self.timestamp = timestamp
+        self.timezone = timezone
+        self.immediately = immediately
+        self.subsecond = subsecond
+        self.logger = logging.getLogger("tomodachi.scheduler").bind(handler=func.__name__)
+        self.last_call_at: Optional[float] = None
+        self.tasks: List[asyncio.Future] = []
+        self.too_many_tasks = False
+        self.threshold = 20
+
+
 __schedule = Scheduler.decorator(Scheduler.schedule_handler)
 __scheduler = Scheduler.decorator(Scheduler.schedule_handler)
 
@@ -663,7 +709,7 @@ __monthly = Scheduler.decorator(Scheduler.schedule_handler_with_interval("monthl
 
 
 def schedule(
-    interval: Optional[Union[str, int]] = None,
+    interval: Optional[Union[str, int, float]] = None,
     timestamp: Optional[str] = None,
     timezone: Optional[str] = None,
     immediately: Optional[bool] = False,
@@ -674,7 +720,7 @@ def schedule(
 
 
 def scheduler(
-    interval: Optional[Union[str, int]] = None,
+    interval: Optional[Union[str, int, float]] = None,
     timestamp: Optional[str] = None,
     timezone: Optional[str] = None,
     immediately: Optional[bool] = False,